@@ -1,10 +1,16 @@
 #!/usr/bin/python
-from modules.constants import default_data_file, program_description
-from modules.order import Order
+from modules.constants import configure, get_settings, program_description, default_benchmark_size, \
+    default_backtest_seed, default_backtest_size, default_commit_count, default_gateway_host, default_gateway_port
 from modules.orderbook import OrderBook
 from modules.timer import Timer
-from modules.auxiliary import create_order_list, generate_random_orders, create_order_book_from_orders_list
+from modules.validation import Reject, validate_order
+from modules.auxiliary import create_order_list, generate_random_orders, create_order_book_from_orders_list, \
+    read_orders
 from argparse import ArgumentParser, RawTextHelpFormatter
+from itertools import count
+import atexit
+import json
+import random
 import sys
 
 
@@ -16,32 +22,268 @@ for a line-by-line input or
 for a serialized JSON file, eg.
         python main.py example.json -s
 '-s' flag prints each transaction.
+'-t [file]' option saves all transactions to a JSON lines file.
+In the line-by-line mode, '-d' flag prints only changed price levels instead of the whole order book.
+The input may be either a JSON array of orders or JSON lines (one order per line).
+To process large files without loading them into memory, use '--stream', eg.
+        python main.py random_orders.json --stream
+To decode and validate orders in parallel processes while the order book matches them, use:
+        python main.py random_orders.json -p [number_of_processes]
+'-m [file]' option collects matching metrics and saves them to a JSON file
+(or in Prometheus text format if the file name ends with '.prom').
+To keep the memory usage of long sessions bounded, use '--max-orders [number]' (resting orders per side)
+and '--price-band [distance]' (maximum distance of resting orders from the mid price). Orders breaking
+the limits are evicted (the lowest priority first) or, with '--limit-policy reject', rejected;
+each of them is reported as an event, eg. {"event": "evicted", "reason": "price_band", "id": 1, ...}.
+'-a [file]' option collects fills and saves a report (VWAP, volume per price, fills per order,
+iceberg statistics) to a JSON file. To make the same report from saved transactions or a journal, use:
+        python main.py [input] --fill-log [file] -a [report]
+(the input, needed only for iceberg statistics, is optional).
+
+Orders may carry a 'symbol' field. To match orders of many symbols, each in its own order book,
+with the books partitioned across worker processes, use:
+        python main.py [input] -w [number_of_workers]
+
+'--snapshot [file]' option saves the final order book state to a snapshot file.
+To restart from a snapshot and replay only the orders of the input following it, use:
+        python main.py [input] --restore [file]
+
+To keep a durable journal of accepted orders and fills, use '-j [file]'. The journal is flushed
+to the disk every '--commit-count [number]' entries and, optionally, every '--commit-interval [seconds]'.
+To rebuild the order book from a journal and continue the line-by-line session, use:
+        python main.py --recover [file] -j [file]
+(with '--restore [file]' if the journaled session started from a snapshot).
+
+To accept orders from many TCP clients (JSON lines, as in the line-by-line mode), use:
+        python main.py --serve [port] --host [host]
+Clients receive acknowledgements and fills of their own orders, may cancel them with {"cancel": id}
+and subscribe to all trades with {"subscribe": "trades"}.
 
 In order to generate list of orders and the save to file, use:
         python main.py -g [number] -o [file]
 eg.:
         python main.py -g 100000 -o random_orders.json
 If the output is not specified, the default one is used.
+Use '--symbols [number]' to spread generated orders over many symbols.
+Use '--format jsonl' (or '--format binary' for a binary order log) to generate large files quickly
+(requires NumPy), and '--seed [seed]' to make the generated orders reproducible.
+Distributions of generated orders and the default output are read from 'config.json' (next to this file)
+only when orders are generated. Use '--config [file]' (or ICEBERG_CONFIG environment variable) to read another
+file and '--set [name]=[value]' (or eg. ICEBERG_PRICE_MEAN environment variable) to override a single setting.
+
+To convert a JSON file to a compact binary order log, use:
+        python main.py [input] -c [output]
+Binary order logs can be used as an input in the same way as JSON files.
+
+To run the benchmark suite and save its results to a JSON file, use:
+        python main.py -b [file] --benchmark-orders [number]
+
+To compare settings of the random orders generator, use a backtest: every combination of values of
+'--grid [name]=[value],[value]...' options is generated with every seed of '--seeds [seed] [seed]...'
+and matched in a separate job, eg.:
+        python main.py --backtest results.csv --grid peak_min=10,50 --grid iceberg_probability=0.2,0.5 --seeds 1 2
+Jobs run in parallel ('-w [number_of_workers]', all CPUs by default) and each of them generates
+'--backtest-orders [number]' orders. Results are saved to a JSON (or CSV) file.
 """, formatter_class=RawTextHelpFormatter)
 parser.add_argument('input', metavar='input', type=str, nargs='?', default="",
                     help='reads JSON file with serialized orders')
 parser.add_argument('-g', '--generate-orders', metavar='number_of_transactions', type=int, nargs=1, default=[0],
-                    help='generates random orders data to a file (' + default_data_file + ' by default)')
+                    help='generates random orders data to a file (\'default_output\' setting by default)')
 parser.add_argument('-o', '--output', metavar='output', type=str, nargs='?', default=None,
                     help='saves generated random orders to a specific file')
+parser.add_argument('--format', dest='output_format', type=str, choices=['json', 'jsonl', 'binary'],
+                    default='json', help='format of generated random orders: JSON array, JSON lines or binary log')
+parser.add_argument('--seed', metavar='seed', type=int, default=None,
+                    help='seed of the random orders generator')
+parser.add_argument('--symbols', metavar='number_of_symbols', type=int, default=0,
+                    help='spreads generated random orders over a number of symbols')
+parser.add_argument('--config', metavar='config', type=str, default=None,
+                    help='reads settings of the random orders generator from a file instead of config.json')
+parser.add_argument('--set', metavar='name=value', dest='settings', type=str, action='append', default=[],
+                    help='overrides a single setting of the random orders generator')
+parser.add_argument('-c', '--convert', metavar='order_log', type=str, default=None,
+                    help='converts the input file to a binary order log')
+parser.add_argument('-b', '--benchmark', metavar='benchmark_output', type=str, nargs='?', default=None, const='',
+                    help='runs the benchmark suite and optionally saves results to a JSON file')
+parser.add_argument('--benchmark-orders', metavar='benchmark_orders', type=int, default=default_benchmark_size,
+                    help='the number of operations in each benchmark scenario')
+parser.add_argument('--backtest', metavar='backtest_output', type=str, nargs='?', default=None, const='',
+                    help='runs a backtest over a grid of generator settings and optionally saves results to a file')
+parser.add_argument('--grid', metavar='name=value,value', type=str, action='append', default=[],
+                    help='values of a generator setting compared by the backtest')
+parser.add_argument('--seeds', metavar='seed', type=int, nargs='+', default=None,
+                    help='seeds of the random orders generator used by the backtest')
+parser.add_argument('--backtest-orders', metavar='backtest_orders', type=int, default=default_backtest_size,
+                    help='the number of orders generated by each backtest job')
 parser.add_argument('-s', '--show-details', dest='show_details', action='store_true',
                     help='shows the list of the transactions')
+parser.add_argument('-t', '--transactions-output', metavar='transactions_output', type=str, default=None,
+                    help='saves performed transactions to a JSON lines file')
+parser.add_argument('-d', '--depth-updates', dest='depth_updates', action='store_true',
+                    help='prints changed price levels instead of the order book state after each order')
+parser.add_argument('-m', '--metrics', metavar='metrics_output', type=str, default=None,
+                    help='collects matching metrics and saves them to a JSON (or .prom) file')
+parser.add_argument('-a', '--analytics', metavar='analytics_output', type=str, default=None,
+                    help='saves a report of performed fills to a JSON file')
+parser.add_argument('--fill-log', metavar='fill_log', type=str, default=None,
+                    help='makes the report of fills from a transactions file or a journal instead of matching')
+parser.add_argument('--max-orders', metavar='max_orders', type=int, default=None,
+                    help='maximum number of resting orders of each side of the order book')
+parser.add_argument('--price-band', metavar='price_band', type=int, default=None,
+                    help='maximum distance of resting orders from the mid price')
+parser.add_argument('--limit-policy', dest='limit_policy', type=str, choices=['evict', 'reject'], default='evict',
+                    help='evicts resting orders of the lowest priority or rejects new ones at the order limit')
+parser.add_argument('--snapshot', metavar='snapshot_output', type=str, default=None,
+                    help='saves the final order book state to a snapshot file')
+parser.add_argument('--restore', metavar='snapshot', type=str, default=None,
+                    help='restores the order book from a snapshot and replays the rest of the input')
+parser.add_argument('-j', '--journal', metavar='journal', type=str, default=None,
+                    help='appends accepted orders and fills to a journal file')
+parser.add_argument('--commit-count', metavar='commit_count', type=int, default=default_commit_count,
+                    help='the number of journal entries flushed to the disk at once')
+parser.add_argument('--commit-interval', metavar='commit_interval', type=float, default=None,
+                    help='maximum time (in seconds) between flushes of the journal')
+parser.add_argument('--recover', metavar='journal', type=str, default=None,
+                    help='rebuilds the order book from a journal file')
+parser.add_argument('-w', '--workers', metavar='number_of_workers', type=int, default=0,
+                    help='matches orders of many symbols (or runs backtest jobs) in parallel worker processes')
+parser.add_argument('--serve', metavar='port', type=int, nargs='?', default=None, const=default_gateway_port,
+                    help='runs a TCP order gateway (on port ' + str(default_gateway_port) + ' by default)')
+parser.add_argument('--host', metavar='host', type=str, default=default_gateway_host,
+                    help='host of the TCP order gateway')
+parser.add_argument('--stream', dest='stream', action='store_true',
+                    help='reads orders from the input file one by one while matching them')
+parser.add_argument('-p', '--parse-workers', metavar='number_of_processes', type=int, default=0,
+                    help='parses the input file in parallel processes while matching orders')
 
 # parse program arguments
 args = parser.parse_args()
 input_file: str = args.input
 output_file: str = args.output
 number_of_transactions: int = args.generate_orders[0]
+output_format: str = args.output_format
+seed: int = args.seed
+number_of_symbols: int = args.symbols
+order_log_file: str = args.convert
+benchmark_output: str = args.benchmark
+benchmark_orders: int = args.benchmark_orders
+backtest_output: str = args.backtest
+backtest_seeds: list[int] = args.seeds or [default_backtest_seed if args.seed is None else args.seed]
+backtest_orders: int = args.backtest_orders
 show_details: bool = args.show_details
+stream: bool = args.stream
+transactions_output: str = args.transactions_output
+depth_updates: bool = args.depth_updates
+metrics_output: str = args.metrics
+analytics_output: str = args.analytics
+fill_log: str = args.fill_log
+gateway_port: int = args.serve
+gateway_host: str = args.host
+number_of_workers: int = args.workers
+number_of_parse_workers: int = args.parse_workers
+snapshot_output: str = args.snapshot
+snapshot_input: str = args.restore
+journal_output: str = args.journal
+journal_input: str = args.recover
+
+# settings are checked here, but read only if orders are generated
+if any('=' not in setting for setting in args.settings):
+    parser.error("settings have to be given as 'name=value'")
+try:
+    configure(args.config, **dict(setting.split('=', 1) for setting in args.settings))
+except ValueError as error:
+    parser.error(str(error))
+
+# modules needed only by some of the modes are imported by them
+metrics = None
+if metrics_output:
+    from modules.metrics import Metrics
+    metrics = Metrics()
+
+recorder = None
+if analytics_output and not fill_log:
+    from modules.analytics import FillRecorder
+    recorder = FillRecorder()
+
+limits = None
+if args.max_orders is not None or args.price_band is not None:
+    from modules.limits import BookLimits
+    # events are printed together with transactions, ie. always in the line-by-line mode
+    print_events = show_details or (not input_file and gateway_port is None)
+    try:
+        limits = BookLimits(args.max_orders, args.price_band, args.limit_policy,
+                            event_sink=(lambda event: print(event.return_json())) if print_events else None)
+    except ValueError as error:
+        parser.error(str(error))
 
 # run the timer to measure performance
 timer = Timer()
 
+if benchmark_output is not None:
+    """ Runs the benchmark suite. """
+    from modules.benchmark import format_results, run_benchmarks
+    print("Running benchmarks ({0} operations per scenario)...".format(benchmark_orders))
+    results = run_benchmarks(benchmark_orders)
+    print(format_results(results))
+    if benchmark_output:
+        with open(benchmark_output, 'w') as file:
+            json.dump(results, file, indent=4)
+        print("Saved results to {0}.".format(benchmark_output))
+    sys.exit(0)
+
+if backtest_output is not None:
+    """ Runs generate and match jobs over a grid of generator settings. """
+    from modules import backtest
+    try:
+        grid = backtest.parse_grid(args.grid)
+        jobs = backtest.create_jobs(grid, backtest_seeds, backtest_orders)
+    except ValueError as error:
+        parser.error("invalid backtest grid: " + str(error))
+
+    print("Running {0} backtest jobs ({1} orders each)...".format(len(jobs), backtest_orders))
+    results = backtest.run_backtest(jobs, number_of_workers)
+    print(backtest.format_results(results, grid))
+    delta_time = timer()
+    print("\nElapsed time: {0} seconds.".format(delta_time))
+    if backtest_output:
+        backtest.save_results(results, backtest_output)
+        print("Saved results to {0}.".format(backtest_output))
+    sys.exit(0)
+
+if fill_log:
+    """ Makes the report of fills from a transactions file or a journal. """
+    from modules.analytics import create_report, load_fills, load_orders
+    from modules.journal import is_journal
+    if not analytics_output:
+        print("In order to make a report of fills, '-a [file]' option has to be present.")
+        sys.exit(0)
+
+    fills = load_fills(fill_log)
+    orders_source = input_file or (fill_log if is_journal(fill_log) else None)
+    report = create_report(fills, load_orders(orders_source) if orders_source else None)
+    with open(analytics_output, 'w') as file:
+        json.dump(report, file, indent=4)
+    delta_time = timer()
+    print("Analyzed {0} fills in {1} seconds. Saved report to {2}.".format(len(fills), delta_time, analytics_output))
+    sys.exit(0)
+
+journal = None
+if journal_output:
+    from modules.journal import Journal
+    journal = Journal(journal_output, args.commit_count, args.commit_interval)
+    # commits remaining entries whichever way the program ends
+    atexit.register(journal.close)
+
+if gateway_port is not None:
+    """ Runs the TCP order gateway. """
+    from modules.gateway import run_gateway
+    run_gateway(gateway_host, gateway_port, OrderBook(metrics=metrics, journal=journal, limits=limits))
+    if metrics is not None:
+        metrics.save(metrics_output)
+        print("Saved metrics to {0}.".format(metrics_output))
+    print("\nGateway stopped.")
+    sys.exit(0)
+
 if output_file and number_of_transactions <= 0:
     print("In order to generate random data, '-g [number]' option on has to be present.")
     sys.exit(0)
@@ -52,49 +294,174 @@ if number_of_transactions > 0:
         print("WARNING: '" + str(input_file) + "' argument is omitted.\n"
                                                "To specify an output path use '-o [output]' option.\n")
 
+    try:
+        settings = get_settings()
+    except ValueError as error:
+        parser.error("invalid settings: " + str(error))
     if not output_file:
-        output_file = default_data_file
+        output_file = settings['default_output']
 
-    orders = generate_random_orders(number_of_transactions, output_file=output_file)
+    if number_of_symbols > 0 and output_format != 'json':
+        print("'--symbols' option is supported only by the JSON format.")
+        sys.exit(0)
+
+    if output_format != 'json':
+        # NumPy is needed only for this generator
+        from modules.generator import write_random_orders
+        write_random_orders(number_of_transactions, output_file=output_file, seed=seed,
+                            binary=output_format == 'binary')
+    else:
+        random.seed(seed)
+        generate_random_orders(number_of_transactions, output_file=output_file, symbols=number_of_symbols)
     delta_time = timer()
     print("Generated {0} orders in {1} seconds. Saved data to {2}.".format(
         number_of_transactions, delta_time, output_file))
     sys.exit(0)
 
+if input_file and order_log_file:
+    """ Converts JSON file to a binary order log. """
+    from modules.orderlog import convert_to_order_log
+    convert_to_order_log(read_orders(input_file), order_log_file)
+    delta_time = timer()
+    print("Converted {0} to {1} in {2} seconds.".format(input_file, order_log_file, delta_time))
+    sys.exit(0)
+
+if input_file and number_of_workers > 0:
+    """ Matches orders of many symbols in parallel worker processes. """
+    from modules.sharding import process_sharded_file
+    print("Processing {0} with {1} workers...".format(input_file, number_of_workers))
+    number_of_transactions, order_books = process_sharded_file(input_file, number_of_workers,
+                                                               transactions_output=transactions_output)
+
+    delta_time = timer()
+    print("\nProcessed {0} orders of {1} symbols.".format(number_of_transactions, len(order_books)))
+    print("\nElapsed time (parsing and matching): {0} seconds.".format(delta_time))
+    print("{:.2f} orders per second.".format(number_of_transactions / delta_time))
+    sys.exit(0)
+
+restored_order_book = None
+position = 0
+if journal_input:
+    """ Rebuilds the order book from a journal (and the snapshot it continues from) to continue the session. """
+    if input_file:
+        print("A journal has no position in the input file, so '--recover' can't be combined with it.")
+        sys.exit(0)
+    restored_order_book = OrderBook.recover(journal_input, journal=journal, snapshot_file=snapshot_input,
+                                            metrics=metrics, store_transactions=True, limits=limits)
+    delta_time = timer()
+    print("Recovered {0} in {1} seconds.".format(journal_input, delta_time))
+elif snapshot_input:
+    """ Restores the order book from a snapshot; only the following orders of the input are replayed. """
+    restored_order_book, position = OrderBook.load_snapshot(snapshot_input, metrics=metrics, journal=journal,
+                                                            store_transactions=show_details or not input_file,
+                                                            transaction_sink=recorder, limits=limits)
+    delta_time = timer()
+    print("Restored {0} (position {1}) in {2} seconds.".format(snapshot_input, position, delta_time))
+
+if input_file and (stream or number_of_parse_workers > 0):
+    """ Parse JSON file order by order, matching each order right after it is read. """
+    if number_of_parse_workers > 0:
+        from modules.pipeline import read_orders_in_parallel
+        print("Streaming {0} with {1} parsing processes...".format(input_file, number_of_parse_workers))
+        orders = read_orders_in_parallel(input_file, number_of_parse_workers, position)
+    else:
+        print("Streaming {0}...".format(input_file))
+        orders = read_orders(input_file, position)
+
+    # the counter advances once per order read from the file
+    counter = count()
+    orders = (order for order, _ in zip(orders, counter))
+    if recorder is not None:
+        orders = recorder.record_orders(orders)
+    order_book = create_order_book_from_orders_list(orders, print_output=show_details,
+                                                    transactions_output=transactions_output, metrics=metrics,
+                                                    order_book=restored_order_book, journal=journal,
+                                                    transaction_sink=recorder, limits=limits)
+    number_of_transactions = next(counter)
+
+    delta_time = timer()
+    print("\nFinal order book state:\n" + order_book.get_state())
+    print("\nElapsed time (parsing and matching): {0} seconds.".format(delta_time))
+    print("{:.2f} orders per second.".format(number_of_transactions / delta_time))
+    if limits is not None:
+        print("Rejected {0} and evicted {1} orders breaking the limits.".format(limits.rejected_orders,
+                                                                           limits.evicted_orders))
+    if snapshot_output:
+        order_book.save_snapshot(snapshot_output, position + number_of_transactions)
+        print("Saved snapshot to {0}.".format(snapshot_output))
+    if metrics is not None:
+        metrics.save(metrics_output)
+        print("Saved metrics to {0}.".format(metrics_output))
+    if recorder is not None:
+        from modules.analytics import create_report
+        with open(analytics_output, 'w') as file:
+            json.dump(create_report(recorder.get_fills(), recorder.get_orders()), file, indent=4)
+        print("Saved report of fills to {0}.".format(analytics_output))
+    sys.exit(0)
+
 if input_file:
     """ Parse JSON file and load to memory. """
     print("Parsing {0}...".format(input_file))
-    orders = create_order_list(input_file)
+    orders = create_order_list(input_file, position)
     delta_time = timer()
     print("Loaded {0} in {1} seconds.".format(input_file, delta_time))
 
     number_of_transactions = len(orders)
-    order_book = create_order_book_from_orders_list(orders, print_output=show_details)
+    if recorder is not None:
+        orders = recorder.record_orders(orders)
+    order_book = create_order_book_from_orders_list(orders, print_output=show_details,
+                                                    transactions_output=transactions_output, metrics=metrics,
+                                                    order_book=restored_order_book, journal=journal,
+                                                    transaction_sink=recorder, limits=limits)
 
     delta_time = timer()
     print("\nFinal order book state:\n" + order_book.get_state())
     print("\nElapsed time: {0} seconds.".format(delta_time))
     print("{:.2f} orders per second.".format(number_of_transactions / delta_time))
+    if limits is not None:
+        print("Rejected {0} and evicted {1} orders breaking the limits.".format(limits.rejected_orders,
+                                                                           limits.evicted_orders))
+    if snapshot_output:
+        order_book.save_snapshot(snapshot_output, position + number_of_transactions)
+        print("Saved snapshot to {0}.".format(snapshot_output))
+    if metrics is not None:
+        metrics.save(metrics_output)
+        print("Saved metrics to {0}.".format(metrics_output))
+    if recorder is not None:
+        from modules.analytics import create_report
+        with open(analytics_output, 'w') as file:
+            json.dump(create_report(recorder.get_fills(), recorder.get_orders()), file, indent=4)
+        print("Saved report of fills to {0}.".format(analytics_output))
     sys.exit(0)
 
 # run the main program if no special branch has been activated
-order_book = OrderBook(store_transactions=True)
+if restored_order_book is not None:
+    order_book = restored_order_book
+else:
+    order_book = OrderBook(store_transactions=True, journal=journal, limits=limits)
 print(program_description + """
 To add an order to the order book, insert a JSON line.
+Invalid orders are rejected with a reason, eg. {"reject": 1, "reason": "invalid_price", ...}.
 Type 'exit' to quit the program.\n""")
 
 try:
     for line in sys.stdin:
         if bool(line and not line.isspace()):
-            if "exit" in line:
+            if line.strip() == "exit":
                 break
 
-            order = Order(line)
+            # invalid messages are rejected before they reach the order book
+            order = validate_order(line, order_book)
+            if isinstance(order, Reject):
+                print(order.return_json() + "\n")
+                continue
 
-            # we assume that id cannot be negative
-            if order.id >= 0:
-                order_book.add(order)
+            order_book.add(order)
+            if depth_updates:
+                print('\n'.join([order_book.get_depth_update(), *order_book.last_transactions]) + "\n")
+            else:
                 print(order_book)
+            order_book.drain_transactions()
 except KeyboardInterrupt:
     pass
 
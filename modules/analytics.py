@@ -0,0 +1,426 @@
+from modules.auxiliary import read_orders
+from modules.generator import order_log_dtype
+from modules.journal import entry_format, journal_header_format, journal_magic, FILL_ENTRY, ORDER_ENTRY
+from modules.order import Order, BUY, SELL, ICEBERG
+from modules.orderlog import header_format, order_log_magic, timestamps_flag
+from modules.transaction import Transaction
+from array import array
+from itertools import chain
+from typing import Iterable, Iterator, Optional
+import numpy as np
+import re
+
+
+# NumPy counterparts of a journal entry and of a timestamped order log record
+journal_entry_dtype = np.dtype([('type', 'u1'), ('side', 'u1'), ('kind', 'u1'), ('padding', 'V5'),
+                                ('first', '<i8'), ('second', '<i8'), ('third', '<i8'), ('fourth', '<i8')])
+timestamped_order_log_dtype = np.dtype(order_log_dtype.descr + [('timestamp', '<i8')])
+assert journal_entry_dtype.itemsize == entry_format.size
+
+# number of bytes of a file of fills parsed at once
+load_chunk_size = 1 << 20
+
+# a transaction written by 'write_transactions' (possibly with a symbol before its fields)
+_transaction_pattern = re.compile(rb'"buyOrderId": (\d+), "sellOrderId": (\d+), "price": (\d+), "quantity": (\d+)')
+
+
+class Fills:
+    buy_order_id: np.ndarray
+    sell_order_id: np.ndarray
+    price: np.ndarray
+    quantity: np.ndarray
+
+    def __init__(self, buy_order_id: Iterable[int], sell_order_id: Iterable[int], price: Iterable[int],
+                 quantity: Iterable[int]):
+        """
+        :param buy_order_id:        ids of buy orders
+        :param sell_order_id:       ids of sell orders
+        :param price:               prices of fills
+        :param quantity:            quantities of fills
+
+        Creates a columnar table of fills: a NumPy array of 64-bit integers per field, in the order of execution.
+        """
+
+        self.buy_order_id = np.asarray(buy_order_id, dtype=np.int64)
+        self.sell_order_id = np.asarray(sell_order_id, dtype=np.int64)
+        self.price = np.asarray(price, dtype=np.int64)
+        self.quantity = np.asarray(quantity, dtype=np.int64)
+
+    def __len__(self):
+        """
+        :return:                    the number of fills
+        """
+
+        return len(self.price)
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Transaction]) -> 'Fills':
+        """
+        :param transactions:        transaction objects
+        :return:                    table of fills
+        """
+
+        columns = _create_columns(4)
+        for transaction in transactions:
+            columns[0].append(transaction.buy_order_id)
+            columns[1].append(transaction.sell_order_id)
+            columns[2].append(transaction.price)
+            columns[3].append(transaction.quantity)
+
+        return cls(*_to_arrays(columns))
+
+
+class Orders:
+    id: np.ndarray
+    side: np.ndarray
+    kind: np.ndarray
+    price: np.ndarray
+    quantity: np.ndarray
+    peak: np.ndarray
+
+    def __init__(self, order_id: Iterable[int], side: Iterable[int], kind: Iterable[int], price: Iterable[int],
+                 quantity: Iterable[int], peak: Iterable[int]):
+        """
+        :param order_id:            ids of orders
+        :param side:                direction codes (BUY or SELL)
+        :param kind:                type codes (LIMIT or ICEBERG)
+        :param price:               prices of orders
+        :param quantity:            total (visible and hidden) quantities of orders
+        :param peak:                peaks of orders (zero for limit orders)
+
+        Creates a columnar table of orders, as they were entered.
+        """
+
+        self.id = np.asarray(order_id, dtype=np.int64)
+        self.side = np.asarray(side, dtype=np.int8)
+        self.kind = np.asarray(kind, dtype=np.int8)
+        self.price = np.asarray(price, dtype=np.int64)
+        self.quantity = np.asarray(quantity, dtype=np.int64)
+        self.peak = np.asarray(peak, dtype=np.int64)
+
+    def __len__(self):
+        """
+        :return:                    the number of orders
+        """
+
+        return len(self.id)
+
+    @classmethod
+    def from_orders(cls, orders: Iterable[Order]) -> 'Orders':
+        """
+        :param orders:              order objects (before they are added to an order book)
+        :return:                    table of orders
+        """
+
+        columns = _create_columns(6)
+        for order in orders:
+            _append_order(columns, order)
+
+        return cls(*_to_arrays(columns))
+
+
+class FillRecorder:
+    __fill_columns: tuple[array, ...] = ()
+    __order_columns: tuple[array, ...] = ()
+
+    def __init__(self):
+        """
+        Collects fills (and optionally orders) during a replay into compact columns.
+        The recorder is used as a transaction sink of an order book, eg.:
+            recorder = FillRecorder()
+            order_book = OrderBook(transaction_sink=recorder)
+        and keeps four integers per fill instead of transaction objects.
+        """
+
+        self.__fill_columns = _create_columns(4)
+        self.__order_columns = _create_columns(6)
+
+    def __call__(self, transaction: Transaction):
+        """
+        :param transaction:         performed transaction
+        """
+
+        buy_order_ids, sell_order_ids, prices, quantities = self.__fill_columns
+        buy_order_ids.append(transaction.buy_order_id)
+        sell_order_ids.append(transaction.sell_order_id)
+        prices.append(transaction.price)
+        quantities.append(transaction.quantity)
+
+    def record_orders(self, orders: Iterable[Order]) -> Iterator[Order]:
+        """
+        :param orders:              orders being added to the order book
+        :return:                    iterator over the same orders
+
+        Records orders as they pass to the order book (eg. for iceberg statistics).
+        """
+
+        columns = self.__order_columns
+        for order in orders:
+            _append_order(columns, order)
+            yield order
+
+    def get_fills(self) -> Fills:
+        """
+        :return:                    table of fills recorded so far
+        """
+
+        return Fills(*_to_arrays(self.__fill_columns))
+
+    def get_orders(self) -> Orders:
+        """
+        :return:                    table of orders recorded so far
+        """
+
+        return Orders(*_to_arrays(self.__order_columns))
+
+
+def load_fills(input_file: str) -> Fills:
+    """
+    :param input_file:              JSON lines file of transactions (eg. written with '-t') or a journal
+    :return:                        table of fills
+
+    Loads fills in chunks of about 'load_chunk_size' bytes, so the memory used besides the table is bounded.
+    Fields of JSON lines are found with a single regular expression per chunk,
+    fill entries of a journal are selected from a structured array of the chunk.
+    Both are appended to columns of 64-bit integers, as in 'FillRecorder'.
+    """
+
+    columns = _create_columns(4)
+    with open(input_file, 'rb') as file:
+        if file.read(len(journal_magic)) == journal_magic:
+            file.seek(journal_header_format.size)
+            chunk_size = load_chunk_size // entry_format.size * entry_format.size
+            while chunk := file.read(chunk_size):
+                entries = _read_journal_entries(chunk, offset=0)
+                entries = entries[entries['type'] == FILL_ENTRY]
+                for column, field in zip(columns, ('first', 'second', 'third', 'fourth')):
+                    column.frombytes(entries[field].tobytes())
+        else:
+            file.seek(0)
+            rest = b''
+            while chunk := file.read(load_chunk_size):
+                # only complete lines are parsed, the rest is left for the next chunk
+                end = chunk.rfind(b'\n') + 1
+                if end == 0:
+                    rest += chunk
+                    continue
+                _append_transaction_fields(columns, rest + chunk[:end])
+                rest = chunk[end:]
+            _append_transaction_fields(columns, rest)
+
+    return Fills(*_to_arrays(columns))
+
+
+def load_orders(input_file: str) -> Orders:
+    """
+    :param input_file:              JSON file of orders, a binary order log or a journal
+    :return:                        table of orders
+
+    Loads orders of a file. Binary order logs and journals are mapped directly into arrays.
+    """
+
+    with open(input_file, 'rb') as file:
+        magic = file.read(len(order_log_magic))
+        data = magic + file.read() if magic in (order_log_magic, journal_magic) else None
+
+    if magic == order_log_magic:
+        _, _, flags, _ = header_format.unpack_from(data)
+        dtype = timestamped_order_log_dtype if flags & timestamps_flag else order_log_dtype
+        records = np.frombuffer(data, dtype=dtype, offset=header_format.size)
+        return Orders(records['id'], records['side'], records['kind'], records['price'], records['quantity'],
+                      records['peak'])
+
+    if magic == journal_magic:
+        entries = _read_journal_entries(data)
+        entries = entries[entries['type'] == ORDER_ENTRY]
+        return Orders(entries['first'], entries['side'], entries['kind'], entries['second'], entries['third'],
+                      entries['fourth'])
+
+    return Orders.from_orders(read_orders(input_file))
+
+
+def vwap(fills: Fills) -> Optional[float]:
+    """
+    :param fills:                   table of fills
+    :return:                        volume-weighted average price (None if nothing was traded)
+    """
+
+    volume = fills.quantity.sum()
+    if volume == 0:
+        return None
+
+    return float(np.dot(fills.price, fills.quantity) / volume)
+
+
+def volume_by_price(fills: Fills) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param fills:                   table of fills
+    :return:                        traded prices (ascending) and total quantities traded at them
+    """
+
+    prices, indices = np.unique(fills.price, return_inverse=True)
+    volumes = np.zeros(len(prices), dtype=np.int64)
+    np.add.at(volumes, indices, fills.quantity)
+    return prices, volumes
+
+
+def order_summaries(fills: Fills) -> dict[str, np.ndarray]:
+    """
+    :param fills:                   table of fills
+    :return:                        columns of per-order summaries, ordered by id
+
+    Summarizes fills of every order taking part in them: its side, the number of fills,
+    the filled quantity, the notional (price times quantity) and the average price.
+    """
+
+    order_ids = np.concatenate((fills.buy_order_id, fills.sell_order_id))
+    sides = np.repeat(np.array([BUY, SELL], dtype=np.int8), len(fills))
+    quantities = np.concatenate((fills.quantity, fills.quantity))
+    notionals = np.concatenate((fills.price * fills.quantity,) * 2)
+
+    ids, first_indices, indices = np.unique(order_ids, return_index=True, return_inverse=True)
+    number_of_fills = np.bincount(indices, minlength=len(ids))
+    filled_quantities = np.zeros(len(ids), dtype=np.int64)
+    np.add.at(filled_quantities, indices, quantities)
+    order_notionals = np.zeros(len(ids), dtype=np.int64)
+    np.add.at(order_notionals, indices, notionals)
+
+    return {'id': ids, 'side': sides[first_indices], 'fills': number_of_fills, 'quantity': filled_quantities,
+            'notional': order_notionals, 'average_price': order_notionals / np.maximum(filled_quantities, 1)}
+
+
+def fill_count_distribution(fills: Fills) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param fills:                   table of fills
+    :return:                        numbers of fills per order (ascending) and numbers of orders with them
+    """
+
+    order_ids = np.concatenate((fills.buy_order_id, fills.sell_order_id))
+    _, number_of_fills = np.unique(order_ids, return_counts=True)
+    return np.unique(number_of_fills, return_counts=True)
+
+
+def iceberg_statistics(fills: Fills, orders: Orders) -> dict:
+    """
+    :param fills:                   table of fills
+    :param orders:                  table of orders (at least all iceberg orders)
+    :return:                        dictionary of statistics
+
+    Describes the execution of iceberg orders: how many of them were (fully) executed,
+    which part of their quantity was filled, the mean number of fills and the mean number of slices
+    (peaks) used by an executed iceberg order.
+    """
+
+    icebergs = orders.kind == ICEBERG
+    iceberg_ids = orders.id[icebergs]
+    quantities = orders.quantity[icebergs]
+    peaks = orders.peak[icebergs]
+
+    summaries = order_summaries(fills)
+    executed = np.isin(iceberg_ids, summaries['id'])
+    positions = np.searchsorted(summaries['id'], iceberg_ids[executed])
+    filled_quantities = np.zeros(len(iceberg_ids), dtype=np.int64)
+    filled_quantities[executed] = summaries['quantity'][positions]
+    number_of_fills = np.zeros(len(iceberg_ids), dtype=np.int64)
+    number_of_fills[executed] = summaries['fills'][positions]
+    # each slice is at most a peak, so it is the least number of slices the filled quantity needs
+    slices = -(-filled_quantities // peaks)
+
+    number_of_executed = int(executed.sum())
+    total_quantity = int(quantities.sum())
+    return {
+        'icebergs': len(iceberg_ids),
+        'executed': number_of_executed,
+        'fully_executed': int((filled_quantities == quantities).sum()),
+        'quantity': total_quantity,
+        'filled_quantity': int(filled_quantities.sum()),
+        'fill_ratio': float(filled_quantities.sum() / total_quantity) if total_quantity else None,
+        'mean_fills': float(number_of_fills[executed].mean()) if number_of_executed else None,
+        'mean_slices': float(slices[executed].mean()) if number_of_executed else None
+    }
+
+
+def create_report(fills: Fills, orders: Orders = None) -> dict:
+    """
+    :param fills:                   table of fills
+    :param orders:                  table of orders, needed for iceberg statistics (optional)
+    :return:                        report as a JSON-serializable dictionary
+
+    Aggregates fills into a report: the number of fills, traded volume and notional, VWAP,
+    the price range, volume per price, the distribution of the number of fills per order
+    and, if orders are given, statistics of iceberg orders.
+    """
+
+    prices, volumes = volume_by_price(fills)
+    fill_counts, number_of_orders = fill_count_distribution(fills)
+    report = {
+        'fills': len(fills),
+        'volume': int(fills.quantity.sum()),
+        'notional': int(np.dot(fills.price, fills.quantity)),
+        'vwap': vwap(fills),
+        'lowPrice': int(prices[0]) if len(prices) else None,
+        'highPrice': int(prices[-1]) if len(prices) else None,
+        'volumeByPrice': [{'price': int(price), 'quantity': int(volume)} for price, volume in zip(prices, volumes)],
+        'fillsPerOrder': [{'fills': int(fill_count), 'orders': int(count)}
+                          for fill_count, count in zip(fill_counts, number_of_orders)]
+    }
+    if orders is not None:
+        report['icebergs'] = iceberg_statistics(fills, orders)
+
+    return report
+
+
+def _read_journal_entries(data: bytes, offset: int = journal_header_format.size) -> np.ndarray:
+    """
+    :param data:                    contents of a journal file (or a part of it)
+    :param offset:                  position of the first entry
+    :return:                        structured array of complete entries
+    """
+
+    size = (len(data) - offset) // entry_format.size
+    return np.frombuffer(data, dtype=journal_entry_dtype, count=size, offset=offset)
+
+
+def _append_transaction_fields(columns: tuple[array, ...], data: bytes):
+    """
+    :param columns:                 columns of fills
+    :param data:                    complete lines of a transactions file
+    """
+
+    values = array('q', map(int, chain.from_iterable(_transaction_pattern.findall(data))))
+    for index, column in enumerate(columns):
+        column.extend(values[index::4])
+
+
+def _create_columns(number_of_columns: int) -> tuple[array, ...]:
+    """
+    :param number_of_columns:       the number of columns
+    :return:                        empty columns of 64-bit integers
+    """
+
+    return tuple(array('q') for _ in range(number_of_columns))
+
+
+def _to_arrays(columns: tuple[array, ...]) -> list[np.ndarray]:
+    """
+    :param columns:                 columns of 64-bit integers
+    :return:                        copies of the columns as NumPy arrays
+    """
+
+    return [np.frombuffer(column, dtype=np.int64).copy() if column else np.zeros(0, dtype=np.int64)
+            for column in columns]
+
+
+def _append_order(columns: tuple[array, ...], order: Order):
+    """
+    :param columns:                 columns of an order table
+    :param order:                   order to append
+    """
+
+    order_ids, sides, kinds, prices, quantities, peaks = columns
+    order_ids.append(order.id)
+    sides.append(order.side)
+    kinds.append(order.kind)
+    prices.append(order.price)
+    quantities.append(order.quantity + order.hidden_quantity)
+    peaks.append(order.peak)
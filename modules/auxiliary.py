@@ -1,57 +1,145 @@
 from modules.order import Order
 from modules.orderbook import OrderBook
-from modules.constants import *
+from modules.orderlog import is_order_log, read_order_log
+from modules.transaction import Transaction
+from modules.constants import get_setting
+from contextlib import nullcontext
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TextIO, Union
 import json
 import random
+import re
 
+if TYPE_CHECKING:
+    from modules.journal import Journal
+    from modules.limits import BookLimits
+    from modules.metrics import Metrics
 
-def create_order_list(output_file: str = default_data_file) -> list[Order]:
+
+read_chunk_size = 1 << 20
+transactions_batch_size = 10000
+_array_separator = re.compile(r'[\s,]*')
+
+
+def create_order_list(output_file: str = None, start: int = 0) -> list[Order]:
     """
-    :param output_file:             JSON file containing serialized orders
+    :param output_file:             JSON file containing serialized orders ('default_output' setting by default)
+    :param start:                   index of the first order to read
     :return:                        list of order objects
 
     Creates a list of orders from a given file.
     """
 
-    orders = []
+    return list(read_orders(output_file, start))
+
+
+def read_orders(input_file: str = None, start: int = 0) -> Iterator[Order]:
+    """
+    :param input_file:              JSON file containing serialized orders ('default_output' setting by default)
+    :param start:                   index of the first order to read
+    :return:                        iterator over order objects
+
+    Reads orders from a file one by one, without loading the whole file into memory.
+    Accepts either a JSON array of orders, JSON lines (a single order per line)
+    or a binary order log. Orders preceding 'start' are skipped without creating order objects
+    (in a binary order log, without reading them at all).
+    """
+
+    input_file = get_setting('default_output', input_file)
+    if is_order_log(input_file):
+        yield from read_order_log(input_file, start)
+        return
+
     try:
-        with open(output_file) as json_file:
-            orders_data = json.load(json_file)
-            for order_data in orders_data:
-                order = Order(json.dumps(order_data))
-                orders.append(order)
+        for message in islice(read_order_messages(input_file), start, None):
+            yield Order.from_dict(message) if isinstance(message, dict) else Order(message)
     except json.JSONDecodeError as error:
         print("JSON decoder error: " + str(error))
 
-    return orders
 
+def read_order_messages(input_file: str) -> Iterator[Union[str, dict]]:
+    """
+    :param input_file:              JSON file containing serialized orders
+    :return:                        iterator over serialized orders
+
+    Reads serialized orders from a JSON file one by one, without creating order objects:
+    decoded dictionaries for a JSON array, raw lines for JSON lines.
+    """
 
-def create_order_book_from_orders_list(orders: list[Order], print_output: bool = False) -> OrderBook:
+    with open(input_file) as json_file:
+        first_character = json_file.read(1)
+        while first_character.isspace():
+            first_character = json_file.read(1)
+
+        if first_character == '[':
+            yield from _iterate_json_array(json_file)
+        else:
+            json_file.seek(0)
+            for line in json_file:
+                if line and not line.isspace():
+                    yield line
+
+
+def create_order_book_from_orders_list(orders: Iterable[Order], print_output: bool = False,
+                                       transactions_output: str = None, metrics: 'Metrics' = None,
+                                       order_book: OrderBook = None, journal: 'Journal' = None,
+                                       transaction_sink: Callable[[Transaction], None] = None,
+                                       limits: 'BookLimits' = None) -> OrderBook:
     """
-    :param orders:                  list of orders
+    :param orders:                  list (or any iterable) of orders
     :param print_output:            shows single transactions and order book states
+    :param transactions_output:     JSON lines file for performed transactions (optional)
+    :param metrics:                 metrics collected by the order book (optional)
+    :param order_book:              order book to add the orders to (a new one by default)
+    :param journal:                 journal of accepted orders and fills of a new order book (optional)
+    :param transaction_sink:        function called with every transaction of a new order book (optional)
+    :param limits:                  limits of resting orders of a new order book (optional)
     :return:                        order book object with realized transactions according to given orders
 
     Creates an order book object from a list of order objects
     and performs transactions for the orders if possible.
+    If 'transactions_output' is given, performed transactions are written to the file in batches.
     """
 
-    order_book = OrderBook(store_transactions=print_output)
-    for order in orders:
-        order_book.add(order)
+    if order_book is None:
+        order_book = OrderBook(store_transactions=print_output, transaction_sink=transaction_sink, metrics=metrics,
+                               journal=journal, limits=limits)
+    with open(transactions_output, 'w') if transactions_output else nullcontext() as transactions_file:
         if print_output:
-            print(">> " + order.__str__(simple=False))
-            print(order_book)
+            for order in orders:
+                order_book.add(order)
+                print(">> " + order.__str__(simple=False))
+                print(order_book)
+                transactions = order_book.drain_transactions()
+                if transactions_file is not None:
+                    write_transactions(transactions, transactions_file)
+        elif transactions_file is not None:
+            orders = iter(orders)
+            while batch := list(islice(orders, transactions_batch_size)):
+                write_transactions(order_book.add_many(batch), transactions_file)
+        else:
+            for order in orders:
+                order_book.add(order)
 
     return order_book
 
 
-def generate_random_orders(number_of_orders: int, iceberg_probability: float = default_iceberg_probability,
-                           price_mean: int = default_price_mean, price_deviation: int = default_price_deviation,
-                           quantity_mean: int = default_quantity_mean,
-                           quantity_deviation: int = default_quantity_deviation,
-                           peak_min: int = default_peak_min, peak_max: int = default_peak_max,
-                           output_file: str = default_data_file):
+def write_transactions(transactions: Iterable[Transaction], file: TextIO):
+    """
+    :param transactions:            transaction objects
+    :param file:                    output text file
+
+    Writes transactions to a file as JSON lines.
+    """
+
+    file.writelines(transaction.return_json() + "\n" for transaction in transactions)
+
+
+def generate_random_orders(number_of_orders: int, iceberg_probability: float = None,
+                           price_mean: int = None, price_deviation: int = None,
+                           quantity_mean: int = None, quantity_deviation: int = None,
+                           peak_min: int = None, peak_max: int = None,
+                           output_file: str = None, symbols: int = 0):
     """
     :param number_of_orders:        the total number of orders
     :param iceberg_probability:     the expected relative amount of iceberg type orders
@@ -62,10 +150,22 @@ def generate_random_orders(number_of_orders: int, iceberg_probability: float = d
     :param peak_min:                minimum value of 'peak' field
     :param peak_max:                maximum value of 'peak' field
     :param output_file:             output file name
+    :param symbols:                 the number of symbols (instruments) orders are spread over uniformly;
+                                    orders have no 'symbol' field if it is zero
 
     Generates a series of random transactions to a JSON file.
+    Parameters which are not given are taken from the generator settings ('config.json').
     """
 
+    iceberg_probability = get_setting('iceberg_probability', iceberg_probability)
+    price_mean = get_setting('price_mean', price_mean)
+    price_deviation = get_setting('price_deviation', price_deviation)
+    quantity_mean = get_setting('quantity_mean', quantity_mean)
+    quantity_deviation = get_setting('quantity_deviation', quantity_deviation)
+    peak_min = get_setting('peak_min', peak_min)
+    peak_max = get_setting('peak_max', peak_max)
+    output_file = get_setting('default_output', output_file)
+
     orders = []
     print("Generating data...")
     for i in range(number_of_orders):
@@ -79,13 +179,60 @@ def generate_random_orders(number_of_orders: int, iceberg_probability: float = d
             peak = min(_generate(peak_min, peak_max, random.uniform), quantity // 2)
 
         price = _generate(price_mean, price_deviation, random.normalvariate)
-        orders.append(Order((i + 1, order_type, direction, price, quantity, peak)).__dict__(simple=False))
+        order_data = Order((i + 1, order_type, direction, price, quantity, peak)).__dict__(simple=False)
+        if symbols > 0:
+            order_data = {'symbol': symbol_name(random.randrange(symbols)), **order_data}
+        orders.append(order_data)
 
     print("Generated data. Saving to " + output_file + " file...")
     with open(output_file, 'w') as file:
         json.dump(orders, file, indent=4)
 
 
+def symbol_name(index: int) -> str:
+    """
+    :param index:                   index of a generated symbol
+    :return:                        name of the symbol
+    """
+
+    return "S{:04d}".format(index)
+
+
+def _iterate_json_array(json_file) -> Iterator[dict]:
+    """
+    :param json_file:               file object positioned right after the opening bracket
+    :return:                        iterator over decoded elements of the array
+
+    Decodes elements of a JSON array incrementally, reading the file in chunks.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    end_of_file = False
+
+    while True:
+        position = _array_separator.match(buffer, position).end()
+
+        if position < len(buffer) and buffer[position] == ']':
+            return
+
+        try:
+            if position == len(buffer):
+                raise json.JSONDecodeError("unexpected end of data", buffer, position)
+            element, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if end_of_file:
+                raise
+            chunk = json_file.read(read_chunk_size)
+            end_of_file = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        yield element
+
+
 def _generate(alpha, beta, random_function) -> int:
     """
     :param alpha:                   first parameter of random_function
@@ -0,0 +1,184 @@
+from modules.analytics import FillRecorder, iceberg_statistics, vwap
+from modules.constants import get_settings
+from modules.generator import generate_order_chunks, generator_chunk_size
+from modules.order import Order
+from modules.orderbook import OrderBook
+from itertools import product
+from time import perf_counter
+from typing import Iterable
+import csv
+import json
+import multiprocessing
+import os
+
+
+# generator settings which can be varied by a backtest
+backtest_parameters = ('iceberg_probability', 'price_mean', 'price_deviation', 'quantity_mean',
+                       'quantity_deviation', 'peak_min', 'peak_max')
+
+# columns of the results table
+backtest_columns = ('job', 'seed') + backtest_parameters + (
+    'orders', 'fills', 'volume', 'vwap', 'iceberg_fill_ratio',
+    'buy_levels', 'sell_levels', 'buy_quantity', 'sell_quantity', 'best_bid', 'best_ask',
+    'generate_time', 'match_time', 'throughput')
+
+# columns depending on the speed of the machine rather than on the parameters and the seed
+timing_columns = ('generate_time', 'match_time', 'throughput')
+
+
+def parse_grid(specifications: Iterable[str]) -> dict[str, list[str]]:
+    """
+    :param specifications:          texts of the form 'name=value,value,...', eg. 'peak_min=10,50'
+    :return:                        dictionary of values of each parameter
+    """
+
+    grid = {}
+    for specification in specifications:
+        if '=' not in specification:
+            raise ValueError("grid parameters have to be given as 'name=value,value,...'")
+        name, values = specification.split('=', 1)
+        grid[name.strip()] = [value.strip() for value in values.split(',') if value.strip()]
+
+    return grid
+
+
+def create_jobs(grid: dict[str, Iterable], seeds: Iterable[int], number_of_orders: int) -> list[dict]:
+    """
+    :param grid:                    values of varied generator parameters, eg. {'peak_min': [10, 50]}
+    :param seeds:                   seeds of the random generator
+    :param number_of_orders:        the number of orders generated by each job
+    :return:                        list of jobs
+
+    Makes a job for every combination of parameter values and every seed, in a fixed order:
+    combinations in the order of the grid, seeds in the given order within each combination.
+    Parameters which are not varied are taken from the generator settings ('config.json'),
+    so every job is complete and does not depend on the settings of the process running it.
+    Values given as texts are converted to types of the settings.
+    Combinations with 'peak_min' greater than 'peak_max' are skipped.
+    Raises a ValueError for a parameter which is not a generator setting.
+    """
+
+    settings = get_settings()
+    names = list(grid)
+    for name in names:
+        if name not in backtest_parameters:
+            raise ValueError("unknown generator parameter '{0}'".format(name))
+
+    value_lists = [[type(settings[name])(value) if isinstance(value, str) else value for value in grid[name]]
+                   for name in names]
+    seeds = list(seeds)
+
+    jobs = []
+    for values in product(*value_lists):
+        parameters = {name: settings[name] for name in backtest_parameters}
+        parameters.update(zip(names, values))
+        if parameters['peak_min'] > parameters['peak_max']:
+            continue
+        for seed in seeds:
+            jobs.append({'job': len(jobs), 'seed': seed, 'orders': number_of_orders, 'parameters': parameters})
+
+    return jobs
+
+
+def run_job(job: dict) -> dict:
+    """
+    :param job:                     job made by 'create_jobs'
+    :return:                        row of the results table
+
+    Generates random orders of a job and matches them in a new order book.
+    The orders depend only on the parameters and the seed of the job
+    (the chunk size of the generator is fixed), so the results are the same in every process,
+    apart from the timing columns.
+    Orders are created before the matching starts, so the throughput covers matching only.
+    """
+
+    start_time = perf_counter()
+    from_codes = Order.from_codes
+    orders = []
+    for chunk in generate_order_chunks(job['orders'], seed=job['seed'], chunk_size=generator_chunk_size,
+                                       **job['parameters']):
+        orders.extend(map(from_codes, chunk['id'].tolist(), chunk['side'].tolist(), chunk['kind'].tolist(),
+                          chunk['price'].tolist(), chunk['quantity'].tolist(), chunk['peak'].tolist()))
+    generate_time = perf_counter() - start_time
+
+    recorder = FillRecorder()
+    order_book = OrderBook(transaction_sink=recorder)
+    start_time = perf_counter()
+    order_book.add_many(recorder.record_orders(orders))
+    match_time = perf_counter() - start_time
+
+    fills = recorder.get_fills()
+    depth = json.loads(order_book.get_depth())
+    row = {'job': job['job'], 'seed': job['seed']}
+    row.update(job['parameters'])
+    row.update({
+        'orders': len(orders),
+        'fills': len(fills),
+        'volume': int(fills.quantity.sum()),
+        'vwap': vwap(fills),
+        'iceberg_fill_ratio': iceberg_statistics(fills, recorder.get_orders())['fill_ratio'],
+        'buy_levels': len(depth['buyLevels']),
+        'sell_levels': len(depth['sellLevels']),
+        'buy_quantity': sum(level['quantity'] for level in depth['buyLevels']),
+        'sell_quantity': sum(level['quantity'] for level in depth['sellLevels']),
+        'best_bid': order_book.best_bid,
+        'best_ask': order_book.best_ask,
+        'generate_time': generate_time,
+        'match_time': match_time,
+        'throughput': len(orders) / match_time if match_time else None
+    })
+
+    return row
+
+
+def run_backtest(jobs: list[dict], number_of_workers: int = None) -> list[dict]:
+    """
+    :param jobs:                    jobs made by 'create_jobs'
+    :param number_of_workers:       the number of worker processes (the number of CPUs by default)
+    :return:                        results table: a row of every job, in the order of jobs
+
+    Runs independent jobs in a pool of processes. Each job generates its own orders from its own seed,
+    so neither the number of workers nor the order in which they finish changes the results
+    (apart from the timing columns); rows are gathered in the order of jobs.
+    """
+
+    number_of_workers = min(number_of_workers or os.cpu_count() or 1, max(len(jobs), 1))
+    with multiprocessing.get_context().Pool(number_of_workers) as pool:
+        # one job at a time, so that long jobs do not wait behind a batch of others
+        return pool.map(run_job, jobs, chunksize=1)
+
+
+def save_results(results: list[dict], output_file: str):
+    """
+    :param results:                 results table
+    :param output_file:             output JSON file (or CSV file if its name ends with '.csv')
+    """
+
+    with open(output_file, 'w', newline='') as file:
+        if output_file.endswith('.csv'):
+            writer = csv.DictWriter(file, backtest_columns)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump(results, file, indent=4)
+
+
+def format_results(results: list[dict], parameters: Iterable[str] = backtest_parameters) -> str:
+    """
+    :param results:                 results table
+    :param parameters:              parameter columns to show (all by default)
+    :return:                        human-readable table of results
+    """
+
+    parameters = list(parameters)
+    header = "{:>5}{:>12}".format("job", "seed") + "".join("{:>20}".format(name) for name in parameters)
+    lines = [header + "{:>10}{:>10}{:>12}{:>10}{:>11}{:>8}{:>8}{:>14}".format(
+        "orders", "fills", "volume", "vwap", "ice ratio", "bids", "asks", "ops/s")]
+    for row in results:
+        line = "{:>5}{:>12}".format(row['job'], row['seed']) + "".join(
+            "{:>20}".format(row[name]) for name in parameters)
+        lines.append(line + "{:>10}{:>10}{:>12}{:>10.2f}{:>11.3f}{:>8}{:>8}{:>14.0f}".format(
+            row['orders'], row['fills'], row['volume'], row['vwap'] or 0, row['iceberg_fill_ratio'] or 0,
+            row['buy_levels'], row['sell_levels'], row['throughput'] or 0))
+
+    return '\n'.join(lines)
@@ -0,0 +1,266 @@
+from modules.constants import default_benchmark_size
+from modules.order import Order
+from modules.orderbook import OrderBook
+from random import Random
+from time import perf_counter, perf_counter_ns
+from typing import Callable, Iterable
+import json
+import platform
+import subprocess
+import tracemalloc
+
+
+benchmark_seed = 20210601
+
+ADD = 0
+CANCEL = 1
+
+
+def run_benchmarks(number_of_orders: int = default_benchmark_size, scenario_names: Iterable[str] = None,
+                   seed: int = benchmark_seed) -> dict:
+    """
+    :param number_of_orders:        the number of operations of each scenario
+    :param scenario_names:          names of scenarios to run (all by default)
+    :param seed:                    seed of the scenario generators
+    :return:                        dictionary with benchmark results
+
+    Runs benchmark scenarios and collects their results in a machine-readable form,
+    together with information about the environment and the current commit.
+    """
+
+    results = {}
+    for name in scenario_names or scenarios:
+        results[name] = run_scenario(scenarios[name], number_of_orders, seed)
+
+    return {'commit': _get_commit(), 'python': platform.python_version(), 'seed': seed,
+            'orders': number_of_orders, 'scenarios': results}
+
+
+def run_scenario(scenario: Callable[[Random, int], list[tuple]], number_of_orders: int, seed: int) -> dict:
+    """
+    :param scenario:                scenario generator
+    :param number_of_orders:        the number of operations
+    :param seed:                    seed of the scenario generator
+    :return:                        dictionary with scenario results
+
+    Runs a single scenario. Parsing of JSON lines and matching are timed separately,
+    the latency of every operation is measured individually.
+    Peak memory is measured in a separate run, as tracing memory allocations slows down the program.
+    """
+
+    messages = scenario(Random(seed), number_of_orders)
+
+    start_time = perf_counter()
+    operations = _parse(messages)
+    parse_time = perf_counter() - start_time
+
+    latencies = _match(operations)
+    match_time = sum(latencies) / 1e9
+    latencies.sort()
+
+    tracemalloc.start()
+    _match(_parse(messages))
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'operations': len(operations),
+            'parse_time': parse_time,
+            'match_time': match_time,
+            'throughput': len(operations) / match_time if match_time else None,
+            'latency_ns': {'p50': _percentile(latencies, 50.0),
+                           'p99': _percentile(latencies, 99.0),
+                           'p99.9': _percentile(latencies, 99.9),
+                           'max': latencies[-1] if latencies else None},
+            'peak_memory': peak_memory}
+
+
+def format_results(results: dict) -> str:
+    """
+    :param results:                 benchmark results
+    :return:                        human-readable table of results
+    """
+
+    lines = ["{:<18}{:>12}{:>10}{:>10}{:>14}{:>10}{:>10}{:>12}{:>13}".format(
+        "scenario", "operations", "parse [s]", "match [s]", "ops/s", "p50 [us]", "p99 [us]", "p99.9 [us]",
+        "memory [MB]")]
+    for name, result in results['scenarios'].items():
+        latency = result['latency_ns']
+        lines.append("{:<18}{:>12}{:>10.3f}{:>10.3f}{:>14.0f}{:>10.1f}{:>10.1f}{:>12.1f}{:>13.1f}".format(
+            name, result['operations'], result['parse_time'], result['match_time'], result['throughput'] or 0,
+            latency['p50'] / 1e3, latency['p99'] / 1e3, latency['p99.9'] / 1e3, result['peak_memory'] / 2 ** 20))
+
+    return '\n'.join(lines)
+
+
+def _parse(messages: list[tuple]) -> list[tuple]:
+    """
+    :param messages:                list of (operation, message) pairs
+    :return:                        list of (operation, argument) pairs
+
+    Turns JSON lines of added orders into order objects. Cancelled order ids are passed through.
+    """
+
+    return [(operation, Order(message) if operation == ADD else message) for operation, message in messages]
+
+
+def _match(operations: list[tuple]) -> list[int]:
+    """
+    :param operations:              list of (operation, argument) pairs
+    :return:                        latencies of operations in nanoseconds
+
+    Performs operations on a new order book, measuring each of them.
+    """
+
+    order_book = OrderBook()
+    add = order_book.add
+    cancel = order_book.cancel
+    latencies = []
+    for operation, argument in operations:
+        if operation == ADD:
+            start_time = perf_counter_ns()
+            add(argument)
+        else:
+            start_time = perf_counter_ns()
+            cancel(argument)
+        latencies.append(perf_counter_ns() - start_time)
+
+    return latencies
+
+
+def _percentile(sorted_values: list[int], percent: float) -> int:
+    """
+    :param sorted_values:           sorted list of values
+    :param percent:                 percentile rank
+    :return:                        the nearest-rank percentile
+    """
+
+    if not sorted_values:
+        return 0
+    rank = max(int(len(sorted_values) * percent / 100.0 + 0.5) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _get_commit() -> str:
+    """
+    :return:                        hash of the current git commit if available
+    """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _order_message(order_id: int, direction: str, price: int, quantity: int, peak: int = 0) -> tuple:
+    """
+    :return:                        (operation, message) pair of an added order
+    """
+
+    order = Order((order_id, "Iceberg" if peak > 0 else "Limit", direction, price, quantity, peak))
+    return ADD, json.dumps(order.__dict__(simple=False))
+
+
+def _passive_only(random: Random, number_of_orders: int) -> list[tuple]:
+    """
+    Orders which never cross the spread: buy orders below 500, sell orders above.
+    """
+
+    return _passive_orders(random, number_of_orders, 500, 49)
+
+
+def _passive_orders(random: Random, number_of_orders: int, middle_price: int, levels: int) -> list[tuple]:
+    """
+    Buy orders on 'levels' price levels below 'middle_price', sell orders on 'levels' price levels above.
+    """
+
+    messages = []
+    for order_id in range(1, number_of_orders + 1):
+        distance = 10 * random.randint(1, levels)
+        quantity = 10 * random.randint(1, 100)
+        if random.random() < 0.5:
+            messages.append(_order_message(order_id, "Buy", middle_price - distance, quantity))
+        else:
+            messages.append(_order_message(order_id, "Sell", middle_price + distance, quantity))
+
+    return messages
+
+
+def _aggressive_sweep(random: Random, number_of_orders: int) -> list[tuple]:
+    """
+    Small passive orders over many price levels, regularly swept by large aggressive orders.
+    """
+
+    messages = []
+    for order_id in range(1, number_of_orders + 1):
+        if order_id % 50 == 0:
+            direction = "Buy" if random.random() < 0.5 else "Sell"
+            price = 1000 if direction == "Buy" else 10
+            messages.append(_order_message(order_id, direction, price, 10 * random.randint(100, 500)))
+        elif random.random() < 0.5:
+            messages.append(_order_message(order_id, "Buy", 500 - 10 * random.randint(1, 40),
+                                           10 * random.randint(1, 20)))
+        else:
+            messages.append(_order_message(order_id, "Sell", 500 + 10 * random.randint(1, 40),
+                                           10 * random.randint(1, 20)))
+
+    return messages
+
+
+def _iceberg_heavy(random: Random, number_of_orders: int) -> list[tuple]:
+    """
+    Mostly iceberg orders with small peaks around a common price.
+    """
+
+    messages = []
+    for order_id in range(1, number_of_orders + 1):
+        direction = "Buy" if random.random() < 0.5 else "Sell"
+        price = 10 * max(1, round(random.normalvariate(50, 3)))
+        quantity = 10 * random.randint(10, 200)
+        peak = 10 * random.randint(1, 5) if random.random() < 0.8 else 0
+        messages.append(_order_message(order_id, direction, price, quantity, peak))
+
+    return messages
+
+
+def _cancel_heavy(random: Random, number_of_orders: int) -> list[tuple]:
+    """
+    Passive orders, most of which are cancelled shortly after they are added.
+    """
+
+    messages = []
+    resting_orders = []
+    for order_id, (operation, message) in enumerate(_passive_only(random, number_of_orders), 1):
+        if resting_orders and random.random() < 0.75:
+            index = random.randrange(len(resting_orders))
+            resting_orders[index], resting_orders[-1] = resting_orders[-1], resting_orders[index]
+            messages.append((CANCEL, resting_orders.pop()))
+        else:
+            messages.append((operation, message))
+            resting_orders.append(order_id)
+
+    return messages
+
+
+def _deep_book(random: Random, number_of_orders: int) -> list[tuple]:
+    """
+    A deep book built of passive orders on a few hundred price levels, followed by random crossing flow.
+    """
+
+    passive_orders = number_of_orders * 4 // 5
+    messages = _passive_orders(random, passive_orders, 2000, 150)
+    for order_id in range(passive_orders + 1, number_of_orders + 1):
+        direction = "Buy" if random.random() < 0.5 else "Sell"
+        price = 10 * max(1, round(random.normalvariate(200, 30)))
+        messages.append(_order_message(order_id, direction, price, 10 * random.randint(1, 200)))
+
+    return messages
+
+
+scenarios = {
+    'passive_only': _passive_only,
+    'aggressive_sweep': _aggressive_sweep,
+    'iceberg_heavy': _iceberg_heavy,
+    'cancel_heavy': _cancel_heavy,
+    'deep_book': _deep_book
+}
@@ -1,16 +1,121 @@
 import json
+import os
 
 
 program_description = "An order book implementation with limit and iceberg type orders."
 
-with open("config.json") as config_json:
-    config_data = json.load(config_json)
-
-default_data_file = config_data['default_output']
-default_iceberg_probability = config_data['iceberg_probability']
-default_price_mean = config_data['price_mean']
-default_price_deviation = config_data['price_deviation']
-default_quantity_mean = config_data['quantity_mean']
-default_quantity_deviation = config_data['quantity_deviation']
-default_peak_min = config_data['peak_min']
-default_peak_max = config_data['peak_max']
+# the configuration file next to 'main.py', unless given by the environment variable
+config_environment_variable = "ICEBERG_CONFIG"
+default_config_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+
+# settings of the random orders generator: names of 'config.json' fields and their module-level aliases
+settings_aliases = {
+    'default_data_file': 'default_output',
+    'default_iceberg_probability': 'iceberg_probability',
+    'default_price_mean': 'price_mean',
+    'default_price_deviation': 'price_deviation',
+    'default_quantity_mean': 'quantity_mean',
+    'default_quantity_deviation': 'quantity_deviation',
+    'default_peak_min': 'peak_min',
+    'default_peak_max': 'peak_max'
+}
+
+# an environment variable overrides a single setting, eg. ICEBERG_PRICE_MEAN=1000
+setting_environment_prefix = "ICEBERG_"
+
+# defaults of command line options, kept here so that the command line is parsed
+# without importing the modules using them
+default_gateway_host = "127.0.0.1"
+default_gateway_port = 9000
+default_benchmark_size = 100000
+default_backtest_size = 100000
+default_backtest_seed = 1
+default_commit_count = 1000
+
+_config_file = None
+_overrides = {}
+_settings = None
+
+
+def configure(config_file: str = None, **overrides):
+    """
+    :param config_file:             configuration file replacing 'config.json' (optional)
+    :param overrides:               values of single settings, eg. price_mean=1000 (or price_mean="1000")
+
+    Changes the source of the generator settings. Overrides take precedence over the environment,
+    which takes precedence over the configuration file. Settings are loaded again on the next use.
+    Values given as texts are converted to types of the settings in the configuration file.
+    Raises a ValueError for an unknown setting.
+    """
+
+    global _config_file, _settings
+    for name in overrides:
+        if name not in settings_aliases.values():
+            raise ValueError("unknown setting '{0}'".format(name))
+
+    if config_file is not None:
+        _config_file = config_file
+    _overrides.update(overrides)
+    _settings = None
+
+
+def get_settings() -> dict:
+    """
+    :return:                        dictionary of the generator settings
+
+    Loads the generator settings on the first use and caches them.
+    Neither the matching engine nor the command line parser need them,
+    so the configuration file is never read by programs which do not generate orders.
+    Raises a ValueError if a value given as a text does not fit the type of the setting.
+    """
+
+    global _settings
+    if _settings is None:
+        config_file = _config_file or os.environ.get(config_environment_variable) or default_config_file
+        with open(config_file) as config_json:
+            config_data = json.load(config_json)
+
+        settings = {}
+        for name, value in config_data.items():
+            new_value = _overrides.get(name, os.environ.get(setting_environment_prefix + name.upper(), value))
+            settings[name] = _convert(new_value, value) if isinstance(new_value, str) else new_value
+        _settings = settings
+
+    return _settings
+
+
+def get_setting(name: str, value: object = None) -> object:
+    """
+    :param name:                    name of a setting, as in 'config.json'
+    :param value:                   explicitly given value (optional)
+    :return:                        the given value if it is not None, the configured setting otherwise
+    """
+
+    return get_settings()[name] if value is None else value
+
+
+def __getattr__(name: str) -> object:
+    """
+    :param name:                    name of a module attribute
+    :return:                        value of the setting
+
+    Resolves the former module-level constants (eg. 'default_price_mean') lazily.
+    """
+
+    if name in settings_aliases:
+        return get_settings()[settings_aliases[name]]
+    raise AttributeError("module '{0}' has no attribute '{1}'".format(__name__, name))
+
+
+def _convert(text: str, value: object) -> object:
+    """
+    :param text:                    value given as a text, eg. by an environment variable
+    :param value:                   current value of the setting, defining its type
+    :return:                        converted value
+    """
+
+    if isinstance(value, bool):
+        return text.lower() in ('1', 'true', 'yes')
+    if isinstance(value, (int, float)):
+        return type(value)(text)
+    return text
@@ -0,0 +1,370 @@
+from modules.constants import default_gateway_host, default_gateway_port
+from modules.limits import LimitEvent, EVICTED
+from modules.order import Order
+from modules.orderbook import OrderBook
+from modules.transaction import Transaction
+from modules.validation import Reject, validate_order, DUPLICATE_ID, INVALID_ID, MALFORMED, UNKNOWN_ORDER, \
+    _object_starts
+from typing import Optional
+import asyncio
+import json
+
+
+# maximum number of messages waiting for a client before it is disconnected as a slow consumer
+client_queue_size = 10000
+# maximum number of requests waiting for the matching task
+request_queue_size = 10000
+# maximum number of requests matched before the matching task yields to the event loop
+matching_batch_size = 256
+
+
+class ClientSession:
+    __writer: asyncio.StreamWriter
+    __messages: asyncio.Queue
+    __writer_task: asyncio.Task = None
+    closed: bool = False
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int = client_queue_size):
+        """
+        :param writer:              stream of the client connection
+        :param queue_size:          maximum number of messages waiting to be written
+
+        Initializes a client session. Messages to the client are queued
+        and written by a separate task, so the matching task never waits for a client.
+        """
+
+        self.__writer = writer
+        self.__messages = asyncio.Queue(queue_size)
+        self.__writer_task = asyncio.create_task(self.__write_messages())
+
+    def send(self, message: str):
+        """
+        :param message:             JSON line (without a newline)
+
+        Queues a message for the client without waiting.
+        A client which does not keep up with its messages is disconnected.
+        """
+
+        if self.closed:
+            return
+        try:
+            self.__messages.put_nowait(message + "\n")
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        """
+        Closes the client connection, dropping undelivered messages.
+        """
+
+        if not self.closed:
+            self.closed = True
+            self.__writer_task.cancel()
+            self.__writer.close()
+
+    def finish(self):
+        """
+        Closes the client connection after all queued messages are written.
+        """
+
+        if not self.closed:
+            try:
+                self.__messages.put_nowait(None)
+            except asyncio.QueueFull:
+                self.close()
+
+    async def __write_messages(self):
+        """
+        Writes queued messages to the client, as many at once as available.
+        """
+
+        try:
+            finished = False
+            while not finished:
+                messages = [await self.__messages.get()]
+                while not self.__messages.empty():
+                    messages.append(self.__messages.get_nowait())
+                if None in messages:
+                    finished = True
+                    messages = messages[:messages.index(None)]
+                self.__writer.write(''.join(messages).encode())
+                await self.__writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.closed = True
+            self.__writer.close()
+
+
+class OrderGateway:
+    __order_book: OrderBook
+    __requests: asyncio.Queue
+    __owners: dict[int, ClientSession] = {}
+    __rejected_remainder: Optional[LimitEvent] = None
+    __subscribers: set[ClientSession] = set()
+    __server: asyncio.AbstractServer = None
+    __matching_task: asyncio.Task = None
+
+    def __init__(self, order_book: OrderBook = None):
+        """
+        :param order_book:          order book served by the gateway (a new one by default)
+
+        Initializes a TCP gateway of an order book.
+        Clients send JSON lines: orders (as in the line-by-line mode), {"cancel": id}
+        and {"subscribe": "trades"}. Invalid requests are rejected before they reach the matching task.
+        Requests of all clients are parsed by their connection handlers
+        and matched one by one by a single matching task.
+        Each client receives acknowledgements and rejects of its own requests and fills of its own orders;
+        subscribers receive all trades.
+        If the order book has limits, an order whose remainder breaks them is rejected (after its fills
+        are performed) and the owner of an evicted order receives the event of its eviction.
+        """
+
+        self.__order_book = order_book if order_book is not None else OrderBook()
+        self.__owners = {}
+        self.__rejected_remainder = None
+        self.__subscribers = set()
+
+        limits = self.__order_book.limits
+        if limits is not None:
+            event_sink = limits.event_sink
+
+            def gateway_event_sink(event: LimitEvent):
+                if event_sink is not None:
+                    event_sink(event)
+                self.__notify(event)
+
+            limits.event_sink = gateway_event_sink
+
+    @property
+    def order_book(self) -> OrderBook:
+        return self.__order_book
+
+    async def start(self, host: str = default_gateway_host, port: int = default_gateway_port) -> list[tuple]:
+        """
+        :param host:                host to listen on
+        :param port:                port to listen on (0 for any free port)
+        :return:                    list of socket addresses the gateway listens on
+
+        Starts the matching task and the TCP server.
+        """
+
+        self.__requests = asyncio.Queue(request_queue_size)
+        self.__matching_task = asyncio.create_task(self.__match_requests())
+        self.__server = await asyncio.start_server(self.__handle_client, host, port)
+        return [socket.getsockname() for socket in self.__server.sockets]
+
+    async def serve_forever(self):
+        """
+        Serves clients until the gateway is closed.
+        """
+
+        await self.__server.serve_forever()
+
+    async def close(self):
+        """
+        Stops accepting clients and stops the matching task.
+        """
+
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__matching_task.cancel()
+        try:
+            await self.__matching_task
+        except asyncio.CancelledError:
+            pass
+
+    async def __handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        :param reader:              input stream of the client
+        :param writer:              output stream of the client
+
+        Reads and parses requests of a single client and passes them to the matching task.
+        """
+
+        session = ClientSession(writer)
+        try:
+            while not session.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.isspace():
+                    continue
+                if line.strip() == b"exit":
+                    break
+
+                request = self.__parse(line)
+                if isinstance(request, Reject):
+                    session.send(request.return_json())
+                    continue
+
+                await self.__requests.put((session, request))
+        except (ConnectionError, ValueError):
+            # ValueError is raised by the reader for lines exceeding its limit
+            pass
+        finally:
+            await self.__requests.put((session, None))
+
+    @staticmethod
+    def __parse(line: bytes) -> object:
+        """
+        :param line:                JSON line of a request
+        :return:                    order, id of a cancelled order, 'subscribe' or a reject
+        """
+
+        # as in 'validate_order', most of garbage is rejected without running the JSON decoder
+        if line.lstrip()[:1] not in _object_starts:
+            return Reject(None, MALFORMED, "the message has to be a JSON object with 'type' and 'order' fields")
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return Reject(None, MALFORMED, "the message is not a valid JSON")
+        if not isinstance(data, dict):
+            return Reject(None, MALFORMED, "the message has to be a JSON object with 'type' and 'order' fields")
+
+        if 'cancel' in data:
+            order_id = data['cancel']
+            if type(order_id) is not int:
+                return Reject(None, INVALID_ID, "id of a cancelled order has to be an integer")
+            return order_id
+        if 'subscribe' in data:
+            if data['subscribe'] != "trades":
+                return Reject(None, MALFORMED, "only 'trades' can be subscribed")
+            return "subscribe"
+        return validate_order(data)
+
+    async def __match_requests(self):
+        """
+        Processes requests of all clients in the order of their arrival.
+        Yields to the event loop regularly, so that reading and writing overlap with matching.
+        """
+
+        while True:
+            self.__process(*await self.__requests.get())
+            for _ in range(matching_batch_size - 1):
+                if self.__requests.empty():
+                    break
+                self.__process(*self.__requests.get_nowait())
+            await asyncio.sleep(0)
+
+    def __process(self, session: ClientSession, request: object):
+        """
+        :param session:             client session of the request
+        :param request:             parsed request (None after the client has disconnected)
+        """
+
+        if isinstance(request, Order):
+            self.__add(session, request)
+        elif isinstance(request, int):
+            self.__cancel(session, request)
+        elif request == "subscribe":
+            self.__subscribers.add(session)
+            session.send(json.dumps({'subscribed': "trades"}))
+        else:
+            self.__subscribers.discard(session)
+            session.finish()
+
+    def __add(self, session: ClientSession, order: Order):
+        """
+        :param session:             client session of the order
+        :param order:               new order
+        """
+
+        order_book = self.__order_book
+        if order.id in order_book:
+            session.send(Reject(order.id, DUPLICATE_ID, "an order of the same id is already in the order book")
+                         .return_json())
+            return
+
+        self.__rejected_remainder = None
+        transactions = order_book.add_many((order,))
+
+        if order.id in order_book:
+            self.__owners[order.id] = session
+        rejected_remainder = self.__rejected_remainder
+        if rejected_remainder is not None and rejected_remainder.order_id == order.id:
+            session.send(Reject(order.id, rejected_remainder.reason,
+                                "the remainder of the order ({0}) breaks limits of the order book"
+                                .format(rejected_remainder.quantity)).return_json())
+        else:
+            session.send(json.dumps({'ack': order.id}))
+        for transaction in transactions:
+            self.__publish(session, transaction)
+
+        # an order may be used up by many fills of a single aggression, so owners are dropped after all of them
+        for transaction in transactions:
+            for order_id in (transaction.buy_order_id, transaction.sell_order_id):
+                if order_id in self.__owners and order_id not in order_book:
+                    del self.__owners[order_id]
+
+    def __cancel(self, session: ClientSession, order_id: int):
+        """
+        :param session:             client session of the request
+        :param order_id:            id of the cancelled order
+        """
+
+        if self.__owners.get(order_id) is not session:
+            session.send(Reject(order_id, UNKNOWN_ORDER, "no resting order of given id belongs to the client")
+                         .return_json())
+            return
+
+        self.__order_book.cancel(order_id)
+        del self.__owners[order_id]
+        session.send(json.dumps({'cancelled': order_id}))
+
+    def __notify(self, event: LimitEvent):
+        """
+        :param event:               event of an order breaking limits of the order book
+
+        Sends the event of an evicted order to its owner, who no longer owns the order.
+        A reject can concern only the order being added; it is answered when the order has been matched.
+        """
+
+        if event.action == EVICTED:
+            owner = self.__owners.pop(event.order_id, None)
+            if owner is not None:
+                owner.send(event.return_json())
+        else:
+            self.__rejected_remainder = event
+
+    def __publish(self, aggressor_session: ClientSession, transaction: Transaction):
+        """
+        :param aggressor_session:   client session of the aggressive order
+        :param transaction:         performed transaction
+
+        Sends a fill to the owners of both orders and a trade to all subscribers.
+        """
+
+        message = transaction.return_json()
+        aggressor_session.send(message)
+        for order_id in (transaction.buy_order_id, transaction.sell_order_id):
+            owner: Optional[ClientSession] = self.__owners.get(order_id)
+            if owner is not None and owner is not aggressor_session:
+                owner.send(message)
+
+        for subscriber in self.__subscribers:
+            subscriber.send(message)
+
+
+def run_gateway(host: str = default_gateway_host, port: int = default_gateway_port, order_book: OrderBook = None):
+    """
+    :param host:                    host to listen on
+    :param port:                    port to listen on
+    :param order_book:              order book served by the gateway (a new one by default)
+
+    Runs an order gateway until it is interrupted.
+    """
+
+    async def serve():
+        gateway = OrderGateway(order_book)
+        for address in await gateway.start(host, port):
+            print("Listening on {0}:{1}.".format(*address[:2]))
+        try:
+            await gateway.serve_forever()
+        finally:
+            await gateway.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
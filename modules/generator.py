@@ -0,0 +1,131 @@
+from modules.constants import get_setting
+from modules.orderlog import OrderLogWriter, record_format
+from typing import Iterator
+import numpy as np
+
+
+generator_chunk_size = 1 << 16
+
+# NumPy counterpart of the order log record
+order_log_dtype = np.dtype([('id', '<i8'), ('price', '<i8'), ('quantity', '<i8'), ('peak', '<i8'),
+                            ('side', 'u1'), ('kind', 'u1'), ('padding', 'V6')])
+assert order_log_dtype.itemsize == record_format.size
+
+
+def generate_order_chunks(number_of_orders: int, iceberg_probability: float = None,
+                          price_mean: int = None, price_deviation: int = None,
+                          quantity_mean: int = None, quantity_deviation: int = None,
+                          peak_min: int = None, peak_max: int = None,
+                          seed: int = None,
+                          chunk_size: int = generator_chunk_size) -> Iterator[dict[str, np.ndarray]]:
+    """
+    :param number_of_orders:        the total number of orders
+    :param iceberg_probability:     the expected relative amount of iceberg type orders
+    :param price_mean:              normal distribution mean for 'price' field
+    :param price_deviation:         standard deviation for 'price' field
+    :param quantity_mean:           normal distribution mean for 'quantity' field
+    :param quantity_deviation:      standard deviation for 'quantity' field
+    :param peak_min:                minimum value of 'peak' field
+    :param peak_max:                maximum value of 'peak' field
+    :param seed:                    seed of the random generator (random by default)
+    :param chunk_size:              maximum number of orders in a single chunk
+    :return:                        iterator over chunks of orders
+
+    Generates random orders in chunks, with the same distributions as 'generate_random_orders'.
+    Each chunk is a dictionary of arrays: 'id', 'side' and 'kind' (integer codes of Order),
+    'price', 'quantity' and 'peak' (zero for limit orders).
+    The same seed and chunk size always give the same orders.
+    Parameters which are not given are taken from the generator settings ('config.json').
+    """
+
+    iceberg_probability = get_setting('iceberg_probability', iceberg_probability)
+    price_mean = get_setting('price_mean', price_mean)
+    price_deviation = get_setting('price_deviation', price_deviation)
+    quantity_mean = get_setting('quantity_mean', quantity_mean)
+    quantity_deviation = get_setting('quantity_deviation', quantity_deviation)
+    peak_min = get_setting('peak_min', peak_min)
+    peak_max = get_setting('peak_max', peak_max)
+
+    generator = np.random.default_rng(seed)
+    for start in range(0, number_of_orders, chunk_size):
+        size = min(chunk_size, number_of_orders - start)
+
+        side = (generator.random(size) >= 0.5).astype(np.int8)
+        quantity = _round(generator.normal(quantity_mean, quantity_deviation, size))
+        kind = (generator.random(size) < iceberg_probability).astype(np.int8)
+        peak = np.minimum(_round(generator.uniform(peak_min, peak_max, size)), quantity // 2) * kind
+        price = _round(generator.normal(price_mean, price_deviation, size))
+
+        yield {'id': np.arange(start + 1, start + size + 1, dtype=np.int64),
+               'side': side, 'kind': kind, 'price': price, 'quantity': quantity, 'peak': peak}
+
+
+def write_random_orders(number_of_orders: int, output_file: str = None, seed: int = None,
+                        chunk_size: int = generator_chunk_size, binary: bool = False, **parameters):
+    """
+    :param number_of_orders:        the total number of orders
+    :param output_file:             output file name
+    :param seed:                    seed of the random generator (random by default)
+    :param chunk_size:              number of orders generated and written at once
+    :param binary:                  writes a binary order log instead of JSON lines if true
+    :param parameters:              distribution parameters of 'generate_order_chunks'
+
+    Generates a series of random orders to a JSON lines file (or a binary order log), chunk by chunk,
+    so the memory usage does not depend on the number of orders.
+    """
+
+    output_file = get_setting('default_output', output_file)
+    chunks = generate_order_chunks(number_of_orders, seed=seed, chunk_size=chunk_size, **parameters)
+    if binary:
+        with OrderLogWriter(output_file) as writer:
+            for chunk in chunks:
+                writer.write_bytes(_pack_chunk(chunk).tobytes())
+    else:
+        with open(output_file, 'w') as file:
+            for chunk in chunks:
+                file.writelines(_format_chunk(chunk))
+
+
+def _pack_chunk(chunk: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    :param chunk:                   chunk of orders
+    :return:                        array of order log records
+
+    Packs a chunk of orders into order log records.
+    """
+
+    records = np.zeros(len(chunk['id']), dtype=order_log_dtype)
+    for field in ('id', 'price', 'quantity', 'peak', 'side', 'kind'):
+        records[field] = chunk[field]
+    return records
+
+
+def _format_chunk(chunk: dict[str, np.ndarray]) -> Iterator[str]:
+    """
+    :param chunk:                   chunk of orders
+    :return:                        iterator over JSON lines
+
+    Formats a chunk of orders as JSON lines of the same form as Order.__dict__(simple=False).
+    """
+
+    directions = ('"Buy"', '"Sell"')
+    for order_id, side, peak, price, quantity in zip(chunk['id'].tolist(), chunk['side'].tolist(),
+                                                     chunk['peak'].tolist(), chunk['price'].tolist(),
+                                                     chunk['quantity'].tolist()):
+        if peak > 0:
+            yield '{"type": "Iceberg", "order": {"direction": %s, "id": %d, "price": %d, "quantity": %d, ' \
+                  '"peak": %d}}\n' % (directions[side], order_id, price, quantity, peak)
+        else:
+            yield '{"type": "Limit", "order": {"direction": %s, "id": %d, "price": %d, "quantity": %d}}\n' % (
+                directions[side], order_id, price, quantity)
+
+
+def _round(values: np.ndarray) -> np.ndarray:
+    """
+    :param values:                  random numbers
+    :return:                        numbers rounded to multiplicities of 10, at least 10
+
+    Vectorized counterpart of the rounding in 'modules.auxiliary._generate'.
+    """
+
+    return np.round(np.maximum(10., values), -1).astype(np.int64)
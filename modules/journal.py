@@ -0,0 +1,246 @@
+from modules.constants import default_commit_count
+from modules.order import Order
+from typing import Iterator
+import mmap
+import os
+import struct
+import threading
+
+
+# header: magic bytes, format version, flags
+journal_header_format = struct.Struct('<8sHHI')
+journal_magic = b'ICEJRNL\x00'
+journal_version = 1
+
+# entry: entry type, side, kind, padding and four integer fields:
+#   order:  id, price, total quantity, peak
+#   fill:   buy order id, sell order id, price, quantity
+#   cancel: id
+#   modify: id, new quantity
+#   snapshot: timestamp counter, depth sequence, log position, number of orders of the restored snapshot
+entry_format = struct.Struct('<BBB5xqqqq')
+
+ORDER_ENTRY = 0
+FILL_ENTRY = 1
+CANCEL_ENTRY = 2
+MODIFY_ENTRY = 3
+SNAPSHOT_ENTRY = 4
+
+
+class Journal:
+    __file = None
+    __lock: threading.Lock
+    __buffer: list[bytes] = []
+    __completed: int = 0
+    __timer: threading.Thread = None
+    __stopped: threading.Event
+    commit_count: int
+    commit_interval: float
+
+    def __init__(self, output_file: str, commit_count: int = default_commit_count, commit_interval: float = None):
+        """
+        :param output_file:         journal file name; an existing journal is appended to
+        :param commit_count:        number of entries committed at once
+        :param commit_interval:     maximum time (in seconds) a completed entry waits for its commit (optional)
+
+        Opens an append-only journal of accepted orders, cancels, modifications and resulting fills.
+        Entries are buffered and committed (written and flushed to the disk) in groups:
+        as soon as 'commit_count' entries are waiting or, if 'commit_interval' is given,
+        at least once per interval. Only complete commands, i.e. an order together with all its fills,
+        are committed, so a journal never ends in the middle of a command.
+        """
+
+        self.commit_count = commit_count
+        self.commit_interval = commit_interval
+        self.__lock = threading.Lock()
+        self.__buffer = []
+        self.__completed = 0
+        self.__file = _open_journal(output_file)
+
+        self.__stopped = threading.Event()
+        if commit_interval is not None:
+            self.__timer = threading.Thread(target=self.__commit_periodically, daemon=True)
+            self.__timer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append_order(self, order: Order):
+        """
+        :param order:               accepted order (before it is matched)
+        """
+
+        self.__buffer.append(entry_format.pack(ORDER_ENTRY, order.side, order.kind, order.id, order.price,
+                                               order.quantity + order.hidden_quantity, order.peak))
+
+    def append_fill(self, buy_order_id: int, sell_order_id: int, price: int, quantity: int):
+        """
+        :param buy_order_id:        id of the buy order
+        :param sell_order_id:       id of the sell order
+        :param price:               price of the fill
+        :param quantity:            quantity of the fill
+        """
+
+        self.__buffer.append(entry_format.pack(FILL_ENTRY, 0, 0, buy_order_id, sell_order_id, price, quantity))
+
+    def append_cancel(self, order_id: int):
+        """
+        :param order_id:            id of the cancelled order
+        """
+
+        self.__buffer.append(entry_format.pack(CANCEL_ENTRY, 0, 0, order_id, 0, 0, 0))
+
+    def append_modify(self, order_id: int, new_quantity: int):
+        """
+        :param order_id:            id of the modified order
+        :param new_quantity:        new total quantity of the order
+        """
+
+        self.__buffer.append(entry_format.pack(MODIFY_ENTRY, 0, 0, order_id, new_quantity, 0, 0))
+
+    def append_snapshot(self, timestamp: int, depth_sequence: int, position: int, number_of_orders: int):
+        """
+        :param timestamp:           timestamp counter of the restored snapshot
+        :param depth_sequence:      depth sequence of the restored snapshot
+        :param position:            log position of the restored snapshot
+        :param number_of_orders:    number of resting orders of the restored snapshot
+
+        Marks that the order book was replaced with a snapshot: the following entries continue from it.
+        """
+
+        self.__buffer.append(entry_format.pack(SNAPSHOT_ENTRY, 0, 0, timestamp, depth_sequence, position,
+                                               number_of_orders))
+
+    def complete(self):
+        """
+        Marks the end of a command: all entries appended so far may be committed.
+        Commits them if at least 'commit_count' entries are waiting.
+        """
+
+        with self.__lock:
+            self.__completed = len(self.__buffer)
+            if self.__completed >= self.commit_count:
+                self.__commit()
+
+    def commit(self):
+        """
+        Commits all complete commands waiting in the buffer.
+        """
+
+        with self.__lock:
+            self.__commit()
+
+    def close(self):
+        """
+        Stops the periodic commits, commits all waiting entries and closes the journal.
+        """
+
+        self.__stopped.set()
+        if self.__timer is not None:
+            self.__timer.join()
+        with self.__lock:
+            self.__completed = len(self.__buffer)
+            self.__commit()
+            self.__file.close()
+
+    def __commit(self):
+        """
+        Writes complete commands to the journal file and flushes them to the disk.
+        """
+
+        if self.__completed == 0:
+            return
+
+        entries = self.__buffer[:self.__completed]
+        del self.__buffer[:self.__completed]
+        self.__completed = 0
+        self.__file.write(b''.join(entries))
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+    def __commit_periodically(self):
+        """
+        Commits waiting entries at least once per 'commit_interval'.
+        """
+
+        while not self.__stopped.wait(self.commit_interval):
+            self.commit()
+
+
+def read_journal(input_file: str) -> Iterator[tuple]:
+    """
+    :param input_file:              journal file name
+    :return:                        iterator over entries
+
+    Reads entries of a journal, i.e. tuples (entry type, side, kind, first, second, third, fourth field).
+    An incomplete entry at the end of the file (after an interrupted write) is ignored.
+    Raises a ValueError if the file is not a journal.
+    """
+
+    with open(input_file, 'rb') as file:
+        _check_header(file, input_file)
+        if os.fstat(file.fileno()).st_size == journal_header_format.size:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            size = (len(mapped_file) - journal_header_format.size) // entry_format.size * entry_format.size
+            data = memoryview(mapped_file)[journal_header_format.size:journal_header_format.size + size]
+            try:
+                yield from entry_format.iter_unpack(data)
+            finally:
+                data.release()
+
+
+def is_journal(input_file: str) -> bool:
+    """
+    :param input_file:              file name
+    :return:                        true if the file starts with the journal header
+    """
+
+    with open(input_file, 'rb') as file:
+        return file.read(len(journal_magic)) == journal_magic
+
+
+def _open_journal(output_file: str):
+    """
+    :param output_file:             journal file name
+    :return:                        binary file object opened for appending
+
+    Creates a new journal or opens an existing one, dropping an incomplete entry at its end.
+    """
+
+    file = open(output_file, 'ab+')
+    size = file.seek(0, os.SEEK_END)
+    if size == 0:
+        file.write(journal_header_format.pack(journal_magic, journal_version, 0, 0))
+        file.flush()
+        os.fsync(file.fileno())
+    else:
+        file.seek(0)
+        _check_header(file, output_file)
+        complete_size = journal_header_format.size + \
+            (size - journal_header_format.size) // entry_format.size * entry_format.size
+        if complete_size != size:
+            file.truncate(complete_size)
+        file.seek(0, os.SEEK_END)
+
+    return file
+
+
+def _check_header(file, file_name: str):
+    """
+    :param file:                    binary file object positioned at the beginning of the file
+    :param file_name:               name of the file
+
+    Raises a ValueError if the file does not start with a journal header.
+    """
+
+    data = file.read(journal_header_format.size)
+    if len(data) < journal_header_format.size:
+        raise ValueError("'{0}' is not a journal".format(file_name))
+    magic, version, _, _ = journal_header_format.unpack(data)
+    if magic != journal_magic or version != journal_version:
+        raise ValueError("'{0}' is not a journal of version {1}".format(file_name, journal_version))
@@ -0,0 +1,134 @@
+from modules.order import Order
+from typing import Callable, Optional
+import json
+
+
+# actions taken on orders breaking the limits
+REJECTED = "rejected"
+EVICTED = "evicted"
+
+# reasons of actions
+MAX_ORDERS = "max_orders"
+PRICE_BAND = "price_band"
+
+# policies for a new order which would exceed the maximum number of resting orders of its side
+EVICT = "evict"
+REJECT = "reject"
+LIMIT_POLICIES = (EVICT, REJECT)
+
+
+class LimitEvent:
+    __slots__ = ('action', 'reason', 'order_id', 'direction', 'price', 'quantity')
+
+    action: str
+    reason: str
+    order_id: int
+    direction: str
+    price: int
+    quantity: int
+
+    def __dict__(self):
+        """
+        Returns a dictionary object from an event object.
+        """
+
+        return {'event': self.action, 'reason': self.reason, 'id': self.order_id, 'direction': self.direction,
+                'price': self.price, 'quantity': self.quantity}
+
+    def __init__(self, action: str, reason: str, order: Order):
+        """
+        :param action:              REJECTED (the order did not rest) or EVICTED (the order was removed)
+        :param reason:              MAX_ORDERS or PRICE_BAND
+        :param order:               rejected or evicted order
+
+        Creates a record of an order which broke the limits of an order book,
+        with the (visible and hidden) quantity it had left.
+        """
+
+        self.action = action
+        self.reason = reason
+        self.order_id = order.id
+        self.direction = order.direction
+        self.price = order.price
+        self.quantity = order.quantity + order.hidden_quantity
+
+    def __str__(self):
+        """
+        Returns a dictionary string of an event object.
+        """
+
+        return str(self.__dict__())
+
+    def return_json(self):
+        """
+        Returns a JSON object from an event object.
+        """
+
+        return json.dumps(self.__dict__())
+
+
+class BookLimits:
+    max_orders: Optional[int] = None
+    price_band: Optional[int] = None
+    policy: str = EVICT
+    rejected_orders: int = 0
+    evicted_orders: int = 0
+    event_sink: Optional[Callable[[LimitEvent], None]] = None
+
+    def __init__(self, max_orders: int = None, price_band: int = None, policy: str = EVICT,
+                 event_sink: Callable[[LimitEvent], None] = None):
+        """
+        :param max_orders:          maximum number of resting orders of each side (no limit by default)
+        :param price_band:          maximum distance of resting orders from the mid price (no limit by default)
+        :param policy:              EVICT or REJECT, for an order exceeding 'max_orders'
+        :param event_sink:          function called with every rejected or evicted order (optional)
+
+        Limits of an order book which keep its memory usage and the cost of operations bounded.
+        They apply to the unfilled remainder of an order, i.e. matching is never affected.
+
+        If the side of a new order is full, the order with the lowest priority on that side
+        (the last one at the worst price) is evicted to make room for it when the policy is EVICT
+        and the new order has a better price; otherwise the new order is rejected.
+
+        Orders further than 'price_band' from the mid price (or from the best price,
+        if only one side of the book is present) are rejected and, as the mid price moves,
+        price levels leaving the band are evicted after each order, worst first.
+        The best price level of a side is never affected by the band, so a wide spread never empties the book.
+
+        The event sink may be replaced later, eg. by a gateway serving the order book.
+        Raises a ValueError for negative limits or an unknown policy.
+        """
+
+        if max_orders is not None and max_orders < 0:
+            raise ValueError("maximum number of resting orders cannot be negative")
+        if price_band is not None and price_band < 0:
+            raise ValueError("price band cannot be negative")
+        if policy not in LIMIT_POLICIES:
+            raise ValueError("policy has to be either '{0}' or '{1}'".format(*LIMIT_POLICIES))
+
+        self.max_orders = max_orders
+        self.price_band = price_band
+        self.policy = policy
+        self.rejected_orders = 0
+        self.evicted_orders = 0
+        self.event_sink = event_sink
+
+    def reject(self, order: Order, reason: str):
+        """
+        :param order:               order whose remainder is not rested
+        :param reason:              reason of the reject
+        """
+
+        self.rejected_orders += 1
+        if self.event_sink is not None:
+            self.event_sink(LimitEvent(REJECTED, reason, order))
+
+    def evict(self, order: Order, reason: str):
+        """
+        :param order:               resting order removed from the order book
+        :param reason:              reason of the eviction
+        """
+
+        self.evicted_orders += 1
+        if self.event_sink is not None:
+            self.event_sink(LimitEvent(EVICTED, reason, order))
@@ -0,0 +1,133 @@
+import json
+
+
+class Histogram:
+    count: int
+    sum: int
+    buckets: list[int]
+
+    def __init__(self):
+        """
+        Initializes an empty histogram of non-negative integers
+        with power-of-two buckets: the i-th bucket counts values below 2^i.
+        """
+
+        self.count = 0
+        self.sum = 0
+        self.buckets = [0]
+
+    def observe(self, value: int, count: int = 1):
+        """
+        :param value:               observed value
+        :param count:               the number of observations of the value
+
+        Adds observations of a value to the histogram.
+        """
+
+        index = value.bit_length()
+        if index >= len(self.buckets):
+            self.buckets.extend([0] * (index - len(self.buckets) + 1))
+        self.buckets[index] += count
+        self.count += count
+        self.sum += value * count
+
+    def __dict__(self):
+        """
+        Returns a dictionary object from a histogram: count, sum
+        and the number of observations for each upper bound of a bucket.
+        """
+
+        return {'count': self.count, 'sum': self.sum,
+                'buckets': {str((1 << index) - 1): count for index, count in enumerate(self.buckets)}}
+
+
+class Metrics:
+    counters: dict[str, int]
+    histograms: dict[str, Histogram]
+
+    def __init__(self):
+        """
+        Initializes an empty collection of counters and histograms.
+        Both are created on their first use.
+        """
+
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name: str, value: int = 1):
+        """
+        :param name:                name of the counter
+        :param value:               increment
+
+        Increases a counter.
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: int, count: int = 1):
+        """
+        :param name:                name of the histogram
+        :param value:               observed value
+        :param count:               the number of observations of the value
+
+        Adds observations to a histogram.
+        """
+
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value, count)
+
+    def __dict__(self):
+        """
+        Returns a dictionary object with all counters and histograms.
+        """
+
+        return {'counters': dict(self.counters),
+                'histograms': {name: histogram.__dict__() for name, histogram in self.histograms.items()}}
+
+    def return_json(self):
+        """
+        Returns a JSON object with all counters and histograms.
+        """
+
+        return json.dumps(self.__dict__())
+
+    def return_prometheus(self, prefix: str = "orderbook") -> str:
+        """
+        :param prefix:              prefix of metric names
+        :return:                    metrics in Prometheus text exposition format
+
+        Returns counters and histograms (with cumulative buckets) as Prometheus text.
+        """
+
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines.append("# TYPE {0}_{1} counter".format(prefix, name))
+            lines.append("{0}_{1} {2}".format(prefix, name, value))
+
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append("# TYPE {0}_{1} histogram".format(prefix, name))
+            cumulative_count = 0
+            for index, count in enumerate(histogram.buckets):
+                cumulative_count += count
+                lines.append('{0}_{1}_bucket{{le="{2}"}} {3}'.format(prefix, name, (1 << index) - 1, cumulative_count))
+            lines.append('{0}_{1}_bucket{{le="+Inf"}} {2}'.format(prefix, name, histogram.count))
+            lines.append("{0}_{1}_sum {2}".format(prefix, name, histogram.sum))
+            lines.append("{0}_{1}_count {2}".format(prefix, name, histogram.count))
+
+        return '\n'.join(lines) + '\n'
+
+    def save(self, output_file: str):
+        """
+        :param output_file:         output file name
+
+        Saves metrics to a file: in Prometheus text format if the file name ends with '.prom',
+        as a JSON object otherwise.
+        """
+
+        with open(output_file, 'w') as file:
+            if output_file.endswith('.prom'):
+                file.write(self.return_prometheus())
+            else:
+                json.dump(self.__dict__(), file, indent=4)
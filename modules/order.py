@@ -1,11 +1,26 @@
+from typing import Iterable
 import json
 
 
+# integer codes of order directions and types
+BUY = 0
+SELL = 1
+LIMIT = 0
+ICEBERG = 1
+
+DIRECTIONS = ("Buy", "Sell")
+ORDER_TYPES = ("Limit", "Iceberg")
+_direction_codes = {"Buy": BUY, "Sell": SELL}
+_order_type_codes = {"Limit": LIMIT, "Iceberg": ICEBERG}
+
+
 class Order:
-    id: int = -1
-    timestamp: int = 0
-    direction: str
-    type: str
+    __slots__ = ('id', 'timestamp', 'side', 'kind', 'price', 'quantity', 'hidden_quantity', 'peak')
+
+    id: int
+    timestamp: int
+    side: int
+    kind: int
     price: int
     quantity: int
     hidden_quantity: int
@@ -25,52 +40,150 @@ class Order:
                 order_info['peak'] = self.peak
             return {'type': self.type, 'order': order_info}
 
+    @property
+    def direction(self) -> str:
+        """
+        Returns the direction of the order: either 'Buy' or 'Sell'.
+        """
+
+        return DIRECTIONS[self.side]
+
+    @direction.setter
+    def direction(self, direction: str):
+        if direction not in _direction_codes:
+            raise ValueError("the direction of the order has to be either 'Buy' or 'Sell'")
+        self.side = _direction_codes[direction]
+
+    @property
+    def type(self) -> str:
+        """
+        Returns the type of the order: either 'Limit' or 'Iceberg'.
+        """
+
+        return ORDER_TYPES[self.kind]
+
+    @type.setter
+    def type(self, order_type: str):
+        if order_type not in _order_type_codes:
+            raise ValueError("the type of the order has to be either 'Limit' or 'Iceberg'")
+        self.kind = _order_type_codes[order_type]
+
     def __init__(self, input_data):
         """
-        Create an order object from either JSON line
+        Create an order object from either JSON line, a decoded JSON dictionary
         or a tuple of the form (id, type, direction, price, quantity, peak).
         Checks the correctness of the data.
         """
 
         if isinstance(input_data, str):
-            data = json.loads(input_data)
-            order_data = data['order']
-
-            self.type = data['type']
-            self.direction = order_data['direction']
-            self.id = order_data['id']
-            self.price = order_data['price']
-            self.quantity = order_data['quantity']
-            if self.type == "Iceberg" and 'peak' in order_data:
-                self.peak = order_data['peak']
-            else:
-                self.peak = 0
-
+            self.__read(json.loads(input_data))
+        elif isinstance(input_data, dict):
+            self.__read(input_data)
         elif isinstance(input_data, tuple):
-            self.id, self.type, self.direction, self.price, self.quantity, self.peak = input_data
+            self.id, order_type, direction, self.price, self.quantity, self.peak = input_data
+            self.kind = _order_type_codes.get(order_type)
+            self.side = _direction_codes.get(direction)
+        else:
+            raise TypeError("expected a JSON line, a dictionary or a tuple")
 
+        self.__validate()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Order':
+        """
+        :param data:                decoded JSON object of the form {"type": ..., "order": {...}}
+        :return:                    order object
+
+        Creates an order object from an already decoded JSON object,
+        with the same checks as for a JSON line.
+        """
+
+        order = cls.__new__(cls)
+        order.__read(data)
+        order.__validate()
+        return order
+
+    @classmethod
+    def from_codes(cls, order_id: int, side: int, kind: int, price: int, quantity: int, peak: int) -> 'Order':
+        """
+        :param order_id:            id of the order
+        :param side:                direction code (BUY or SELL)
+        :param kind:                type code (LIMIT or ICEBERG)
+        :param price:               price of the order
+        :param quantity:            total quantity of the order
+        :param peak:                peak of an iceberg order (zero for limit orders)
+        :return:                    order object
+
+        Creates an order object from integer-coded fields, with the same checks as for a tuple.
+        """
+
+        order = cls.__new__(cls)
+        order.id = order_id
+        order.side = side if side == BUY or side == SELL else None
+        order.kind = kind if kind == LIMIT or kind == ICEBERG else None
+        order.price = price
+        order.quantity = quantity
+        order.peak = peak
+        order.__validate()
+        return order
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[dict]) -> list['Order']:
+        """
+        :param records:             decoded JSON objects
+        :return:                    list of order objects
+
+        Creates a list of order objects from a sequence of already decoded JSON objects.
+        """
+
+        from_dict = cls.from_dict
+        return [from_dict(data) for data in records]
+
+    def __read(self, data: dict):
+        """
+        :param data:                decoded JSON object of the form {"type": ..., "order": {...}}
+
+        Reads the fields of the order from a decoded JSON object.
+        Raises a KeyError if a required field is missing.
+        """
+
+        order_data = data['order']
+
+        self.kind = _order_type_codes.get(data['type'])
+        self.side = _direction_codes.get(order_data['direction'])
+        self.id = order_data['id']
+        self.price = order_data['price']
+        self.quantity = order_data['quantity']
+        if self.kind == ICEBERG and 'peak' in order_data:
+            self.peak = order_data['peak']
         else:
-            raise TypeError("expected a JSON line or a tuple")
+            self.peak = 0
+
+    def __validate(self):
+        """
+        Checks the correctness of the order and splits its quantity
+        into visible and hidden parts. Raises a ValueError for incorrect orders.
+        """
 
         self.timestamp = self.id
         if self.peak > 0:
-            if self.type == "Limit":
+            if self.kind == LIMIT:
                 raise ValueError("limit orders can't have a positive 'peak'")
             self.hidden_quantity = max(self.quantity - self.peak, 0)
             self.quantity = min(self.quantity, self.peak)
         else:
-            if self.type == "Iceberg":
+            if self.kind == ICEBERG:
                 raise ValueError("iceberg orders can't have zero 'peak'")
 
             self.hidden_quantity = 0
 
-        if self.price == 0:
-            raise ValueError("price of the order cannot be zero")
-        if self.quantity == 0:
-            raise ValueError("quantity of the order cannot be zero")
-        if not (self.type == "Limit" or self.type == "Iceberg"):
+        if self.price <= 0:
+            raise ValueError("price of the order has to be positive")
+        if self.quantity <= 0:
+            raise ValueError("quantity of the order has to be positive")
+        if self.kind is None:
             raise ValueError("the type of the order has to be either 'Limit' or 'Iceberg'")
-        if not (self.direction == "Buy" or self.direction == "Sell"):
+        if self.side is None:
             raise ValueError("the direction of the order has to be either 'Buy' or 'Sell'")
 
     def __eq__(self, other):
@@ -81,7 +194,7 @@ class Order:
 
         if self.id == other.id:
             if self.price == other.price and self.quantity == other.quantity and self.peak == other.peak and \
-               self.direction == other.direction and self.type == other.type:
+               self.side == other.side and self.kind == other.kind:
                 return True
             else:
                 raise ValueError("different orders share the same id")
@@ -95,7 +208,7 @@ class Order:
         """
 
         if self.price != other.price:
-            return (self.price < other.price) ^ (self.direction == "Buy")
+            return (self.price < other.price) ^ (self.side == BUY)
         else:
             return self.timestamp < other.timestamp
 
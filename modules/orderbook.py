@@ -1,27 +1,79 @@
-from modules.order import Order
-from sortedcontainers import SortedList
+from modules.order import Order, BUY, SELL
+from modules.pricelevel import PriceLevel
+from modules.transaction import Transaction
+from sortedcontainers import SortedDict
+from itertools import count, islice
+from operator import neg
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Union
 import json
 
+# journals, metrics and snapshots are imported only by the methods using them
+if TYPE_CHECKING:
+    from modules.journal import Journal
+    from modules.limits import BookLimits
+    from modules.metrics import Metrics
+
 
 class OrderBook:
-    last_transactions: list[str] = []
     __timestamp: id = 0
     __store_transactions: bool = False
-    __buy_orders: SortedList[Order] = SortedList()
-    __sell_orders: SortedList[Order] = SortedList()
+    __transaction_sink: Optional[Callable[[Transaction], None]] = None
+    __transactions: list[Transaction] = []
+    __last_transactions_start: int = 0
+    __buy_levels: SortedDict[int, PriceLevel] = SortedDict(neg)
+    __sell_levels: SortedDict[int, PriceLevel] = SortedDict()
+    __sides: tuple[SortedDict[int, PriceLevel], SortedDict[int, PriceLevel]] = ()
+    __orders: dict[int, Order] = {}
+    __side_sizes: list[int] = []
+    __limits: Optional['BookLimits'] = None
+    __changed_prices: tuple[set[int], set[int]] = ()
+    __best_levels: list[Optional[PriceLevel]] = []
+    __depth_sequence: int = 0
 
-    def __init__(self, store_transactions=False):
+    def __init__(self, store_transactions=False, transaction_sink: Callable[[Transaction], None] = None,
+                 metrics: 'Metrics' = None, journal: 'Journal' = None, limits: 'BookLimits' = None):
         """
-        :param store_transactions:  the flag for storing last performed transactions
+        :param store_transactions:  the flag for storing performed transactions
+        :param transaction_sink:    function called with every performed transaction
+        :param metrics:             collection of metrics of the order book (optional)
+        :param journal:             journal of accepted orders and resulting fills (optional)
+        :param limits:              limits of the number and prices of resting orders (optional)
 
         Initializes the order book. If 'store_transactions' is true,
-        stores information about performed transactions
-        in order to print them via the standard output.
+        stores performed transactions in a buffer of the order book
+        until they are collected with 'drain_transactions'.
+        Independently, every transaction can be passed to 'transaction_sink'.
+        If 'metrics' is given, the order book records counters and histograms into it.
+        If 'journal' is given, the order book records every accepted command and fill into it.
+        If 'limits' are given, orders breaking them are rejected or evicted (see 'BookLimits').
+
+        Each side of the book is a sorted index of price levels, best price first,
+        and each price level keeps its orders in a FIFO queue.
+        The best price level of each side is cached, so the top of the book is read in constant time.
+        Resting orders are also indexed by their ids and counted per side.
         """
 
         self.__store_transactions = store_transactions
-        self.__buy_orders = SortedList()
-        self.__sell_orders = SortedList()
+        self.__transaction_sink = transaction_sink
+        self.__transactions = []
+        self.__last_transactions_start = 0
+        self.__buy_levels = SortedDict(neg)
+        self.__sell_levels = SortedDict()
+        self.__sides = (self.__buy_levels, self.__sell_levels)
+        self.__orders = {}
+        self.__side_sizes = [0, 0]
+        self.__changed_prices = (set(), set())
+        self.__best_levels = [None, None]
+        self.__depth_sequence = 0
+
+        self.__limits = limits
+        if limits is not None:
+            self.__limit(limits)
+        if metrics is not None:
+            self.__instrument(metrics)
+        if journal is not None:
+            self.attach_journal(journal)
 
     def __repr__(self):
         """
@@ -35,36 +87,276 @@ class OrderBook:
             output += '\n'.join(self.last_transactions) + "\n"
         return output
 
+    def __contains__(self, order_id: int) -> bool:
+        """
+        :param order_id:            id of an order
+        :return:                    true if an order of given id rests in the order book
+        """
+
+        return order_id in self.__orders
+
+    @property
+    def limits(self) -> Optional['BookLimits']:
+        """
+        :return:                    limits of resting orders (None if the order book has none)
+        """
+
+        return self.__limits
+
+    def count_orders(self, side: int = None) -> int:
+        """
+        :param side:                BUY or SELL (both sides by default)
+        :return:                    the number of resting orders
+        """
+
+        return len(self.__orders) if side is None else self.__side_sizes[side]
+
+    @property
+    def best_bid(self) -> Optional[int]:
+        """
+        :return:                    the highest price of buy orders (None if there are none)
+        """
+
+        level = self.__best_levels[BUY]
+        return level.price if level is not None else None
+
+    @property
+    def best_ask(self) -> Optional[int]:
+        """
+        :return:                    the lowest price of sell orders (None if there are none)
+        """
+
+        level = self.__best_levels[SELL]
+        return level.price if level is not None else None
+
+    @property
+    def best_bid_quantity(self) -> int:
+        """
+        :return:                    visible quantity at the best bid (zero if there are no buy orders)
+        """
+
+        level = self.__best_levels[BUY]
+        return level.quantity if level is not None else 0
+
+    @property
+    def best_ask_quantity(self) -> int:
+        """
+        :return:                    visible quantity at the best ask (zero if there are no sell orders)
+        """
+
+        level = self.__best_levels[SELL]
+        return level.quantity if level is not None else 0
+
+    @property
+    def spread(self) -> Optional[int]:
+        """
+        :return:                    difference between the best ask and the best bid (None if a side is empty)
+        """
+
+        bid_level, ask_level = self.__best_levels
+        if bid_level is None or ask_level is None:
+            return None
+        return ask_level.price - bid_level.price
+
+    @property
+    def mid(self) -> Optional[float]:
+        """
+        :return:                    average of the best bid and the best ask (None if a side is empty)
+        """
+
+        bid_level, ask_level = self.__best_levels
+        if bid_level is None or ask_level is None:
+            return None
+        return (bid_level.price + ask_level.price) / 2
+
+    def quantity_at(self, price: int) -> int:
+        """
+        :param price:               price level
+        :return:                    visible quantity of orders at the price (zero if there are none)
+
+        As the order book is never crossed, a price level belongs to at most one side.
+        """
+
+        level = self.__buy_levels.get(price) or self.__sell_levels.get(price)
+        return level.quantity if level is not None else 0
+
+    @property
+    def last_transactions(self) -> list[str]:
+        """
+        :return:                    list of JSON strings of transactions
+
+        Returns the transactions performed by the latest added order
+        which have not been drained yet, rendered as JSON strings.
+        """
+
+        return [transaction.return_json() for transaction in self.__transactions[self.__last_transactions_start:]]
+
+    def drain_transactions(self) -> list[Transaction]:
+        """
+        :return:                    list of stored transactions
+
+        Returns all stored transactions performed since the previous call
+        and clears the buffer.
+        """
+
+        transactions = self.__transactions
+        self.__transactions = []
+        self.__last_transactions_start = 0
+        return transactions
+
     def add(self, order: Order):
         """
         :param order:               order being added to the order book
 
         Adds an order to the order book.
-        Executes all possible transactions if possible
-        and then returns the order book state.
+        Executes all possible transactions first; only the unfilled remainder
+        (or the current slice of an iceberg order) rests in the order book.
+        Raises a ValueError if an order of the same id is already in the order book.
         """
 
+        self.__last_transactions_start = len(self.__transactions)
+        self.__add(order)
+
+    def add_many(self, orders: Iterable[Order]) -> list[Transaction]:
+        """
+        :param orders:              orders being added to the order book
+        :return:                    list of transactions performed by the orders
+
+        Adds a sequence of orders to the order book in a single call,
+        with the same result as adding them one by one.
+        Transactions are returned even if the order book does not store them;
+        if it does, they also stay in the buffer until drained.
+        Raises a ValueError for an order whose id is already in the order book;
+        the orders preceding it remain added and their transactions are attached to the error
+        (as its 'transactions' attribute).
+        """
+
+        store_transactions = self.__store_transactions
+        self.__store_transactions = True
+        self.__last_transactions_start = start = len(self.__transactions)
+
+        # the matching loop of '__add', with attribute lookups hoisted out of the loop
+        resting_orders = self.__orders
+        best_levels = self.__best_levels
+        make_transaction = self.__make_transaction
+        sweep_level = self.__sweep_level
+        replenish = self.__replenish
+        insert = self.__insert
+        try:
+            for order in orders:
+                if order.id in resting_orders:
+                    raise ValueError("different orders share the same id")
+
+                self.__timestamp += 1
+                order.timestamp = self.__timestamp
+
+                opposite_side = order.side ^ 1
+                buy = order.side == BUY
+                price = order.price
+                while order.quantity > 0:
+                    level = best_levels[opposite_side]
+                    if level is None or (level.price > price if buy else level.price < price):
+                        break
+
+                    if order.quantity >= level.quantity + level.hidden_quantity:
+                        sweep_level(order, level)
+                    else:
+                        make_transaction(order, level)
+                    if order.quantity == 0:
+                        replenish(order)
+
+                if order.quantity > 0:
+                    insert(order)
+        except ValueError as error:
+            error.transactions = self.__transactions[start:]
+            raise
+        finally:
+            self.__store_transactions = store_transactions
+            transactions = self.__transactions[start:]
+            if not store_transactions:
+                self.__transactions.clear()
+                self.__last_transactions_start = 0
+
+        return transactions
+
+    def __add(self, order: Order):
+        """
+        :param order:               order being added to the order book
+
+        Matches an order against the opposite side of the order book
+        and inserts its unfilled remainder.
+        """
+
+        if order.id in self.__orders:
+            raise ValueError("different orders share the same id")
+
         order.timestamp = self.__get_timestamp()
-        self.__get_orders_list(order).add(order)
-        self.last_transactions.clear()
 
         while order.quantity > 0:
-            matched_order = self.__match_order(order)
-            if matched_order:
-                self.__make_transaction(order, matched_order)
-                self.__refresh_order(order)
+            level = self.__match_order(order)
+            if level:
+                if order.quantity >= level.quantity + level.hidden_quantity:
+                    self.__sweep_level(order, level)
+                else:
+                    self.__make_transaction(order, level)
+                if order.quantity == 0:
+                    self.__replenish(order)
             else:
                 break
 
-    def cancel(self, order: Order):
+        if order.quantity > 0:
+            self.__insert(order)
+
+    def cancel(self, order: Union[int, Order]) -> Order:
         """
-        :param order:               order being removed
+        :param order:               id of the order being removed (or the order itself)
+        :return:                    cancelled order
 
         Cancels a specific order, i.e. removes it from the order book.
         Raises a ValueError if there is no order of given id.
         """
 
-        self.__get_orders_list(order).remove(order)
+        resting_order = self.__find(order)
+        self.__remove(resting_order)
+        return resting_order
+
+    def modify(self, order: Union[int, Order], new_quantity: int) -> Order:
+        """
+        :param order:               id of the order being modified (or the order itself)
+        :param new_quantity:        new total (visible and hidden) quantity of the order
+        :return:                    modified order
+
+        Changes the remaining quantity of a resting order.
+        Reducing the quantity keeps the time priority of the order,
+        increasing it moves the order to the end of its price level queue.
+        Raises a ValueError if there is no order of given id or if the new quantity is not positive.
+        """
+
+        if new_quantity <= 0:
+            raise ValueError("quantity of the order cannot be zero")
+
+        resting_order = self.__find(order)
+        level = self.__get_levels(resting_order)[resting_order.price]
+        visible_quantity = resting_order.quantity
+        hidden_quantity = resting_order.hidden_quantity
+        total_quantity = visible_quantity + hidden_quantity
+        if new_quantity < total_quantity:
+            resting_order.quantity = min(resting_order.quantity, new_quantity)
+            resting_order.hidden_quantity = new_quantity - resting_order.quantity
+        elif new_quantity > total_quantity:
+            if resting_order.peak > 0:
+                resting_order.hidden_quantity += new_quantity - total_quantity
+            else:
+                resting_order.quantity = new_quantity
+            resting_order.timestamp = self.__get_timestamp()
+            level.requeue(resting_order)
+
+        level.hidden_quantity += resting_order.hidden_quantity - hidden_quantity
+        if resting_order.quantity != visible_quantity:
+            level.quantity += resting_order.quantity - visible_quantity
+            self.__changed_prices[resting_order.side].add(level.price)
+
+        return resting_order
 
     def get_state(self) -> str:
         """
@@ -73,41 +365,552 @@ class OrderBook:
         Returns the current order book status.
         """
 
-        return json.dumps({'buyOrders': self.__serialize(self.__buy_orders),
-                           'sellOrders': self.__serialize(self.__sell_orders)})
+        return json.dumps({'buyOrders': self.__serialize(self.__buy_levels),
+                           'sellOrders': self.__serialize(self.__sell_levels)})
 
-    def __match_order(self, new_order: Order):
+    def get_depth(self, levels: int = None) -> str:
+        """
+        :param levels:              maximum number of price levels per side (all levels by default)
+        :return:                    string of aggregated order book depth
+
+        Returns the visible quantity aggregated by price level, best prices first,
+        together with the sequence number of the latest depth update.
+        """
+
+        return json.dumps({'sequence': self.__depth_sequence,
+                           'buyLevels': self.__aggregate(islice(self.__buy_levels.values(), levels)),
+                           'sellLevels': self.__aggregate(islice(self.__sell_levels.values(), levels))})
+
+    def get_depth_update(self) -> str:
+        """
+        :return:                    string of changed price levels
+
+        Returns the price levels changed since the previous depth update,
+        with their current visible quantities (zero for removed levels),
+        and increases the sequence number of depth updates.
+        """
+
+        self.__depth_sequence += 1
+        buy_changes, sell_changes = self.__changed_prices
+        update = json.dumps({'sequence': self.__depth_sequence,
+                             'buyLevels': self.__aggregate_changes(self.__buy_levels, buy_changes),
+                             'sellLevels': self.__aggregate_changes(self.__sell_levels, sell_changes)})
+        buy_changes.clear()
+        sell_changes.clear()
+        return update
+
+    def save_snapshot(self, output_file: str, position: int = 0):
+        """
+        :param output_file:         snapshot file name
+        :param position:            number of orders of the log already applied to the order book
+
+        Saves the full state of the order book to a compact binary file: resting orders
+        of both sides (with their hidden quantities, peaks and timestamps) in the order of their priority,
+        the timestamp counter and the depth sequence number.
+        The position allows to replay only the tail of the order log after restoring the snapshot.
+        """
+
+        from modules.snapshot import SnapshotHeader, write_snapshot
+
+        orders = (order for levels in self.__sides for level in levels.values() for order in level)
+        write_snapshot(output_file, SnapshotHeader(self.__timestamp, self.__depth_sequence, position,
+                                                   len(self.__orders)), orders)
+
+    def attach_journal(self, journal: 'Journal'):
+        """
+        :param journal:             journal of accepted orders and resulting fills
+
+        Records every accepted order (before it is matched), cancel and modification
+        of this order book instance, followed by resulting fills, into a journal.
+        Each of them is completed as a single command of the journal.
+        As with metrics, order books without a journal keep running the original methods.
+        """
+
+        add = self.add
+        add_many = self.add_many
+        cancel = self.cancel
+        modify = self.modify
+        make_transaction = self.__make_transaction
+        sweep_level = self.__sweep_level
+        resting_orders = self.__orders
+
+        def journaled_add(order: Order):
+            if order.id not in resting_orders:
+                journal.append_order(order)
+            try:
+                add(order)
+            finally:
+                journal.complete()
+
+        def journaled_add_many(orders: Iterable[Order]) -> list[Transaction]:
+            def journaled_orders() -> Iterable[Order]:
+                for order in orders:
+                    journal.complete()
+                    if order.id not in resting_orders:
+                        journal.append_order(order)
+                    yield order
+
+            try:
+                return add_many(journaled_orders())
+            finally:
+                journal.complete()
+
+        def journaled_cancel(order: Union[int, Order]) -> Order:
+            cancelled_order = cancel(order)
+            journal.append_cancel(cancelled_order.id)
+            journal.complete()
+            return cancelled_order
+
+        def journaled_modify(order: Union[int, Order], new_quantity: int) -> Order:
+            modified_order = modify(order, new_quantity)
+            journal.append_modify(modified_order.id, new_quantity)
+            journal.complete()
+            return modified_order
+
+        def journaled_make_transaction(order: Order, level: PriceLevel):
+            matched_order = level.first()
+            quantity = order.quantity
+            make_transaction(order, level)
+            if order.side == BUY:
+                journal.append_fill(order.id, matched_order.id, level.price, quantity - order.quantity)
+            else:
+                journal.append_fill(matched_order.id, order.id, level.price, quantity - order.quantity)
+
+        def journaled_sweep_level(order: Order, level: PriceLevel) -> list[Transaction]:
+            transactions = sweep_level(order, level)
+            for transaction in transactions:
+                journal.append_fill(transaction.buy_order_id, transaction.sell_order_id, transaction.price,
+                                    transaction.quantity)
+            return transactions
+
+        self.add = journaled_add
+        self.add_many = journaled_add_many
+        self.cancel = journaled_cancel
+        self.modify = journaled_modify
+        self.__make_transaction = journaled_make_transaction
+        self.__sweep_level = journaled_sweep_level
+
+    @classmethod
+    def recover(cls, input_file: str, verify: bool = True, journal: 'Journal' = None, snapshot_file: str = None,
+                **parameters) -> 'OrderBook':
+        """
+        :param input_file:          journal file name
+        :param verify:              the flag for checking replayed fills against the journal
+        :param journal:             journal attached to the recovered order book (optional)
+        :param snapshot_file:       snapshot restored by the journaled session (needed only if there was one)
+        :param parameters:          parameters of the recovered order book (see '__init__')
+        :return:                    recovered order book
+
+        Rebuilds an order book by replaying commands recorded in a journal.
+        If 'verify' is true, journaled fills of every command have to agree with the replayed ones
+        (a command may lack its last fills only after an interrupted write).
+        If the journaled order book was restored from a snapshot, the same snapshot is restored
+        before replaying the following commands.
+        Raises a ValueError if the fills do not agree or the snapshot is missing or differs from the journaled one.
+        """
+
+        from modules.journal import read_journal, ORDER_ENTRY, FILL_ENTRY, CANCEL_ENTRY, MODIFY_ENTRY, \
+            SNAPSHOT_ENTRY
+        from modules.snapshot import read_snapshot
+
+        order_book = cls(**parameters)
+        journaled_fills = []
+        replayed_fills = []
+        for entry_type, side, kind, first, second, third, fourth in read_journal(input_file):
+            if entry_type == FILL_ENTRY:
+                if verify:
+                    journaled_fills.append((first, second, third, fourth))
+                continue
+
+            if verify and journaled_fills != replayed_fills[:len(journaled_fills)]:
+                raise ValueError("fills replayed from journal '{0}' differ from the journaled ones".format(
+                    input_file))
+            journaled_fills.clear()
+            replayed_fills.clear()
+
+            if entry_type == ORDER_ENTRY:
+                order = Order.from_codes(first, side, kind, second, third, fourth)
+                transactions = order_book.add_many((order,))
+                if verify:
+                    replayed_fills.extend((transaction.buy_order_id, transaction.sell_order_id,
+                                           transaction.price, transaction.quantity)
+                                          for transaction in transactions)
+            elif entry_type == CANCEL_ENTRY:
+                order_book.cancel(first)
+            elif entry_type == MODIFY_ENTRY:
+                order_book.modify(first, second)
+            elif entry_type == SNAPSHOT_ENTRY:
+                if snapshot_file is None:
+                    raise ValueError("journal '{0}' continues from a snapshot, which has to be given".format(
+                        input_file))
+                header, _ = read_snapshot(snapshot_file)
+                if (header.timestamp, header.depth_sequence, header.position, header.number_of_orders) != \
+                        (first, second, third, fourth):
+                    raise ValueError("snapshot '{0}' is not the one journal '{1}' continues from".format(
+                        snapshot_file, input_file))
+                order_book, _ = cls.load_snapshot(snapshot_file, **parameters)
+            else:
+                raise ValueError("unknown entry in journal '{0}'".format(input_file))
+
+        if verify and journaled_fills != replayed_fills[:len(journaled_fills)]:
+            raise ValueError("fills replayed from journal '{0}' differ from the journaled ones".format(input_file))
+
+        if journal is not None:
+            order_book.attach_journal(journal)
+        return order_book
+
+    @classmethod
+    def load_snapshot(cls, input_file: str, **parameters) -> tuple['OrderBook', int]:
+        """
+        :param input_file:          snapshot file name
+        :param parameters:          parameters of the restored order book (see '__init__')
+        :return:                    restored order book and the position of the order log of the snapshot
+
+        Restores an order book from a snapshot in time proportional to the number of resting orders.
+        Depth updates of the restored order book contain only changes made after the restore.
+        Limits (if given) apply to orders added after the restore.
+        A journal (if given) records the restore, so the journal can be recovered together with the snapshot.
+        """
+
+        from modules.snapshot import read_snapshot
+
+        header, orders = read_snapshot(input_file)
+        journal = parameters.pop('journal', None)
+        order_book = cls(**parameters)
+        for order in orders:
+            if order.id in order_book.__orders:
+                raise ValueError("different orders share the same id")
+            # the method of the class, so the restored state is taken as it is, even if limits are given
+            cls.__insert(order_book, order)
+
+        order_book.__timestamp = header.timestamp
+        order_book.__depth_sequence = header.depth_sequence
+        for changed_prices in order_book.__changed_prices:
+            changed_prices.clear()
+
+        if journal is not None:
+            journal.append_snapshot(header.timestamp, header.depth_sequence, header.position,
+                                    header.number_of_orders)
+            journal.complete()
+            order_book.attach_journal(journal)
+        return order_book, header.position
+
+    def __limit(self, limits: 'BookLimits'):
+        """
+        :param limits:              limits of the number and prices of resting orders
+
+        Replaces methods of this order book instance with wrappers enforcing the limits.
+        The remainder of a new order is checked before it rests; if a price band is given,
+        price levels which left the band are evicted after each order.
+        Order books created without limits keep running the original methods.
+        """
+
+        from modules.limits import EVICT, MAX_ORDERS, PRICE_BAND
+
+        add = self.add
+        add_many = self.add_many
+        insert = self.__insert
+        remove = self.__remove
+        sides = self.__sides
+        best_levels = self.__best_levels
+        side_sizes = self.__side_sizes
+        max_orders = limits.max_orders
+        price_band = limits.price_band
+        evict = limits.policy == EVICT
+
+        def get_reference() -> Optional[int]:
+            # twice the mid price (or twice the best price of the only side), so that prices stay integers
+            bid_level, ask_level = best_levels
+            if bid_level is not None and ask_level is not None:
+                return bid_level.price + ask_level.price
+            if bid_level is not None or ask_level is not None:
+                return 2 * (bid_level if bid_level is not None else ask_level).price
+            return None
+
+        # remainders are checked against the band when they rest, so levels can leave the band
+        # only when the reference price moves
+        pruned_reference = None
+
+        def prune():
+            nonlocal pruned_reference
+            reference = get_reference()
+            if reference == pruned_reference or reference is None:
+                return
+            pruned_reference = reference
+            for levels in sides:
+                # the worst level is the last one; the best level always stays
+                while len(levels) > 1:
+                    level = levels.peekitem(-1)[1]
+                    if abs(2 * level.price - reference) <= 2 * price_band:
+                        break
+                    for evicted_order in list(level):
+                        remove(evicted_order)
+                        limits.evict(evicted_order, PRICE_BAND)
+
+        def limited_insert(order: Order):
+            side = order.side
+            buy = side == BUY
+            levels = sides[side]
+            if price_band is not None and levels:
+                best_price = best_levels[side].price
+                if (order.price < best_price if buy else order.price > best_price) \
+                        and abs(2 * order.price - get_reference()) > 2 * price_band:
+                    limits.reject(order, PRICE_BAND)
+                    return
+
+            if max_orders is not None and side_sizes[side] >= max_orders:
+                worst_level = levels.peekitem(-1)[1] if levels else None
+                if evict and worst_level is not None and \
+                        (order.price > worst_level.price if buy else order.price < worst_level.price):
+                    # the order of the lowest priority: the last one at the worst price
+                    evicted_order = next(reversed(worst_level.orders.values()))
+                    remove(evicted_order)
+                    limits.evict(evicted_order, MAX_ORDERS)
+                else:
+                    limits.reject(order, MAX_ORDERS)
+                    return
+
+            insert(order)
+
+        def limited_add(order: Order):
+            add(order)
+            prune()
+
+        def limited_add_many(orders: Iterable[Order]) -> list[Transaction]:
+            def pruned_orders() -> Iterable[Order]:
+                for order in orders:
+                    yield order
+                    # the previous order has been matched when the next one is requested
+                    prune()
+
+            return add_many(pruned_orders())
+
+        self.__insert = limited_insert
+        if price_band is not None:
+            self.add = limited_add
+            self.add_many = limited_add_many
+
+    def __instrument(self, metrics: 'Metrics'):
+        """
+        :param metrics:             collection of metrics
+
+        Replaces methods of this order book instance with instrumented wrappers.
+        Order books created without metrics keep running the original methods,
+        so the instrumentation costs nothing when it is disabled.
+        """
+
+        add = self.add
+        add_many = self.add_many
+        cancel = self.cancel
+        make_transaction = self.__make_transaction
+        sweep_level = self.__sweep_level
+        replenish = self.__replenish
+
+        # fills and price levels swept by the current aggressive order
+        aggressor = None
+        last_level = None
+        fills = 0
+        levels_swept = 0
+
+        def flush():
+            nonlocal aggressor, last_level, fills, levels_swept
+            if aggressor is not None:
+                metrics.observe('fills_per_order', fills)
+                metrics.observe('levels_swept_per_order', levels_swept)
+            aggressor = last_level = None
+            fills = levels_swept = 0
+
+        def observe_book():
+            metrics.observe('resting_orders', len(self.__orders))
+            metrics.observe('price_levels', len(self.__buy_levels) + len(self.__sell_levels))
+
+        def instrumented_add(order: Order):
+            nonlocal aggressor
+            flush()
+            aggressor = order
+            start_time = perf_counter_ns()
+            try:
+                add(order)
+            finally:
+                elapsed_time = perf_counter_ns() - start_time
+                flush()
+
+            metrics.increment('orders_total')
+            metrics.increment('matching_time_ns_total', elapsed_time)
+            metrics.observe('add_latency_ns', elapsed_time)
+            observe_book()
+
+        def instrumented_add_many(orders: Iterable[Order]) -> list[Transaction]:
+            flush()
+            counter = count()
+            orders_with_fills = metrics.histograms['fills_per_order'].count \
+                if 'fills_per_order' in metrics.histograms else 0
+            start_time = perf_counter_ns()
+            try:
+                transactions = add_many(order for order, _ in zip(orders, counter))
+            finally:
+                elapsed_time = perf_counter_ns() - start_time
+                flush()
+
+            number_of_orders = next(counter)
+            if number_of_orders:
+                orders_with_fills = metrics.histograms['fills_per_order'].count - orders_with_fills \
+                    if 'fills_per_order' in metrics.histograms else 0
+                metrics.observe('fills_per_order', 0, number_of_orders - orders_with_fills)
+                metrics.observe('levels_swept_per_order', 0, number_of_orders - orders_with_fills)
+
+            metrics.increment('orders_total', number_of_orders)
+            metrics.increment('matching_time_ns_total', elapsed_time)
+            observe_book()
+            return transactions
+
+        def instrumented_cancel(order: Union[int, Order]) -> Order:
+            cancelled_order = cancel(order)
+            metrics.increment('cancels_total')
+            return cancelled_order
+
+        def instrumented_make_transaction(order: Order, level: PriceLevel):
+            nonlocal aggressor, last_level, fills, levels_swept
+            if order is not aggressor:
+                flush()
+                aggressor = order
+            if level is not last_level:
+                last_level = level
+                levels_swept += 1
+            fills += 1
+            metrics.increment('fills_total')
+            make_transaction(order, level)
+
+        def instrumented_sweep_level(order: Order, level: PriceLevel) -> list[Transaction]:
+            nonlocal aggressor, last_level, fills, levels_swept
+            if order is not aggressor:
+                flush()
+                aggressor = order
+            if level is not last_level:
+                last_level = level
+                levels_swept += 1
+            transactions = sweep_level(order, level)
+            fills += len(transactions)
+            metrics.increment('fills_total', len(transactions))
+            return transactions
+
+        def instrumented_replenish(order: Order) -> bool:
+            replenished = replenish(order)
+            if replenished:
+                metrics.increment('iceberg_refreshes_total')
+            return replenished
+
+        def instrument_serialization(method: Callable[..., str]) -> Callable[..., str]:
+            def instrumented_method(*args, **kwargs) -> str:
+                start_time = perf_counter_ns()
+                output = method(*args, **kwargs)
+                elapsed_time = perf_counter_ns() - start_time
+                metrics.increment('serialization_time_ns_total', elapsed_time)
+                metrics.observe('serialization_latency_ns', elapsed_time)
+                return output
+            return instrumented_method
+
+        self.add = instrumented_add
+        self.add_many = instrumented_add_many
+        self.cancel = instrumented_cancel
+        self.__make_transaction = instrumented_make_transaction
+        self.__sweep_level = instrumented_sweep_level
+        self.__replenish = instrumented_replenish
+        self.get_state = instrument_serialization(self.get_state)
+        self.get_depth = instrument_serialization(self.get_depth)
+        self.get_depth_update = instrument_serialization(self.get_depth_update)
+
+    def __match_order(self, new_order: Order) -> Optional[PriceLevel]:
         """
         :param new_order:           order to match
-        :return:                    the best order if present None otherwise
+        :return:                    the best price level if present None otherwise
 
         Matches best offers for a given order.
-        If there is no such order, returns None object.
+        If there is no price level crossing the order's price, returns None object.
         """
 
-        orders = self.__get_orders_list(new_order, swap_lists=True)
+        level = self.__best_levels[new_order.side ^ 1]
 
-        if orders:
-            order = orders[0]
-            if order < new_order:
-                return order
+        if level is not None:
+            if new_order.side == BUY:
+                crosses = level.price <= new_order.price
+            else:
+                crosses = level.price >= new_order.price
+
+            if crosses:
+                return level
 
         return None
 
-    def __get_orders_list(self, order: Order, swap_lists: bool = False) -> SortedList[Order]:
+    def __find(self, order: Union[int, Order]) -> Order:
+        """
+        :param order:               order id or an order object
+        :return:                    resting order of the given id
+
+        Finds a resting order by its id.
+        Raises a ValueError if there is no such order or if a given order differs from the resting one.
+        """
+
+        order_id = order.id if isinstance(order, Order) else order
+        resting_order = self.__orders.get(order_id)
+        if resting_order is None:
+            raise ValueError("order not present in the order book")
+        if isinstance(order, Order) and resting_order is not order and resting_order != order:
+            raise ValueError("order not present in the order book")
+
+        return resting_order
+
+    def __get_levels(self, order: Order, swap_lists: bool = False) -> SortedDict[int, PriceLevel]:
         """
         :param order:               given order
-        :param swap_lists:          returns the opposite list if true
-        :return:                    order book list of orders
+        :param swap_lists:          returns the opposite side if true
+        :return:                    price levels of one side of the order book
 
-        Returns the order book lists of orders of the same direction.
-        If 'swap_lists' is true, the list of orders of opposed direction is returned.
+        Returns the price levels of orders of the same direction, best price first.
+        If 'swap_lists' is true, the price levels of opposed direction are returned.
         """
 
-        if order.direction == "Buy":
-            return self.__sell_orders if swap_lists else self.__buy_orders
-        elif order.direction == "Sell":
-            return self.__buy_orders if swap_lists else self.__sell_orders
+        return self.__sides[order.side ^ 1 if swap_lists else order.side]
+
+    def __insert(self, order: Order):
+        """
+        :param order:               order to insert
+
+        Puts an order at the end of the queue of its price level,
+        creating the level if necessary.
+        """
+
+        levels = self.__get_levels(order)
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = PriceLevel(order.price)
+            best_level = self.__best_levels[order.side]
+            if best_level is None or (order.price > best_level.price if order.side == BUY
+                                      else order.price < best_level.price):
+                self.__best_levels[order.side] = level
+        level.append(order)
+        self.__orders[order.id] = order
+        self.__side_sizes[order.side] += 1
+        self.__changed_prices[order.side].add(order.price)
+
+    def __remove(self, order: Order):
+        """
+        :param order:               resting order to remove
+
+        Removes an order from its price level and from the id index,
+        dropping the level if it becomes empty.
+        """
+
+        levels = self.__get_levels(order)
+        level = levels[order.price]
+        level.remove(order)
+        if not level:
+            del levels[order.price]
+            if level is self.__best_levels[order.side]:
+                self.__best_levels[order.side] = levels.peekitem(0)[1] if levels else None
+        del self.__orders[order.id]
+        self.__side_sizes[order.side] -= 1
+        self.__changed_prices[order.side].add(order.price)
 
     def __get_timestamp(self):
         """
@@ -119,59 +922,165 @@ class OrderBook:
         self.__timestamp += 1
         return self.__timestamp
 
-    def __make_transaction(self, order: Order, matched_order: Order):
+    def __make_transaction(self, order: Order, level: PriceLevel):
         """
         :param order:               entered order
-        :param matched_order:       order matched by engine
+        :param level:               price level matched by engine
 
-        Performs a single transaction.
+        Performs a single transaction with the first order of the price level.
         Raises ValueError if the transactions are of the same direction.
         """
 
-        if order.direction == matched_order.direction:
+        matched_order = level.first()
+        if order.side == matched_order.side:
             raise ValueError("can't perform a transaction of orders of the same direction")
 
         quantity = min(order.quantity, matched_order.quantity)
 
         order.quantity -= quantity
         matched_order.quantity -= quantity
+        level.quantity -= quantity
+        self.__changed_prices[matched_order.side].add(level.price)
 
         if matched_order.quantity == 0:
-            self.__refresh_order(matched_order)
+            self.__refresh_order(matched_order, level)
 
-        if self.__store_transactions:
-            if order.direction == "Buy":
-                output_dict = {'buyOrderId': order.id, 'sellOrderId': matched_order.id}
+        if self.__store_transactions or self.__transaction_sink is not None:
+            if order.side == BUY:
+                transaction = Transaction(order.id, matched_order.id, matched_order.price, quantity)
             else:
-                output_dict = {'buyOrderId': matched_order.id, 'sellOrderId': order.id}
-            price_and_quantity_dict = {'price': matched_order.price, 'quantity': quantity}
-            self.last_transactions.append(json.dumps({**output_dict, **price_and_quantity_dict}))
+                transaction = Transaction(matched_order.id, order.id, matched_order.price, quantity)
+
+            if self.__store_transactions:
+                self.__transactions.append(transaction)
+            if self.__transaction_sink is not None:
+                self.__transaction_sink(transaction)
+
+    def __sweep_level(self, order: Order, level: PriceLevel) -> list[Transaction]:
+        """
+        :param order:               entered order, at least as large as the whole price level
+        :param level:               price level matched by engine
+        :return:                    list of performed transactions
+
+        Fills all orders of the price level, including hidden quantities of iceberg orders, and drops the level.
+        Transactions are the same (and in the same order) as if the level were filled one transaction at a time:
+        orders are filled in the queue order, while each iceberg order reveals its next slice
+        and goes back to the end of the queue until it is exhausted.
+        """
 
-    def __refresh_order(self, order: Order):
+        price = level.price
+        buy = order.side == BUY
+        resting_orders = self.__orders
+        replenish = self.__replenish
+        transactions = []
+
+        queue = list(level)
+        while queue:
+            replenished_orders = []
+            for matched_order in queue:
+                quantity = matched_order.quantity
+                matched_order.quantity = 0
+                if replenish(matched_order):
+                    replenished_orders.append(matched_order)
+                else:
+                    del resting_orders[matched_order.id]
+
+                if buy:
+                    transactions.append(Transaction(order.id, matched_order.id, price, quantity))
+                else:
+                    transactions.append(Transaction(matched_order.id, order.id, price, quantity))
+            queue = replenished_orders
+
+        side = order.side ^ 1
+        order.quantity -= level.quantity + level.hidden_quantity
+        self.__side_sizes[side] -= len(level)
+        level.orders.clear()
+        level.quantity = level.hidden_quantity = 0
+
+        levels = self.__sides[side]
+        del levels[price]
+        self.__best_levels[side] = levels.peekitem(0)[1] if levels else None
+        self.__changed_prices[side].add(price)
+
+        if self.__store_transactions:
+            self.__transactions.extend(transactions)
+        if self.__transaction_sink is not None:
+            for transaction in transactions:
+                self.__transaction_sink(transaction)
+
+        return transactions
+
+    def __refresh_order(self, order: Order, level: PriceLevel):
         """
         :param order:               order to refresh
+        :param level:               price level of the order
 
-        Refreshes the order if its visible quantity is exhausted.
-        If the real quantity is exhausted, removes from the list.
+        Refreshes the order if its visible quantity is exhausted:
+        the next slice of an iceberg order goes to the end of its price level queue.
+        If the real quantity is exhausted, removes the order from the book.
         """
 
         if order.quantity == 0:
-            orders_list = self.__get_orders_list(order)
-            orders_list.remove(order)
-            if order.hidden_quantity > 0:
-                order.timestamp = self.__get_timestamp()
-                difference = min(order.peak, order.hidden_quantity)
-                order.quantity += difference
-                order.hidden_quantity -= difference
-                orders_list.add(order)
+            if self.__replenish(order):
+                level.quantity += order.quantity
+                level.hidden_quantity -= order.quantity
+                level.requeue(order)
+            else:
+                self.__remove(order)
+
+    def __replenish(self, order: Order) -> bool:
+        """
+        :param order:               order with exhausted visible quantity
+        :return:                    true if a new slice has been revealed
+
+        Reveals the next slice of an iceberg order and gives it a new timestamp.
+        Returns false if there is no hidden quantity left.
+        """
+
+        if order.hidden_quantity > 0:
+            order.timestamp = self.__get_timestamp()
+            difference = min(order.peak, order.hidden_quantity)
+            order.quantity += difference
+            order.hidden_quantity -= difference
+            return True
+
+        return False
 
     @staticmethod
-    def __serialize(order_list: SortedList[Order]) -> list[dict]:
+    def __serialize(levels: SortedDict[int, PriceLevel]) -> list[dict]:
         """
-        :param order_list:          sorted list of orders
+        :param levels:              price levels of one side of the order book
         :return:                    list of orders as dictionary objects
 
         Returns the list of (simplified) orders' information, as dictionary objects.
         """
 
-        return [order.__dict__() for order in order_list]
+        return [order.__dict__() for level in levels.values() for order in level]
+
+    @staticmethod
+    def __aggregate(levels: Iterable[PriceLevel]) -> list[dict]:
+        """
+        :param levels:              price levels
+        :return:                    list of price levels as dictionary objects
+
+        Returns the prices and visible quantities of given price levels, as dictionary objects.
+        """
+
+        return [{'price': level.price, 'quantity': level.quantity} for level in levels]
+
+    @staticmethod
+    def __aggregate_changes(levels: SortedDict[int, PriceLevel], prices: set[int]) -> list[dict]:
+        """
+        :param levels:              price levels of one side of the order book
+        :param prices:              prices of changed levels
+        :return:                    list of changed price levels as dictionary objects
+
+        Returns the prices and current visible quantities of changed price levels, best prices first.
+        Price levels which are no longer present have zero quantity.
+        """
+
+        changes = []
+        for price in sorted(prices, key=levels.key):
+            level = levels.get(price)
+            changes.append({'price': price, 'quantity': level.quantity if level is not None else 0})
+        return changes
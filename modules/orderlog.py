@@ -0,0 +1,158 @@
+from modules.order import Order
+from typing import Iterable, Iterator, Optional
+import mmap
+import struct
+
+
+# header: magic bytes, format version, flags
+header_format = struct.Struct('<8sHHI')
+order_log_magic = b'ICEBERG\x00'
+order_log_version = 1
+timestamps_flag = 1
+
+# record: id, price, quantity (visible and hidden), peak, side, kind, padding and optional timestamp
+record_format = struct.Struct('<qqqqBB6x')
+timestamped_record_format = struct.Struct('<qqqqBB6xq')
+
+
+class OrderLogWriter:
+    __file = None
+    __record_format: struct.Struct
+    timestamps: bool
+
+    def __init__(self, output_file: str, timestamps: bool = False):
+        """
+        :param output_file:         output file name
+        :param timestamps:          the flag for storing a timestamp with every order
+
+        Creates a binary order log file and writes its header.
+        Each order is stored as a fixed-width record.
+        """
+
+        self.timestamps = timestamps
+        self.__record_format = timestamped_record_format if timestamps else record_format
+        self.__file = open(output_file, 'wb')
+        self.__file.write(header_format.pack(order_log_magic, order_log_version,
+                                             timestamps_flag if timestamps else 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, order: Order, timestamp: int = 0):
+        """
+        :param order:               order to write (before it is added to an order book)
+        :param timestamp:           timestamp of the order, stored only if the log has timestamps
+
+        Appends a single order to the log.
+        """
+
+        self.__file.write(self.__pack(order, timestamp))
+
+    def write_many(self, orders: Iterable[Order]):
+        """
+        :param orders:              orders to write
+
+        Appends a sequence of orders to the log, with zero timestamps.
+        """
+
+        self.__file.writelines(self.__pack(order, 0) for order in orders)
+
+    def write_bytes(self, records: bytes):
+        """
+        :param records:             already packed records
+
+        Appends raw records (eg. a NumPy array of the same layout) to the log.
+        """
+
+        self.__file.write(records)
+
+    def close(self):
+        """
+        Flushes and closes the log file.
+        """
+
+        self.__file.close()
+
+    def __pack(self, order: Order, timestamp: int) -> bytes:
+        """
+        :param order:               order to pack
+        :param timestamp:           timestamp of the order
+        :return:                    binary record
+        """
+
+        fields = (order.id, order.price, order.quantity + order.hidden_quantity, order.peak, order.side, order.kind)
+        if self.timestamps:
+            return self.__record_format.pack(*fields, timestamp)
+        return self.__record_format.pack(*fields)
+
+
+def is_order_log(input_file: str) -> bool:
+    """
+    :param input_file:              file name
+    :return:                        true if the file starts with the order log header
+    """
+
+    with open(input_file, 'rb') as file:
+        return file.read(len(order_log_magic)) == order_log_magic
+
+
+def read_records(input_file: str, start: int = 0) -> Iterator[tuple]:
+    """
+    :param input_file:              binary order log file
+    :param start:                   index of the first record to read
+    :return:                        iterator over raw records
+
+    Memory-maps an order log and iterates over its records, i.e. tuples of the form
+    (id, price, quantity, peak, side, kind) or (id, price, quantity, peak, side, kind, timestamp).
+    Preceding records are skipped without reading them.
+    Raises a ValueError if the file is not a valid order log.
+    """
+
+    with open(input_file, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            magic, version, flags, _ = header_format.unpack_from(mapped_file)
+            if magic != order_log_magic or version != order_log_version:
+                raise ValueError("'{0}' is not an order log of version {1}".format(input_file, order_log_version))
+
+            records = timestamped_record_format if flags & timestamps_flag else record_format
+            data = memoryview(mapped_file)[header_format.size + start * records.size:]
+            try:
+                if (len(mapped_file) - header_format.size) % records.size:
+                    raise ValueError("order log '{0}' is truncated".format(input_file))
+                yield from records.iter_unpack(data)
+            finally:
+                data.release()
+
+
+def read_order_log(input_file: str, start: int = 0) -> Iterator[Order]:
+    """
+    :param input_file:              binary order log file
+    :param start:                   index of the first order to read
+    :return:                        iterator over order objects
+
+    Reads orders from a binary order log one by one, without any JSON parsing.
+    """
+
+    from_codes = Order.from_codes
+    for order_id, price, quantity, peak, side, kind, *_ in read_records(input_file, start):
+        yield from_codes(order_id, side, kind, price, quantity, peak)
+
+
+def convert_to_order_log(orders: Iterable[Order], output_file: str, timestamps: Optional[Iterable[int]] = None):
+    """
+    :param orders:                  orders to convert (eg. read from a JSON file)
+    :param output_file:             binary order log file
+    :param timestamps:              timestamps of the orders (optional)
+
+    Writes a sequence of orders to a binary order log.
+    """
+
+    with OrderLogWriter(output_file, timestamps=timestamps is not None) as writer:
+        if timestamps is None:
+            writer.write_many(orders)
+        else:
+            for order, timestamp in zip(orders, timestamps):
+                writer.write(order, timestamp)
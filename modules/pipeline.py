@@ -0,0 +1,195 @@
+from modules.order import Order
+from modules.orderlog import is_order_log, read_order_log, record_format
+from collections import deque
+from itertools import islice
+from typing import Iterator, Optional
+import json
+import multiprocessing
+import re
+
+
+# approximate size (in bytes) of a part of the file parsed by a single task
+pipeline_chunk_size = 1 << 20
+# maximum number of parsed chunks waiting for the matching, per worker
+pipeline_queue_size = 4
+
+# between two elements of a JSON array of orders: neither orders nor their 'order' fields contain lists,
+# so a closing brace followed by a comma and an opening brace appears only there
+_element_boundary = re.compile(rb'}\s*,\s*({)')
+_line_boundary = re.compile(rb'\n')
+_array_separator = re.compile(r'[\s,]*')
+
+
+def split_file(input_file: str, chunk_size: int = pipeline_chunk_size) -> tuple[bool, list[tuple[int, int]]]:
+    """
+    :param input_file:              JSON file containing serialized orders (an array or JSON lines)
+    :param chunk_size:              approximate size of a chunk in bytes
+    :return:                        true for a JSON array (false for JSON lines)
+                                    and the list of byte ranges (start, end) of chunks
+
+    Splits a JSON file into byte ranges of whole orders, without parsing it:
+    each boundary is moved forward to the nearest start of a line (JSON lines)
+    or of an element of the array.
+    """
+
+    with open(input_file, 'rb') as file:
+        size = file.seek(0, 2)
+        file.seek(0)
+        head = file.read(1)
+        while head.isspace():
+            head = file.read(1)
+        array = head == b'['
+        boundary = _element_boundary if array else _line_boundary
+
+        ranges = []
+        start = 0
+        while start < size:
+            end = _find_boundary(file, start + chunk_size, size, boundary)
+            ranges.append((start, end))
+            start = end
+
+    return array, ranges
+
+
+def read_orders_in_parallel(input_file: str, number_of_workers: int, start: int = 0,
+                            chunk_size: int = pipeline_chunk_size,
+                            queue_size: int = pipeline_queue_size) -> Iterator[Order]:
+    """
+    :param input_file:              JSON file containing serialized orders (an array or JSON lines)
+    :param number_of_workers:       the number of parsing processes
+    :param start:                   index of the first order to read
+    :param chunk_size:              approximate size of a chunk in bytes
+    :param queue_size:              maximum number of parsed chunks waiting, per worker
+    :return:                        iterator over order objects, in the order of the file
+
+    Reads orders from a file as 'read_orders' does, with JSON decoding and validation in worker processes.
+    The file is split into chunks of whole orders, workers turn each chunk into compact binary records
+    (as in a binary order log) and the records are turned back into orders in the order of chunks,
+    so the consumer (eg. the order book) only creates order objects.
+    At most 'queue_size' chunks per worker are parsed ahead of the consumer, which bounds the memory usage.
+    Raises the error of the first invalid order after all preceding orders have been read.
+    A binary order log needs no parsing and is read directly.
+    """
+
+    if is_order_log(input_file):
+        yield from read_order_log(input_file, start)
+        return
+
+    yield from islice(_read_chunks(input_file, number_of_workers, chunk_size, queue_size), start, None)
+
+
+def _read_chunks(input_file: str, number_of_workers: int, chunk_size: int, queue_size: int) -> Iterator[Order]:
+    """
+    :param input_file:              JSON file containing serialized orders
+    :param number_of_workers:       the number of parsing processes
+    :param chunk_size:              approximate size of a chunk in bytes
+    :param queue_size:              maximum number of parsed chunks waiting, per worker
+    :return:                        iterator over order objects, in the order of the file
+    """
+
+    from_codes = Order.from_codes
+    for records, error in _parse_file(input_file, number_of_workers, chunk_size, queue_size):
+        for order_id, price, quantity, peak, side, kind in record_format.iter_unpack(records):
+            yield from_codes(order_id, side, kind, price, quantity, peak)
+        if error is not None:
+            raise error
+
+
+def _parse_file(input_file: str, number_of_workers: int, chunk_size: int,
+                queue_size: int) -> Iterator[tuple[bytes, Optional[Exception]]]:
+    """
+    :param input_file:              JSON file containing serialized orders
+    :param number_of_workers:       the number of parsing processes
+    :param chunk_size:              approximate size of a chunk in bytes
+    :param queue_size:              maximum number of parsed chunks waiting, per worker
+    :return:                        iterator over results of '_parse_chunk', in the order of the file
+    """
+
+    array, ranges = split_file(input_file, chunk_size)
+    ranges = iter(ranges)
+    with multiprocessing.get_context().Pool(number_of_workers) as pool:
+        pending = deque()
+        for chunk_start, chunk_end in islice(ranges, number_of_workers * queue_size):
+            pending.append(pool.apply_async(_parse_chunk, (input_file, chunk_start, chunk_end, array)))
+
+        while pending:
+            records = pending.popleft().get()
+            # the next chunk is requested only when a parsed one is taken
+            for chunk_start, chunk_end in islice(ranges, 1):
+                pending.append(pool.apply_async(_parse_chunk, (input_file, chunk_start, chunk_end, array)))
+            yield records
+
+
+def _parse_chunk(input_file: str, start: int, end: int, array: bool) -> tuple[bytes, Optional[Exception]]:
+    """
+    :param input_file:              JSON file containing serialized orders
+    :param start:                   position of the first byte of the chunk
+    :param end:                     position after the last byte of the chunk
+    :param array:                   true for a JSON array, false for JSON lines
+    :return:                        orders of the chunk, packed as records of a binary order log,
+                                    and the error of the first invalid order (None if there is none)
+
+    Worker task: decodes and validates orders of a single chunk.
+    Orders following an invalid one are not parsed; the error (eg. a ValueError, as raised by 'read_orders')
+    is passed together with the preceding orders, so that the consumer receives them first.
+    """
+
+    with open(input_file, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode()
+
+    if array:
+        messages = _decode_elements(text)
+    else:
+        messages = (json.loads(line) for line in text.splitlines() if line and not line.isspace())
+
+    from_dict = Order.from_dict
+    pack = record_format.pack
+    records = []
+    try:
+        for message in messages:
+            order = from_dict(message)
+            records.append(pack(order.id, order.price, order.quantity + order.hidden_quantity, order.peak,
+                                order.side, order.kind))
+    except Exception as error:
+        return b''.join(records), error
+
+    return b''.join(records), None
+
+
+def _decode_elements(text: str) -> Iterator[dict]:
+    """
+    :param text:                    elements of a JSON array separated by commas
+                                    (the first chunk starts with '[' and the last one ends with ']')
+    :return:                        iterator over decoded elements
+    """
+
+    decoder = json.JSONDecoder()
+    text = text.lstrip()
+    position = _array_separator.match(text, 1 if text.startswith('[') else 0).end()
+    while position < len(text) and text[position] != ']':
+        element, position = decoder.raw_decode(text, position)
+        yield element
+        position = _array_separator.match(text, position).end()
+
+
+def _find_boundary(file, position: int, size: int, boundary: re.Pattern) -> int:
+    """
+    :param file:                    binary file object
+    :param position:                approximate position of the boundary
+    :param size:                    size of the file
+    :param boundary:                pattern of the boundary; its first group (if any) starts the next order
+    :return:                        position of the first order starting at 'position' or later
+                                    (the size of the file if there is none)
+    """
+
+    while position < size:
+        file.seek(position)
+        window = file.read(1 << 16)
+        match = boundary.search(window)
+        if match is not None:
+            return position + (match.start(1) if match.re.groups else match.end())
+        # the boundary pattern is short, so the next window overlaps the current one only slightly
+        position += len(window) - 64 if len(window) > 64 else len(window)
+
+    return size
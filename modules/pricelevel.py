@@ -0,0 +1,91 @@
+from modules.order import Order
+from collections import OrderedDict
+
+
+class PriceLevel:
+    price: int
+    quantity: int
+    hidden_quantity: int
+    orders: OrderedDict[int, Order]
+
+    def __init__(self, price: int):
+        """
+        :param price:               price shared by all orders of the level
+
+        Initializes an empty price level. Orders are kept in a FIFO queue
+        indexed by their ids, so both ends and any single order are reachable in O(1).
+        The level also keeps the total visible and hidden quantities of its orders.
+        """
+
+        self.price = price
+        self.quantity = 0
+        self.hidden_quantity = 0
+        self.orders = OrderedDict()
+
+    def __bool__(self):
+        """
+        :return:                    true if there is at least one order in the level
+        """
+
+        return bool(self.orders)
+
+    def __iter__(self):
+        """
+        :return:                    iterator over the orders in time priority
+        """
+
+        return iter(self.orders.values())
+
+    def __len__(self):
+        """
+        :return:                    the number of orders in the level
+        """
+
+        return len(self.orders)
+
+    def append(self, order: Order):
+        """
+        :param order:               order to put at the end of the queue
+
+        Appends an order to the end of the queue.
+        Raises a ValueError if an order of the same id is already present.
+        """
+
+        if order.id in self.orders:
+            raise ValueError("different orders share the same id")
+        self.orders[order.id] = order
+        self.quantity += order.quantity
+        self.hidden_quantity += order.hidden_quantity
+
+    def first(self) -> Order:
+        """
+        :return:                    the order with the highest time priority
+
+        Returns the first order of the queue without removing it.
+        """
+
+        return next(iter(self.orders.values()))
+
+    def remove(self, order: Order):
+        """
+        :param order:               order to remove
+
+        Removes an order from the queue.
+        Raises a ValueError if there is no such order in the level.
+        """
+
+        present = self.orders.get(order.id)
+        if present is None or (present is not order and present != order):
+            raise ValueError("order not present in the order book")
+        del self.orders[order.id]
+        self.quantity -= order.quantity
+        self.hidden_quantity -= order.hidden_quantity
+
+    def requeue(self, order: Order):
+        """
+        :param order:               order to move
+
+        Moves an order to the end of the queue, losing its time priority.
+        """
+
+        self.orders.move_to_end(order.id)
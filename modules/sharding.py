@@ -0,0 +1,207 @@
+from modules.auxiliary import read_order_messages
+from modules.order import Order
+from modules.orderbook import OrderBook
+from contextlib import nullcontext
+from typing import Iterable, Iterator, Union
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import zlib
+
+
+# number of orders sent to a worker at once
+shard_batch_size = 4096
+# maximum number of batches waiting for a single worker
+shard_queue_size = 16
+
+default_symbol = ""
+
+_symbol_pattern = re.compile(r'"symbol"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def get_shard(symbol: str, number_of_shards: int) -> int:
+    """
+    :param symbol:                  symbol of an instrument
+    :param number_of_shards:        the number of shards
+    :return:                        index of the shard of the symbol
+
+    Assigns a symbol to a shard. Unlike 'hash', the assignment is the same in every process and run.
+    """
+
+    return zlib.crc32(symbol.encode()) % number_of_shards
+
+
+def get_symbol(message: Union[str, dict]) -> str:
+    """
+    :param message:                 serialized order: a JSON line or a decoded dictionary
+    :return:                        symbol of the order (an empty string if it has none)
+
+    Finds the symbol of an order without decoding a whole JSON line.
+    """
+
+    if isinstance(message, dict):
+        return message.get('symbol', default_symbol)
+
+    match = _symbol_pattern.search(message)
+    if match is None:
+        return default_symbol
+
+    symbol = match.group(1)
+    return json.loads('"' + symbol + '"') if '\\' in symbol else symbol
+
+
+def process_sharded_orders(messages: Iterable[Union[str, dict]], number_of_workers: int,
+                           transactions_output: str = None,
+                           batch_size: int = shard_batch_size) -> tuple[int, dict[str, OrderBook]]:
+    """
+    :param messages:                serialized orders with symbols: JSON lines or decoded dictionaries
+    :param number_of_workers:       the number of worker processes
+    :param transactions_output:     JSON lines file for performed transactions (optional)
+    :param batch_size:              number of orders sent to a worker at once
+    :return:                        the number of processed orders and order books of all symbols
+
+    Matches orders of many symbols in parallel. Every symbol has its own order book
+    and all order books of a symbol shard are kept by a single worker process,
+    so orders of each symbol are matched in the order of the input.
+    The main process only finds symbols of orders and routes them to workers in batches.
+    Transactions are written with the symbol of their order book, in the order of execution
+    within each symbol; transactions of different symbols may be interleaved differently than in the input.
+    """
+
+    context = multiprocessing.get_context()
+    requests = [context.Queue(shard_queue_size) for _ in range(number_of_workers)]
+    results = context.Queue()
+    part_files = [None] * number_of_workers
+    if transactions_output:
+        part_files = ["{0}.{1}".format(transactions_output, shard) for shard in range(number_of_workers)]
+
+    workers = [context.Process(target=_run_shard, args=(requests[shard], results, shard, part_files[shard]),
+                               daemon=True)
+               for shard in range(number_of_workers)]
+    for worker in workers:
+        worker.start()
+
+    number_of_orders = 0
+    try:
+        batches = [[] for _ in range(number_of_workers)]
+        for message in messages:
+            symbol = get_symbol(message)
+            shard = get_shard(symbol, number_of_workers)
+            batch = batches[shard]
+            batch.append((symbol, message))
+            if len(batch) >= batch_size:
+                requests[shard].put(batch)
+                batches[shard] = []
+            number_of_orders += 1
+
+        for shard, batch in enumerate(batches):
+            if batch:
+                requests[shard].put(batch)
+    finally:
+        for queue in requests:
+            queue.put(None)
+
+    order_books = {}
+    error = None
+    for _ in workers:
+        shard, result = results.get()
+        if isinstance(result, Exception):
+            error = result
+        else:
+            order_books.update(result)
+    for worker in workers:
+        worker.join()
+
+    if transactions_output:
+        _merge_files(part_files, transactions_output)
+    if error is not None:
+        raise error
+
+    return number_of_orders, order_books
+
+
+def process_sharded_file(input_file: str, number_of_workers: int,
+                         transactions_output: str = None) -> tuple[int, dict[str, OrderBook]]:
+    """
+    :param input_file:              JSON file containing serialized orders with symbols
+    :param number_of_workers:       the number of worker processes
+    :param transactions_output:     JSON lines file for performed transactions (optional)
+    :return:                        the number of processed orders and order books of all symbols
+
+    Reads orders of many symbols from a JSON file (an array or JSON lines) and matches them in parallel.
+    """
+
+    return process_sharded_orders(read_order_messages(input_file), number_of_workers, transactions_output)
+
+
+def _run_shard(requests: multiprocessing.Queue, results: multiprocessing.Queue, shard: int,
+               transactions_output: str = None):
+    """
+    :param requests:                queue of batches of (symbol, serialized order) pairs, ended with None
+    :param results:                 queue receiving order books of the shard (or an exception)
+    :param shard:                   index of the shard
+    :param transactions_output:     JSON lines file for transactions of the shard (optional)
+
+    Worker process: keeps order books of a single shard and matches batches of orders.
+    Orders of a batch are grouped by symbol, keeping their order within each symbol.
+    After an error, remaining batches are consumed without matching, so that the main process is never blocked.
+    """
+
+    order_books = {}
+    result = order_books
+    with open(transactions_output, 'w') if transactions_output else nullcontext() as transactions_file:
+        while (batch := requests.get()) is not None:
+            if result is not order_books:
+                continue
+
+            try:
+                for symbol, orders in _group_by_symbol(batch):
+                    order_book = order_books.get(symbol)
+                    if order_book is None:
+                        order_book = order_books[symbol] = OrderBook()
+
+                    transactions = order_book.add_many(orders)
+                    if transactions_file is not None:
+                        prefix = '{"symbol": %s, ' % json.dumps(symbol)
+                        transactions_file.writelines(prefix + transaction.return_json()[1:] + "\n"
+                                                     for transaction in transactions)
+            except Exception as error:
+                # the error is passed to the main process instead of leaving it waiting for the results
+                result = error
+
+    results.put((shard, result))
+
+
+def _group_by_symbol(batch: list[tuple[str, Union[str, dict]]]) -> Iterator[tuple[str, list[Order]]]:
+    """
+    :param batch:                   list of (symbol, serialized order) pairs
+    :return:                        iterator over (symbol, list of orders) pairs
+    """
+
+    groups = {}
+    for symbol, message in batch:
+        order = Order.from_dict(message) if isinstance(message, dict) else Order(message)
+        orders = groups.get(symbol)
+        if orders is None:
+            groups[symbol] = [order]
+        else:
+            orders.append(order)
+
+    return iter(groups.items())
+
+
+def _merge_files(part_files: list[str], output_file: str):
+    """
+    :param part_files:              files to merge
+    :param output_file:             output file name
+
+    Concatenates files into a single file and removes them.
+    """
+
+    with open(output_file, 'wb') as output:
+        for part_file in part_files:
+            with open(part_file, 'rb') as part:
+                shutil.copyfileobj(part, output)
+            os.remove(part_file)
@@ -0,0 +1,106 @@
+from modules.order import Order
+from typing import Iterable, Iterator
+import mmap
+import os
+import struct
+
+
+# header: magic bytes, format version, flags, timestamp counter, depth sequence, log position, number of orders
+snapshot_header_format = struct.Struct('<8sHHIqqqq')
+snapshot_magic = b'ICESNAP\x00'
+snapshot_version = 1
+
+# record: id, price, visible quantity, hidden quantity, peak, timestamp, side, kind and padding
+snapshot_record_format = struct.Struct('<qqqqqqBB6x')
+
+
+class SnapshotHeader:
+    timestamp: int
+    depth_sequence: int
+    position: int
+    number_of_orders: int
+
+    def __init__(self, timestamp: int, depth_sequence: int, position: int, number_of_orders: int):
+        """
+        :param timestamp:           timestamp counter of the order book
+        :param depth_sequence:      sequence number of the latest depth update
+        :param position:            number of orders of the log applied before the snapshot
+        :param number_of_orders:    number of resting orders
+        """
+
+        self.timestamp = timestamp
+        self.depth_sequence = depth_sequence
+        self.position = position
+        self.number_of_orders = number_of_orders
+
+
+def write_snapshot(output_file: str, header: SnapshotHeader, orders: Iterable[Order]):
+    """
+    :param output_file:             snapshot file name
+    :param header:                  state of the order book besides its orders
+    :param orders:                  resting orders, in the order of their priority within each price level
+
+    Writes a snapshot of an order book. The snapshot is written to a temporary file first
+    and then renamed, so an existing snapshot is never left half-written.
+    """
+
+    temporary_file = output_file + ".tmp"
+    pack = snapshot_record_format.pack
+    with open(temporary_file, 'wb') as file:
+        file.write(snapshot_header_format.pack(snapshot_magic, snapshot_version, 0, 0, header.timestamp,
+                                               header.depth_sequence, header.position, header.number_of_orders))
+        file.writelines(pack(order.id, order.price, order.quantity, order.hidden_quantity, order.peak,
+                             order.timestamp, order.side, order.kind) for order in orders)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_file, output_file)
+
+
+def read_snapshot(input_file: str) -> tuple[SnapshotHeader, Iterator[Order]]:
+    """
+    :param input_file:              snapshot file name
+    :return:                        header of the snapshot and iterator over resting orders
+
+    Reads a snapshot of an order book. Orders are read lazily from a memory-mapped file.
+    Raises a ValueError if the file is not a valid snapshot.
+    """
+
+    with open(input_file, 'rb') as file:
+        data = file.read(snapshot_header_format.size)
+        if len(data) < snapshot_header_format.size:
+            raise ValueError("'{0}' is not an order book snapshot".format(input_file))
+
+        magic, version, _, _, timestamp, depth_sequence, position, number_of_orders = \
+            snapshot_header_format.unpack(data)
+        if magic != snapshot_magic or version != snapshot_version:
+            raise ValueError("'{0}' is not an order book snapshot of version {1}".format(input_file,
+                                                                                         snapshot_version))
+        if os.fstat(file.fileno()).st_size != snapshot_header_format.size + \
+                number_of_orders * snapshot_record_format.size:
+            raise ValueError("order book snapshot '{0}' is truncated".format(input_file))
+
+    header = SnapshotHeader(timestamp, depth_sequence, position, number_of_orders)
+    return header, _read_orders(input_file)
+
+
+def _read_orders(input_file: str) -> Iterator[Order]:
+    """
+    :param input_file:              snapshot file name
+    :return:                        iterator over resting orders
+    """
+
+    from_codes = Order.from_codes
+    with open(input_file, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            data = memoryview(mapped_file)[snapshot_header_format.size:]
+            try:
+                for order_id, price, quantity, hidden_quantity, peak, timestamp, side, kind \
+                        in snapshot_record_format.iter_unpack(data):
+                    order = from_codes(order_id, side, kind, price, quantity + hidden_quantity, peak)
+                    order.quantity = quantity
+                    order.hidden_quantity = hidden_quantity
+                    order.timestamp = timestamp
+                    yield order
+            finally:
+                data.release()
@@ -0,0 +1,56 @@
+import json
+
+
+class Transaction:
+    __slots__ = ('buy_order_id', 'sell_order_id', 'price', 'quantity')
+
+    buy_order_id: int
+    sell_order_id: int
+    price: int
+    quantity: int
+
+    def __dict__(self):
+        """
+        Returns a dictionary object from a transaction object.
+        """
+
+        return {'buyOrderId': self.buy_order_id, 'sellOrderId': self.sell_order_id,
+                'price': self.price, 'quantity': self.quantity}
+
+    def __init__(self, buy_order_id: int, sell_order_id: int, price: int, quantity: int):
+        """
+        :param buy_order_id:        id of the buy order
+        :param sell_order_id:       id of the sell order
+        :param price:               price of the transaction
+        :param quantity:            traded quantity
+
+        Creates a record of a single fill between a buy and a sell order.
+        """
+
+        self.buy_order_id = buy_order_id
+        self.sell_order_id = sell_order_id
+        self.price = price
+        self.quantity = quantity
+
+    def __eq__(self, other):
+        """
+        Returns true if two transactions share the same fields.
+        """
+
+        return self.buy_order_id == other.buy_order_id and self.sell_order_id == other.sell_order_id and \
+            self.price == other.price and self.quantity == other.quantity
+
+    def __str__(self):
+        """
+        Returns a dictionary string of a transaction object.
+        """
+
+        return str(self.__dict__())
+
+    def return_json(self):
+        """
+        Returns a JSON object from a transaction object.
+        Uses a object -> dictionary conversion.
+        """
+
+        return json.dumps(self.__dict__())
@@ -0,0 +1,137 @@
+from modules.order import Order, DIRECTIONS, ORDER_TYPES, ICEBERG
+from modules.orderbook import OrderBook
+from typing import Union
+import json
+
+
+# reasons of rejects
+MALFORMED = "malformed"
+UNKNOWN_TYPE = "unknown_type"
+UNKNOWN_DIRECTION = "unknown_direction"
+INVALID_ID = "invalid_id"
+INVALID_PRICE = "invalid_price"
+INVALID_QUANTITY = "invalid_quantity"
+MISSING_PEAK = "missing_peak"
+INVALID_PEAK = "invalid_peak"
+DUPLICATE_ID = "duplicate_id"
+UNKNOWN_ORDER = "unknown_order"
+
+_order_type_codes = {order_type: code for code, order_type in enumerate(ORDER_TYPES)}
+_direction_codes = {direction: code for code, direction in enumerate(DIRECTIONS)}
+_object_starts = ('{', b'{')
+
+
+class Reject:
+    __slots__ = ('order_id', 'reason', 'message')
+
+    order_id: int
+    reason: str
+    message: str
+
+    def __dict__(self):
+        """
+        Returns a dictionary object from a reject object.
+        """
+
+        return {'reject': self.order_id, 'reason': self.reason, 'message': self.message}
+
+    def __init__(self, order_id: int, reason: str, message: str):
+        """
+        :param order_id:            id of the rejected order (None if it is unknown)
+        :param reason:              reason of the reject, one of the constants of this module
+        :param message:             human-readable description of the reason
+
+        Creates a record of a rejected message.
+        """
+
+        self.order_id = order_id
+        self.reason = reason
+        self.message = message
+
+    def __str__(self):
+        """
+        Returns a dictionary string of a reject object.
+        """
+
+        return str(self.__dict__())
+
+    def return_json(self):
+        """
+        Returns a JSON object from a reject object.
+        """
+
+        return json.dumps(self.__dict__())
+
+
+def validate_order(message: Union[str, bytes, dict], order_book: OrderBook = None) -> Union[Order, Reject]:
+    """
+    :param message:                 JSON line (or an already decoded JSON object) of an order
+    :param order_book:              order book the order is meant for, checked for duplicate ids (optional)
+    :return:                        order object or a reject
+
+    Validates a message before it reaches an order book. Each field is checked with cheap rules
+    and the id is looked up in the id index of the order book, so invalid messages are rejected
+    before any matching work. Never raises an exception for an invalid message.
+    """
+
+    if isinstance(message, dict):
+        data = message
+    else:
+        # most of garbage is rejected without running the JSON decoder
+        if message.lstrip()[:1] not in _object_starts:
+            return Reject(None, MALFORMED, "the message has to be a JSON object with 'type' and 'order' fields")
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
+            return Reject(None, MALFORMED, "the message is not a valid JSON")
+
+    order_data = data.get('order') if isinstance(data, dict) else None
+    if not isinstance(order_data, dict):
+        return Reject(None, MALFORMED, "the message has to be a JSON object with 'type' and 'order' fields")
+
+    order_id = order_data.get('id')
+    if not _is_integer(order_id) or order_id < 0:
+        order_id = None
+
+    order_type = data.get('type')
+    kind = _order_type_codes.get(order_type) if isinstance(order_type, str) else None
+    if kind is None:
+        return Reject(order_id, UNKNOWN_TYPE, "the type of the order has to be either 'Limit' or 'Iceberg'")
+
+    if order_id is None:
+        return Reject(None, INVALID_ID, "id of the order has to be a non-negative integer")
+
+    direction = order_data.get('direction')
+    side = _direction_codes.get(direction) if isinstance(direction, str) else None
+    if side is None:
+        return Reject(order_id, UNKNOWN_DIRECTION, "the direction of the order has to be either 'Buy' or 'Sell'")
+
+    price = order_data.get('price')
+    if not _is_integer(price) or price <= 0:
+        return Reject(order_id, INVALID_PRICE, "price of the order has to be a positive integer")
+
+    quantity = order_data.get('quantity')
+    if not _is_integer(quantity) or quantity <= 0:
+        return Reject(order_id, INVALID_QUANTITY, "quantity of the order has to be a positive integer")
+
+    peak = 0
+    if kind == ICEBERG:
+        peak = order_data.get('peak')
+        if peak is None or peak == 0:
+            return Reject(order_id, MISSING_PEAK, "iceberg orders have to have a positive 'peak'")
+        if not _is_integer(peak) or peak < 0:
+            return Reject(order_id, INVALID_PEAK, "'peak' of the order has to be a positive integer")
+
+    if order_book is not None and order_id in order_book:
+        return Reject(order_id, DUPLICATE_ID, "an order of the same id is already in the order book")
+
+    return Order.from_codes(order_id, side, kind, price, quantity, peak)
+
+
+def _is_integer(value: object) -> bool:
+    """
+    :param value:                   decoded JSON value
+    :return:                        true if the value is an integer (but not a boolean)
+    """
+
+    return type(value) is int
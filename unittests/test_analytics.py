@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from modules import analytics
+from modules.analytics import FillRecorder, Fills, Orders, create_report, fill_count_distribution, \
+    iceberg_statistics, load_fills, load_orders, order_summaries, volume_by_price, vwap
+from modules.auxiliary import create_order_list, write_transactions
+from modules.journal import Journal
+from modules.order import Order, BUY, SELL
+from modules.orderbook import OrderBook
+from modules.orderlog import convert_to_order_log
+
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.transactions = []
+        self.recorder = FillRecorder()
+
+        def transaction_sink(transaction):
+            self.transactions.append(transaction)
+            self.recorder(transaction)
+
+        order_book = OrderBook(transaction_sink=transaction_sink)
+        for order in self.recorder.record_orders(self.create_orders()):
+            order_book.add(order)
+
+    @staticmethod
+    def create_orders() -> list[Order]:
+        return [Order((1, "Iceberg", "Sell", 100, 50, 20)),
+                Order((2, "Limit", "Sell", 110, 30, 0)),
+                Order((3, "Limit", "Buy", 110, 60, 0)),
+                Order((4, "Iceberg", "Buy", 90, 40, 10)),
+                Order((5, "Limit", "Sell", 90, 15, 0))]
+
+    @staticmethod
+    def get_columns(table) -> dict[str, list]:
+        return {name: column.tolist() for name, column in vars(table).items()}
+
+    def test_recorder(self):
+        fills = self.recorder.get_fills()
+        self.assertEqual(len(fills), 6)
+        self.assertEqual(self.get_columns(fills), {'buy_order_id': [3, 3, 3, 3, 4, 4],
+                                                   'sell_order_id': [1, 1, 1, 2, 5, 5],
+                                                   'price': [100, 100, 100, 110, 90, 90],
+                                                   'quantity': [20, 20, 10, 10, 10, 5]})
+        self.assertEqual(self.get_columns(Fills.from_transactions(self.transactions)), self.get_columns(fills))
+
+        orders = self.recorder.get_orders()
+        self.assertEqual((orders.id.tolist(), orders.quantity.tolist(), orders.peak.tolist()),
+                         ([1, 2, 3, 4, 5], [50, 30, 60, 40, 15], [20, 0, 0, 10, 0]))
+        self.assertEqual(self.get_columns(Orders.from_orders(self.create_orders())), self.get_columns(orders))
+        self.assertEqual(len(FillRecorder().get_fills()), 0)
+
+    def test_aggregates(self):
+        fills = self.recorder.get_fills()
+        self.assertAlmostEqual(vwap(fills), (50 * 100 + 10 * 110 + 15 * 90) / 75)
+        self.assertIsNone(vwap(Fills([], [], [], [])))
+
+        prices, volumes = volume_by_price(fills)
+        self.assertEqual((prices.tolist(), volumes.tolist()), ([90, 100, 110], [15, 50, 10]))
+
+        number_of_fills, number_of_orders = fill_count_distribution(fills)
+        self.assertEqual((number_of_fills.tolist(), number_of_orders.tolist()), ([1, 2, 3, 4], [1, 2, 1, 1]))
+
+        summaries = order_summaries(fills)
+        self.assertEqual(summaries['id'].tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(summaries['side'].tolist(), [SELL, SELL, BUY, BUY, SELL])
+        self.assertEqual(summaries['fills'].tolist(), [3, 1, 4, 2, 2])
+        self.assertEqual(summaries['quantity'].tolist(), [50, 10, 60, 15, 15])
+        self.assertEqual(summaries['average_price'].tolist(), [100, 110, 6100 / 60, 90, 90])
+
+    def test_iceberg_statistics(self):
+        statistics = iceberg_statistics(self.recorder.get_fills(), self.recorder.get_orders())
+        self.assertEqual(statistics, {'icebergs': 2, 'executed': 2, 'fully_executed': 1, 'quantity': 90,
+                                      'filled_quantity': 65, 'fill_ratio': 65 / 90, 'mean_fills': 2.5,
+                                      'mean_slices': 2.5})
+
+        orders = Orders.from_orders(create_order_list("example.json"))
+        self.assertEqual(iceberg_statistics(Fills([], [], [], []), orders)['executed'], 0)
+
+    def test_load(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        directory = temporary_directory.name
+        transactions_file = os.path.join(directory, "transactions.jsonl")
+        with open(transactions_file, 'w') as file:
+            write_transactions(self.transactions, file)
+        journal_file = os.path.join(directory, "orders.wal")
+        with Journal(journal_file) as journal:
+            order_book = OrderBook(journal=journal)
+            for order in self.create_orders():
+                order_book.add(order)
+        order_log_file = os.path.join(directory, "orders.bin")
+        convert_to_order_log(self.create_orders(), order_log_file)
+
+        fills = self.get_columns(self.recorder.get_fills())
+        self.assertEqual(self.get_columns(load_fills(transactions_file)), fills)
+        self.assertEqual(self.get_columns(load_fills(journal_file)), fills)
+        # lines and entries split between chunks
+        with mock.patch.object(analytics, 'load_chunk_size', 50):
+            self.assertEqual(self.get_columns(load_fills(transactions_file)), fills)
+            self.assertEqual(self.get_columns(load_fills(journal_file)), fills)
+
+        orders = self.get_columns(self.recorder.get_orders())
+        self.assertEqual(self.get_columns(load_orders(journal_file)), orders)
+        self.assertEqual(self.get_columns(load_orders(order_log_file)), orders)
+
+    def test_symbol_transactions(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        transactions_file = os.path.join(temporary_directory.name, "transactions.jsonl")
+        with open(transactions_file, 'w') as file:
+            file.write('{"symbol": "S0001", "buyOrderId": 7, "sellOrderId": 8, "price": 100, "quantity": 5}\n')
+        self.assertEqual(self.get_columns(load_fills(transactions_file)),
+                         {'buy_order_id': [7], 'sell_order_id': [8], 'price': [100], 'quantity': [5]})
+
+    def test_report(self):
+        report = create_report(self.recorder.get_fills(), self.recorder.get_orders())
+        self.assertEqual((report['fills'], report['volume'], report['notional']), (6, 75, 7450))
+        self.assertEqual((report['lowPrice'], report['highPrice']), (90, 110))
+        self.assertEqual(report['volumeByPrice'][1], {'price': 100, 'quantity': 50})
+        self.assertEqual(report['fillsPerOrder'], [{'fills': 1, 'orders': 1}, {'fills': 2, 'orders': 2},
+                                                   {'fills': 3, 'orders': 1}, {'fills': 4, 'orders': 1}])
+        self.assertEqual(report['icebergs']['icebergs'], 2)
+
+        empty_report = create_report(Fills([], [], [], []))
+        self.assertEqual((empty_report['fills'], empty_report['vwap'], empty_report['lowPrice']), (0, None, None))
+        self.assertNotIn('icebergs', empty_report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from modules import auxiliary
+from modules.auxiliary import create_order_list, create_order_book_from_orders_list, read_orders
+
+
+class TestOrderReading(unittest.TestCase):
+    orders = [
+        {"type": "Limit", "order": {"direction": "Sell", "id": 1, "price": 100, "quantity": 200}},
+        {"type": "Iceberg", "order": {"direction": "Buy", "id": 2, "price": 90, "quantity": 300, "peak": 100}},
+        {"type": "Limit", "order": {"direction": "Buy", "id": 3, "price": 110, "quantity": 50}}
+    ]
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        directory = temporary_directory.name
+        self.array_file = os.path.join(directory, "orders.json")
+        self.lines_file = os.path.join(directory, "orders.jsonl")
+        with open(self.array_file, 'w') as file:
+            json.dump(self.orders, file, indent=4)
+        with open(self.lines_file, 'w') as file:
+            file.write('\n'.join(json.dumps(order) for order in self.orders) + '\n')
+
+    def test_read_json_array(self):
+        with mock.patch.object(auxiliary, 'read_chunk_size', 16):
+            orders = list(read_orders(self.array_file))
+        self.assertEqual([order.id for order in orders], [1, 2, 3])
+        self.assertEqual([order.id for order in create_order_list(self.array_file)], [1, 2, 3])
+        self.assertEqual(orders[1].hidden_quantity, 200)
+
+    def test_read_json_lines(self):
+        orders = list(read_orders(self.lines_file))
+        self.assertEqual([order.id for order in orders], [1, 2, 3])
+        self.assertEqual(orders[1].quantity, 100)
+
+    def test_read_truncated_json_array(self):
+        with open(self.array_file, 'w') as file:
+            file.write(json.dumps(self.orders)[:-20])
+        self.assertEqual([order.id for order in read_orders(self.array_file)], [1, 2])
+
+    def test_save_transactions(self):
+        transactions_file = os.path.join(os.path.dirname(self.lines_file), "transactions.jsonl")
+        with mock.patch.object(auxiliary, 'transactions_batch_size', 2):
+            create_order_book_from_orders_list(read_orders(self.lines_file), transactions_output=transactions_file)
+        with open(transactions_file) as file:
+            self.assertEqual(file.read(), '{"buyOrderId": 3, "sellOrderId": 1, "price": 100, "quantity": 50}\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from modules.backtest import create_jobs, format_results, parse_grid, run_backtest, run_job, save_results, \
+    timing_columns
+
+
+class TestBacktest(unittest.TestCase):
+    @staticmethod
+    def without_timing(results: list[dict]) -> list[dict]:
+        return [{name: value for name, value in row.items() if name not in timing_columns} for row in results]
+
+    def test_jobs(self):
+        grid = parse_grid(["peak_min=10, 50,500", "iceberg_probability=0.2,0.5"])
+        self.assertEqual(grid, {'peak_min': ['10', '50', '500'], 'iceberg_probability': ['0.2', '0.5']})
+
+        jobs = create_jobs(grid, [3, 1], 100)
+        # 'peak_min' of 500 exceeds 'peak_max' of the configuration
+        self.assertEqual(len(jobs), 8)
+        self.assertEqual([job['job'] for job in jobs], list(range(8)))
+        self.assertEqual([job['seed'] for job in jobs], [3, 1] * 4)
+        self.assertEqual([(job['parameters']['peak_min'], job['parameters']['iceberg_probability']) for job in jobs],
+                         [(10, 0.2), (10, 0.2), (10, 0.5), (10, 0.5), (50, 0.2), (50, 0.2), (50, 0.5), (50, 0.5)])
+        self.assertEqual(jobs[0]['parameters']['peak_max'], 400)
+
+        with self.assertRaises(ValueError):
+            create_jobs({'default_output': ['data.json']}, [1], 100)
+        with self.assertRaises(ValueError):
+            create_jobs({'price_mean': ['high']}, [1], 100)
+        with self.assertRaises(ValueError):
+            parse_grid(["peak_min"])
+
+    def test_job(self):
+        job = create_jobs({'iceberg_probability': [0.5]}, [7], 2000)[0]
+        row = run_job(job)
+        self.assertEqual(row['orders'], 2000)
+        self.assertGreater(row['fills'], 0)
+        self.assertIsNotNone(row['iceberg_fill_ratio'])
+        self.assertLessEqual(row['best_bid'], row['best_ask'])
+        self.assertEqual(self.without_timing([row]), self.without_timing([run_job(job)]))
+
+        other_seed = create_jobs({'iceberg_probability': [0.5]}, [8], 2000)[0]
+        self.assertNotEqual(self.without_timing([row]), self.without_timing([run_job(other_seed)]))
+
+    def test_reproducibility(self):
+        jobs = create_jobs({'peak_min': [10, 100]}, [1, 2, 3], 500)
+        sequential = [run_job(job) for job in jobs]
+        parallel = run_backtest(jobs, 2)
+        self.assertEqual(self.without_timing(parallel), self.without_timing(sequential))
+        self.assertEqual(len(format_results(parallel, ['peak_min']).splitlines()), len(jobs) + 1)
+
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        directory = temporary_directory.name
+        json_file = os.path.join(directory, "results.json")
+        csv_file = os.path.join(directory, "results.csv")
+        save_results(parallel, json_file)
+        save_results(parallel, csv_file)
+        with open(json_file) as file:
+            self.assertEqual(json.load(file), parallel)
+        with open(csv_file) as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual([int(row['fills']) for row in rows], [row['fills'] for row in parallel])
+
+
+if __name__ == '__main__':
+    unittest.main()
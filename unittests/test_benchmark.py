@@ -0,0 +1,29 @@
+import unittest
+from random import Random
+from modules.benchmark import run_benchmarks, scenarios, format_results, CANCEL
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_scenarios_are_reproducible(self):
+        for scenario in scenarios.values():
+            self.assertEqual(scenario(Random(1), 300), scenario(Random(1), 300))
+
+    def test_cancel_heavy_scenario(self):
+        messages = scenarios['cancel_heavy'](Random(1), 1000)
+        cancelled = [message for operation, message in messages if operation == CANCEL]
+        self.assertGreater(len(cancelled), 0)
+        self.assertEqual(len(cancelled), len(set(cancelled)))
+
+    def test_results(self):
+        results = run_benchmarks(300)
+        self.assertEqual(set(results['scenarios']), set(scenarios))
+        for result in results['scenarios'].values():
+            self.assertEqual(result['operations'], 300)
+            self.assertLessEqual(result['latency_ns']['p50'], result['latency_ns']['p99'])
+            self.assertLessEqual(result['latency_ns']['p99'], result['latency_ns']['p99.9'])
+            self.assertGreater(result['peak_memory'], 0)
+        self.assertEqual(len(format_results(results).splitlines()), len(scenarios) + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from modules import constants
+
+
+class TestConstants(unittest.TestCase):
+    def setUp(self):
+        # every test starts with settings which have not been loaded yet
+        for name, value in (('_config_file', None), ('_overrides', {}), ('_settings', None)):
+            patcher = mock.patch.object(constants, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.config_file = os.path.join(temporary_directory.name, "config.json")
+        with open(self.config_file, 'w') as file:
+            json.dump({"default_output": "orders.json", "iceberg_probability": 0.5, "price_mean": 100}, file)
+
+    def test_lazy_loading(self):
+        with mock.patch.dict(os.environ, {constants.config_environment_variable: self.config_file}):
+            self.assertIsNone(constants._settings)
+            self.assertEqual(constants.default_price_mean, 100)
+            self.assertEqual(constants.get_setting('default_output'), "orders.json")
+            self.assertEqual(constants.get_setting('default_output', "other.json"), "other.json")
+
+            # settings are cached
+            os.remove(self.config_file)
+            self.assertEqual(constants.default_iceberg_probability, 0.5)
+
+    def test_default_config_file(self):
+        with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")) as file:
+            self.assertEqual(constants.get_settings(), json.load(file))
+        self.assertRaises(AttributeError, getattr, constants, "default_unknown")
+
+    def test_overrides(self):
+        environment = {constants.config_environment_variable: self.config_file, "ICEBERG_PRICE_MEAN": "200",
+                       "ICEBERG_ICEBERG_PROBABILITY": "0.25"}
+        with mock.patch.dict(os.environ, environment):
+            self.assertEqual(constants.get_settings(),
+                             {"default_output": "orders.json", "iceberg_probability": 0.25, "price_mean": 200})
+
+            constants.configure(price_mean="300", default_output="data.jsonl")
+            self.assertEqual((constants.default_price_mean, constants.default_data_file), (300, "data.jsonl"))
+
+            constants.configure(price_mean="abc")
+            self.assertRaises(ValueError, constants.get_settings)
+
+        self.assertRaises(ValueError, constants.configure, unknown_setting=1)
+
+    def test_config_file(self):
+        constants.configure(self.config_file, iceberg_probability=0.0)
+        self.assertEqual(constants.get_settings(),
+                         {"default_output": "orders.json", "iceberg_probability": 0.0, "price_mean": 100})
+
+
+if __name__ == '__main__':
+    unittest.main()
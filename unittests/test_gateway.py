@@ -0,0 +1,166 @@
+import asyncio
+import json
+import unittest
+from modules.gateway import OrderGateway
+from modules.limits import BookLimits
+from modules.orderbook import OrderBook
+
+
+class TestGateway(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.gateway = OrderGateway()
+        self.host, self.port = (await self.gateway.start("127.0.0.1", 0))[0][:2]
+
+    async def asyncTearDown(self):
+        await self.gateway.close()
+
+    async def connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(self.host, self.port)
+
+    @staticmethod
+    async def send(writer: asyncio.StreamWriter, *messages: dict):
+        writer.writelines(json.dumps(message).encode() + b"\n" for message in messages)
+        await writer.drain()
+
+    @staticmethod
+    async def receive(reader: asyncio.StreamReader, number_of_messages: int) -> list[dict]:
+        return [json.loads(await asyncio.wait_for(reader.readline(), 5)) for _ in range(number_of_messages)]
+
+    async def test_fills(self):
+        seller_reader, seller_writer = await self.connect()
+        buyer_reader, buyer_writer = await self.connect()
+        subscriber_reader, subscriber_writer = await self.connect()
+
+        await self.send(subscriber_writer, {"subscribe": "trades"})
+        self.assertEqual(await self.receive(subscriber_reader, 1), [{"subscribed": "trades"}])
+
+        await self.send(seller_writer, {"type": "Iceberg", "order": {"direction": "Sell", "id": 1, "price": 100,
+                                                                     "quantity": 50, "peak": 20}})
+        self.assertEqual(await self.receive(seller_reader, 1), [{"ack": 1}])
+
+        await self.send(buyer_writer, {"type": "Limit", "order": {"direction": "Buy", "id": 2, "price": 100,
+                                                                  "quantity": 30}})
+        fills = [{"buyOrderId": 2, "sellOrderId": 1, "price": 100, "quantity": 20},
+                 {"buyOrderId": 2, "sellOrderId": 1, "price": 100, "quantity": 10}]
+        self.assertEqual(await self.receive(buyer_reader, 3), [{"ack": 2}, *fills])
+        self.assertEqual(await self.receive(seller_reader, 2), fills)
+        self.assertEqual(await self.receive(subscriber_reader, 2), fills)
+
+        for writer in (seller_writer, buyer_writer, subscriber_writer):
+            writer.close()
+
+    async def test_consumed_iceberg(self):
+        seller_reader, seller_writer = await self.connect()
+        buyer_reader, buyer_writer = await self.connect()
+
+        await self.send(seller_writer, {"type": "Iceberg", "order": {"direction": "Sell", "id": 1, "price": 100,
+                                                                     "quantity": 300, "peak": 100}})
+        self.assertEqual(await self.receive(seller_reader, 1), [{"ack": 1}])
+
+        # all slices of the iceberg are used up by a single aggressor
+        await self.send(buyer_writer, {"type": "Limit", "order": {"direction": "Buy", "id": 2, "price": 100,
+                                                                  "quantity": 300}})
+        fills = [{"buyOrderId": 2, "sellOrderId": 1, "price": 100, "quantity": 100}] * 3
+        self.assertEqual(await self.receive(buyer_reader, 4), [{"ack": 2}, *fills])
+        self.assertEqual(await self.receive(seller_reader, 3), fills)
+
+        await self.send(seller_writer, {"cancel": 1})
+        self.assertEqual((await self.receive(seller_reader, 1))[0]['reason'], "unknown_order")
+
+        seller_writer.close()
+        buyer_writer.close()
+
+    async def test_limits(self):
+        await self.gateway.close()
+        events = []
+        self.gateway = OrderGateway(OrderBook(limits=BookLimits(max_orders=1, event_sink=events.append)))
+        self.host, self.port = (await self.gateway.start("127.0.0.1", 0))[0][:2]
+        reader, writer = await self.connect()
+        other_reader, other_writer = await self.connect()
+
+        await self.send(writer, {"type": "Limit", "order": {"direction": "Buy", "id": 1, "price": 100,
+                                                            "quantity": 10}})
+        self.assertEqual(await self.receive(reader, 1), [{"ack": 1}])
+
+        # order 2 makes room for itself, order 3 is not better than it
+        await self.send(other_writer, {"type": "Limit", "order": {"direction": "Buy", "id": 2, "price": 110,
+                                                                  "quantity": 10}},
+                        {"type": "Limit", "order": {"direction": "Buy", "id": 3, "price": 105, "quantity": 10}})
+        self.assertEqual(await self.receive(reader, 1), [{"event": "evicted", "reason": "max_orders", "id": 1,
+                                                          "direction": "Buy", "price": 100, "quantity": 10}])
+        messages = await self.receive(other_reader, 2)
+        self.assertEqual(messages[0], {"ack": 2})
+        self.assertEqual((messages[1]['reject'], messages[1]['reason']), (3, "max_orders"))
+
+        await self.send(writer, {"cancel": 1})
+        self.assertEqual((await self.receive(reader, 1))[0]['reason'], "unknown_order")
+        self.assertEqual([event.order_id for event in events], [1, 3])
+
+        # the remainder of order 5 evicts order 2 after its fill
+        await self.send(writer, {"type": "Limit", "order": {"direction": "Sell", "id": 4, "price": 130,
+                                                            "quantity": 10}},
+                        {"type": "Limit", "order": {"direction": "Buy", "id": 5, "price": 130, "quantity": 15}})
+        self.assertEqual(await self.receive(reader, 3), [
+            {"ack": 4}, {"ack": 5}, {"buyOrderId": 5, "sellOrderId": 4, "price": 130, "quantity": 10}])
+        self.assertEqual((await self.receive(other_reader, 1))[0]['id'], 2)
+        self.assertEqual(self.gateway.order_book.count_orders(), 1)
+
+        writer.close()
+        other_writer.close()
+
+    async def test_cancel(self):
+        reader, writer = await self.connect()
+        other_reader, other_writer = await self.connect()
+
+        await self.send(writer, {"type": "Limit", "order": {"direction": "Buy", "id": 1, "price": 100,
+                                                            "quantity": 10}})
+        self.assertEqual(await self.receive(reader, 1), [{"ack": 1}])
+
+        await self.send(other_writer, {"cancel": 1})
+        self.assertEqual((await self.receive(other_reader, 1))[0]['reject'], 1)
+
+        await self.send(writer, {"cancel": 1})
+        self.assertEqual(await self.receive(reader, 1), [{"cancelled": 1}])
+        self.assertNotIn(1, self.gateway.order_book)
+
+        writer.close()
+        other_writer.close()
+
+    async def test_rejects(self):
+        reader, writer = await self.connect()
+        order = {"type": "Limit", "order": {"direction": "Buy", "id": 1, "price": 100, "quantity": 10}}
+
+        writer.write(b"not a JSON line\n")
+        writer.write(b"[{\"cancel\": 1}]\n")
+        writer.write(b"{\"cancel\": 1\n")
+        await self.send(writer, {"type": "Limit", "order": {"direction": "Up", "id": 2, "price": 100,
+                                                            "quantity": 10}})
+        await self.send(writer, order, order)
+        messages = await self.receive(reader, 6)
+
+        # only a line starting as a JSON object is decoded
+        object_message = "the message has to be a JSON object with 'type' and 'order' fields"
+        self.assertEqual(messages[0], {"reject": None, "reason": "malformed", "message": object_message})
+        self.assertEqual(messages[1], {"reject": None, "reason": "malformed", "message": object_message})
+        self.assertEqual(messages[2], {"reject": None, "reason": "malformed",
+                                       "message": "the message is not a valid JSON"})
+        self.assertEqual((messages[3]['reject'], messages[3]['reason']), (2, "unknown_direction"))
+        self.assertEqual(messages[4], {"ack": 1})
+        self.assertEqual((messages[5]['reject'], messages[5]['reason']), (1, "duplicate_id"))
+
+        writer.close()
+
+    async def test_exit(self):
+        reader, writer = await self.connect()
+        await self.send(writer, {"type": "Limit", "order": {"direction": "Buy", "id": 1, "price": 100,
+                                                            "quantity": 10}})
+        writer.write(b"exit\n")
+        await writer.drain()
+
+        self.assertEqual(await self.receive(reader, 1), [{"ack": 1}])
+        self.assertEqual(await asyncio.wait_for(reader.read(), 5), b"")
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from modules.auxiliary import read_orders
+from modules.generator import generate_order_chunks, write_random_orders
+
+
+class TestOrderGenerator(unittest.TestCase):
+    def test_chunks(self):
+        chunks = list(generate_order_chunks(250, seed=1, chunk_size=100))
+        self.assertEqual([len(chunk['id']) for chunk in chunks], [100, 100, 50])
+        self.assertEqual(chunks[-1]['id'][-1], 250)
+
+        for chunk in chunks:
+            self.assertTrue((chunk['price'] >= 10).all())
+            self.assertTrue((chunk['price'] % 10 == 0).all())
+            self.assertTrue((chunk['peak'][chunk['kind'] == 0] == 0).all())
+            self.assertTrue((chunk['peak'][chunk['kind'] == 1] > 0).all())
+            self.assertTrue((chunk['peak'] <= chunk['quantity'] // 2).all())
+
+    def test_reproducibility(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        directory = temporary_directory.name
+        files = [os.path.join(directory, name) for name in ("first.jsonl", "second.jsonl", "third.jsonl")]
+        write_random_orders(1000, files[0], seed=7, chunk_size=64)
+        write_random_orders(1000, files[1], seed=7, chunk_size=64)
+        write_random_orders(1000, files[2], seed=8, chunk_size=64)
+
+        contents = []
+        for file_name in files:
+            with open(file_name) as file:
+                contents.append(file.read())
+        self.assertEqual(contents[0], contents[1])
+        self.assertNotEqual(contents[0], contents[2])
+
+        orders = list(read_orders(files[0]))
+        self.assertEqual([order.id for order in orders], list(range(1, 1001)))
+        self.assertTrue(any(order.type == "Iceberg" for order in orders))
+
+
+if __name__ == '__main__':
+    unittest.main()
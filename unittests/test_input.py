@@ -1,5 +1,5 @@
 import unittest
-from modules.order import Order
+from modules.order import Order, BUY, SELL, LIMIT, ICEBERG
 
 
 class TestOrderInput(unittest.TestCase):
@@ -43,6 +43,42 @@ class TestOrderInput(unittest.TestCase):
         self.assertEqual(order.price, 100)
         self.assertEqual(order.peak, 10)
 
+    def test_correct_iceberg_dict(self):
+        order = Order.from_dict({"type": "Iceberg", "order":
+                                 {"direction": "Sell", "id": 1, "price": 100, "quantity": 100, "peak": 10}})
+        self.assertEqual(order.id, 1)
+        self.assertEqual(order.type, "Iceberg")
+        self.assertEqual(order.direction, "Sell")
+        self.assertEqual(order.quantity, 10)
+        self.assertEqual(order.hidden_quantity, 90)
+        self.assertEqual(order.price, 100)
+        self.assertEqual(order.peak, 10)
+
+    def test_correct_dict_list(self):
+        orders = Order.from_dicts([
+            {"type": "Limit", "order": {"direction": "Buy", "id": 1, "price": 100, "quantity": 100}},
+            {"type": "Iceberg", "order": {"direction": "Sell", "id": 2, "price": 90, "quantity": 50, "peak": 20}}
+        ])
+        self.assertEqual([order.id for order in orders], [1, 2])
+        self.assertEqual([order.quantity for order in orders], [100, 20])
+        self.assertEqual(Order({"type": "Limit", "order":
+                                {"direction": "Buy", "id": 1, "price": 100, "quantity": 100}}), orders[0])
+
+    def test_correct_iceberg_codes(self):
+        order = Order.from_codes(1, SELL, ICEBERG, 100, 100, 10)
+        self.assertEqual(order.type, "Iceberg")
+        self.assertEqual(order.direction, "Sell")
+        self.assertEqual(order.quantity, 10)
+        self.assertEqual(order.hidden_quantity, 90)
+
+    def test_wrong_codes(self):
+        self.assertRaises(ValueError, Order.from_codes, 1, 2, LIMIT, 100, 100, 0)
+        self.assertRaises(ValueError, Order.from_codes, 1, BUY, 5, 100, 100, 0)
+        self.assertRaises(ValueError, Order.from_codes, 1, BUY, LIMIT, 100, 100, 10)
+
+    def test_wrong_input_type(self):
+        self.assertRaises(TypeError, Order, [1, "Limit", "Buy", 100, 100, 0])
+
     def test_limit_wrong_sized_tuple(self):
         self.assertRaises(ValueError, Order, (1, "Limit", "Buy", 100, 100))
         self.assertRaises(ValueError, Order, (1, "Limit", "Buy", 100, 100, 0, 0))
@@ -99,6 +135,18 @@ class TestOrderInput(unittest.TestCase):
                     '{"id": 1, "price": 100, "quantity": 100}}'
         self.assertRaises(KeyError, Order, json_line)
 
+    def test_limit_zero_price_dict(self):
+        data = {"type": "Limit", "order": {"direction": "Buy", "id": 1, "price": 0, "quantity": 100}}
+        self.assertRaises(ValueError, Order.from_dict, data)
+
+    def test_limit_no_quantity_dict(self):
+        data = {"type": "Limit", "order": {"direction": "Sell", "id": 1, "price": 100}}
+        self.assertRaises(KeyError, Order.from_dict, data)
+
+    def test_iceberg_no_peak_dict(self):
+        data = {"type": "Iceberg", "order": {"direction": "Buy", "id": 1, "price": 100, "quantity": 100}}
+        self.assertRaises(ValueError, Order.from_dicts, [data])
+
     def test_iceberg_no_peak_json(self):
         json_line = '{"type": "Iceberg","order":' \
                     '{"direction": "Buy", "id": 1, "price": 100, "quantity": 100}}'
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import time
+import unittest
+from modules.auxiliary import create_order_list
+from modules.journal import Journal, read_journal, entry_format, ORDER_ENTRY, FILL_ENTRY, CANCEL_ENTRY, \
+    MODIFY_ENTRY, SNAPSHOT_ENTRY
+from modules.order import Order
+from modules.orderbook import OrderBook
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.journal_file = os.path.join(temporary_directory.name, "orders.wal")
+
+    def test_entries(self):
+        with Journal(self.journal_file) as journal:
+            order_book = OrderBook(journal=journal)
+            order_book.add(Order((1, "Iceberg", "Sell", 100, 50, 20)))
+            order_book.add(Order((2, "Limit", "Buy", 100, 30, 0)))
+            order_book.add(Order((3, "Limit", "Buy", 90, 10, 0)))
+            order_book.modify(3, 5)
+            order_book.cancel(3)
+            self.assertRaises(ValueError, order_book.add, Order((1, "Limit", "Sell", 100, 10, 0)))
+
+        self.assertEqual([entry[0] for entry in read_journal(self.journal_file)],
+                         [ORDER_ENTRY, ORDER_ENTRY, FILL_ENTRY, FILL_ENTRY, ORDER_ENTRY, MODIFY_ENTRY, CANCEL_ENTRY])
+        self.assertEqual(list(read_journal(self.journal_file))[2:4],
+                         [(FILL_ENTRY, 0, 0, 2, 1, 100, 20), (FILL_ENTRY, 0, 0, 2, 1, 100, 10)])
+
+    def test_recover(self):
+        with Journal(self.journal_file, commit_count=3) as journal:
+            order_book = OrderBook(journal=journal)
+            orders = create_order_list("example.json")
+            order_book.add_many(orders[:2])
+            for order in orders[2:]:
+                order_book.add(order)
+
+        recovered_order_book = OrderBook.recover(self.journal_file)
+        self.assertEqual(recovered_order_book.get_state(), order_book.get_state())
+
+    def test_group_commit(self):
+        journal = Journal(self.journal_file, commit_count=3)
+        order_book = OrderBook(journal=journal)
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.add(Order((2, "Limit", "Buy", 100, 10, 0)))
+        self.assertEqual(list(read_journal(self.journal_file)), [])
+
+        # the fills of the third order are committed together with it
+        order_book.add(Order((3, "Limit", "Sell", 100, 20, 0)))
+        self.assertEqual(len(list(read_journal(self.journal_file))), 5)
+        journal.close()
+
+    def test_commit_interval(self):
+        journal = Journal(self.journal_file, commit_count=1000, commit_interval=0.01)
+        OrderBook(journal=journal).add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        for _ in range(100):
+            if list(read_journal(self.journal_file)):
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(list(read_journal(self.journal_file))), 1)
+        journal.close()
+
+    def test_interrupted_write(self):
+        with Journal(self.journal_file) as journal:
+            order_book = OrderBook(journal=journal)
+            order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        with open(self.journal_file, 'ab') as file:
+            file.write(b'\x00' * (entry_format.size // 2))
+
+        self.assertEqual(len(list(read_journal(self.journal_file))), 1)
+        with Journal(self.journal_file) as journal:
+            order_book = OrderBook.recover(self.journal_file, journal=journal)
+            order_book.add(Order((2, "Limit", "Sell", 100, 10, 0)))
+
+        self.assertEqual(len(list(read_journal(self.journal_file))), 3)
+        self.assertEqual(OrderBook.recover(self.journal_file).get_state(), order_book.get_state())
+
+    def test_diverging_journal(self):
+        with Journal(self.journal_file) as journal:
+            journal.append_order(Order((1, "Limit", "Buy", 100, 10, 0)))
+            journal.append_fill(1, 2, 100, 10)
+            journal.append_order(Order((3, "Limit", "Buy", 100, 10, 0)))
+        self.assertRaises(ValueError, OrderBook.recover, self.journal_file)
+        recovered_order_book = OrderBook.recover(self.journal_file, verify=False)
+        self.assertIn(1, recovered_order_book)
+        self.assertIn(3, recovered_order_book)
+
+    def test_restore_and_recover(self):
+        snapshot_file = os.path.join(os.path.dirname(self.journal_file), "book.snap")
+        order_book = OrderBook()
+        order_book.add(Order((1, "Iceberg", "Sell", 100, 50, 20)))
+        order_book.add(Order((2, "Limit", "Buy", 100, 30, 0)))
+        order_book.add(Order((3, "Limit", "Buy", 90, 10, 0)))
+        order_book.save_snapshot(snapshot_file, position=3)
+
+        with Journal(self.journal_file) as journal:
+            order_book, _ = OrderBook.load_snapshot(snapshot_file, journal=journal)
+            order_book.add(Order((4, "Limit", "Buy", 100, 25, 0)))
+            order_book.cancel(3)
+
+        self.assertEqual([entry[0] for entry in read_journal(self.journal_file)],
+                         [SNAPSHOT_ENTRY, ORDER_ENTRY, FILL_ENTRY, FILL_ENTRY, CANCEL_ENTRY])
+        recovered_order_book = OrderBook.recover(self.journal_file, snapshot_file=snapshot_file)
+        self.assertEqual(recovered_order_book.get_state(), order_book.get_state())
+
+        # the journal can't be recovered without its snapshot or with a different one
+        self.assertRaises(ValueError, OrderBook.recover, self.journal_file)
+        order_book.save_snapshot(snapshot_file, position=5)
+        self.assertRaises(ValueError, OrderBook.recover, self.journal_file, snapshot_file=snapshot_file)
+
+    def test_not_a_journal(self):
+        self.assertRaises(ValueError, list, read_journal("example.json"))
+
+
+if __name__ == '__main__':
+    unittest.main()
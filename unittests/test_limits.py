@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import unittest
+from modules.generator import generate_order_chunks
+from modules.journal import Journal
+from modules.limits import BookLimits, LimitEvent, EVICTED, REJECTED, MAX_ORDERS, PRICE_BAND, REJECT
+from modules.metrics import Metrics
+from modules.order import Order, BUY, SELL
+from modules.orderbook import OrderBook
+
+
+class TestLimits(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+
+    def summary(self) -> list[tuple]:
+        return [(event.action, event.reason, event.order_id) for event in self.events]
+
+    def test_max_orders_evict(self):
+        order_book = OrderBook(limits=BookLimits(max_orders=3, event_sink=self.events.append))
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.add(Order((2, "Limit", "Buy", 90, 10, 0)))
+        order_book.add(Order((3, "Limit", "Buy", 90, 10, 0)))
+        order_book.add(Order((4, "Limit", "Sell", 120, 10, 0)))
+        # the last order at the worst price makes room for a better one
+        order_book.add(Order((5, "Limit", "Buy", 95, 10, 0)))
+        # an order at the worst price (or worse) is rejected
+        order_book.add(Order((6, "Limit", "Buy", 90, 10, 0)))
+        order_book.add(Order((7, "Limit", "Buy", 80, 10, 0)))
+
+        self.assertEqual(self.summary(), [(EVICTED, MAX_ORDERS, 3), (REJECTED, MAX_ORDERS, 6),
+                                          (REJECTED, MAX_ORDERS, 7)])
+        self.assertEqual((order_book.count_orders(BUY), order_book.count_orders(SELL)), (3, 1))
+        self.assertNotIn(3, order_book)
+        self.assertIn(2, order_book)
+
+    def test_max_orders_reject(self):
+        limits = BookLimits(max_orders=1, policy=REJECT, event_sink=self.events.append)
+        order_book = OrderBook(store_transactions=True, limits=limits)
+        order_book.add(Order((1, "Limit", "Sell", 100, 10, 0)))
+        order_book.add(Order((2, "Limit", "Sell", 90, 10, 0)))
+        # matching is not affected, only the remainder is rejected
+        order_book.add(Order((3, "Iceberg", "Buy", 100, 50, 10)))
+        order_book.add(Order((4, "Limit", "Buy", 110, 10, 0)))
+
+        self.assertEqual(len(order_book.drain_transactions()), 1)
+        self.assertEqual(self.summary(), [(REJECTED, MAX_ORDERS, 2), (REJECTED, MAX_ORDERS, 4)])
+        self.assertEqual(self.events[0].__dict__(), {'event': REJECTED, 'reason': MAX_ORDERS, 'id': 2,
+                                                     'direction': 'Sell', 'price': 90, 'quantity': 10})
+        self.assertEqual(json.loads(self.events[1].return_json())['quantity'], 10)
+        self.assertEqual(order_book.best_bid_quantity, 10)
+        self.assertEqual((order_book.count_orders(), limits.rejected_orders, limits.evicted_orders), (1, 2, 0))
+
+    def test_price_band(self):
+        order_book = OrderBook(limits=BookLimits(price_band=20, event_sink=self.events.append))
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.add(Order((2, "Limit", "Sell", 120, 10, 0)))
+        order_book.add(Order((3, "Limit", "Buy", 90, 10, 0)))
+        order_book.add(Order((4, "Limit", "Buy", 80, 10, 0)))
+        order_book.add(Order((5, "Limit", "Sell", 140, 10, 0)))
+        self.assertEqual(self.summary(), [(REJECTED, PRICE_BAND, 4), (REJECTED, PRICE_BAND, 5)])
+
+        # the remainder of order 6 becomes the only side, so the reference price moves from 110 to 120
+        order_book.add(Order((6, "Limit", "Buy", 120, 20, 0)))
+        self.assertEqual(self.summary()[2:], [(EVICTED, PRICE_BAND, 3)])
+        self.assertEqual((order_book.best_bid, order_book.best_ask), (120, None))
+        self.assertEqual(order_book.get_depth(), json.dumps({'sequence': 0, 'buyLevels': [
+            {'price': 120, 'quantity': 10}, {'price': 100, 'quantity': 10}], 'sellLevels': []}))
+
+        # the best price level is never evicted
+        order_book.add(Order((7, "Limit", "Sell", 500, 10, 0)))
+        self.assertEqual(self.summary()[3:], [(EVICTED, PRICE_BAND, 1)])
+        self.assertEqual(order_book.count_orders(), 2)
+
+    def test_invalid_limits(self):
+        self.assertRaises(ValueError, BookLimits, max_orders=-1)
+        self.assertRaises(ValueError, BookLimits, price_band=-1)
+        self.assertRaises(ValueError, BookLimits, policy="drop")
+
+    def test_long_replay(self):
+        orders = []
+        for chunk in generate_order_chunks(20000, seed=5, iceberg_probability=0.2, price_mean=500,
+                                           price_deviation=100, quantity_mean=1000, quantity_deviation=400,
+                                           peak_min=10, peak_max=400):
+            orders.extend(map(Order.from_codes, chunk['id'].tolist(), chunk['side'].tolist(),
+                              chunk['kind'].tolist(), chunk['price'].tolist(), chunk['quantity'].tolist(),
+                              chunk['peak'].tolist()))
+
+        limits = BookLimits(max_orders=100, price_band=100)
+        order_book = OrderBook(limits=limits, metrics=Metrics())
+        for order in orders[:5000]:
+            order_book.add(order)
+            self.assertLessEqual(order_book.count_orders(BUY), 100)
+            self.assertLessEqual(order_book.count_orders(SELL), 100)
+        order_book.add_many(orders[5000:])
+
+        depth = json.loads(order_book.get_depth())
+        reference = order_book.best_bid + order_book.best_ask
+        for level in depth['buyLevels'] + depth['sellLevels']:
+            self.assertLessEqual(abs(2 * level['price'] - reference), 200)
+        self.assertGreater(limits.evicted_orders, 0)
+        self.assertGreater(limits.rejected_orders, 0)
+
+    def test_recover_and_restore(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        directory = temporary_directory.name
+        journal_file = os.path.join(directory, "orders.wal")
+        snapshot_file = os.path.join(directory, "book.snap")
+        orders = [Order((order_id, "Limit", "Buy" if order_id % 2 else "Sell",
+                         100 + 10 * (order_id % 7) if order_id % 2 else 130 + 10 * (order_id % 5), 10, 0))
+                  for order_id in range(1, 60)]
+
+        with Journal(journal_file) as journal:
+            order_book = OrderBook(journal=journal, limits=BookLimits(max_orders=5, price_band=30))
+            order_book.add_many(orders)
+        order_book.save_snapshot(snapshot_file)
+
+        # the same limits reject and evict the same orders again
+        recovered_order_book = OrderBook.recover(journal_file, limits=BookLimits(max_orders=5, price_band=30))
+        self.assertEqual(recovered_order_book.get_state(), order_book.get_state())
+
+        # the restored state is taken as it is
+        limits = BookLimits(max_orders=1, event_sink=self.events.append)
+        restored_order_book, _ = OrderBook.load_snapshot(snapshot_file, limits=limits)
+        self.assertEqual(restored_order_book.get_state(), order_book.get_state())
+        self.assertEqual(self.events, [])
+        restored_order_book.add(Order((100, "Limit", "Buy", 50, 10, 0)))
+        self.assertEqual(self.summary(), [(REJECTED, MAX_ORDERS, 100)])
+        self.assertIsInstance(self.events[0], LimitEvent)
+
+
+if __name__ == '__main__':
+    unittest.main()
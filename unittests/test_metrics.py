@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+from modules.metrics import Histogram, Metrics
+from modules.order import Order
+from modules.orderbook import OrderBook
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.orders = self.create_orders()
+
+    @staticmethod
+    def create_orders() -> list[Order]:
+        return [
+            Order((1, "Limit", "Sell", 100, 10, 0)),
+            Order((2, "Iceberg", "Sell", 110, 50, 20)),
+            Order((3, "Limit", "Buy", 90, 30, 0)),
+            Order((4, "Limit", "Buy", 110, 40, 0))
+        ]
+
+    def test_histogram(self):
+        histogram = Histogram()
+        histogram.observe(0)
+        histogram.observe(5, count=2)
+        histogram.observe(8)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 18)
+        self.assertEqual(histogram.__dict__()['buckets'], {'0': 1, '1': 0, '3': 0, '7': 2, '15': 1})
+
+    def test_counters(self):
+        metrics = Metrics()
+        order_book = OrderBook(metrics=metrics)
+        for order in self.orders:
+            order_book.add(order)
+        order_book.cancel(3)
+
+        self.assertEqual(metrics.counters['orders_total'], 4)
+        self.assertEqual(metrics.counters['fills_total'], 3)
+        self.assertEqual(metrics.counters['iceberg_refreshes_total'], 1)
+        self.assertEqual(metrics.counters['cancels_total'], 1)
+        self.assertEqual(metrics.histograms['fills_per_order'].count, 4)
+        self.assertEqual(metrics.histograms['fills_per_order'].sum, 3)
+        self.assertEqual(metrics.histograms['levels_swept_per_order'].sum, 2)
+        self.assertEqual(metrics.histograms['add_latency_ns'].count, 4)
+
+    def test_add_many(self):
+        metrics = Metrics()
+        order_book = OrderBook(metrics=metrics)
+        transactions = order_book.add_many(self.orders)
+
+        self.assertEqual(len(transactions), 3)
+        self.assertEqual(metrics.counters['orders_total'], 4)
+        self.assertEqual(metrics.counters['fills_total'], 3)
+        self.assertEqual(metrics.histograms['fills_per_order'].count, 4)
+        self.assertEqual(metrics.histograms['fills_per_order'].buckets[0], 3)
+        self.assertEqual(metrics.histograms['levels_swept_per_order'].count, 4)
+
+    def test_uninstrumented_order_book(self):
+        order_book = OrderBook()
+        instrumented_order_book = OrderBook(metrics=Metrics())
+        self.assertNotIn('add', vars(order_book))
+        orders = self.create_orders()
+        self.assertEqual([transaction.__dict__() for transaction in order_book.add_many(orders)],
+                         [transaction.__dict__() for transaction in instrumented_order_book.add_many(self.orders)])
+        self.assertEqual(order_book.get_state(), instrumented_order_book.get_state())
+
+    def test_serialization(self):
+        metrics = Metrics()
+        order_book = OrderBook(metrics=metrics)
+        order_book.add(self.orders[0])
+        order_book.get_state()
+        order_book.get_depth()
+        self.assertEqual(metrics.histograms['serialization_latency_ns'].count, 2)
+
+    def test_save(self):
+        metrics = Metrics()
+        order_book = OrderBook(metrics=metrics)
+        for order in self.orders:
+            order_book.add(order)
+
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        directory = temporary_directory.name
+        json_file = os.path.join(directory, "metrics.json")
+        metrics.save(json_file)
+        with open(json_file) as file:
+            self.assertEqual(json.load(file)['counters']['fills_total'], 3)
+
+        prometheus_file = os.path.join(directory, "metrics.prom")
+        metrics.save(prometheus_file)
+        with open(prometheus_file) as file:
+            lines = file.read().splitlines()
+        self.assertIn("# TYPE orderbook_fills_total counter", lines)
+        self.assertIn("orderbook_fills_total 3", lines)
+        self.assertIn('orderbook_fills_per_order_bucket{le="+Inf"} 4', lines)
+        self.assertIn("orderbook_fills_per_order_count 4", lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
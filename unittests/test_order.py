@@ -1,5 +1,5 @@
 import unittest
-from modules.order import Order
+from modules.order import Order, BUY, SELL, LIMIT, ICEBERG
 
 
 class TestOrderStructure(unittest.TestCase):
@@ -56,6 +56,23 @@ class TestOrderStructure(unittest.TestCase):
         self.assertEqual(order_info_dictionary.get('direction'), "Sell")
         self.assertEqual(order_dictionary.get('type'), "Iceberg")
 
+    def test_order_codes(self):
+        order = Order((1, "Iceberg", "Sell", 30, 100, 10))
+        self.assertEqual(order.side, SELL)
+        self.assertEqual(order.kind, ICEBERG)
+
+        order.direction = "Buy"
+        self.assertEqual(order.side, BUY)
+        self.assertEqual(order.direction, "Buy")
+        with self.assertRaises(ValueError):
+            order.type = "Market"
+        self.assertEqual(Order((2, "Limit", "Buy", 30, 100, 0)).kind, LIMIT)
+
+    def test_order_has_no_instance_dictionary(self):
+        order = Order((1, "Limit", "Buy", 30, 100, 0))
+        with self.assertRaises(AttributeError):
+            order.comment = "not a field"
+
 
 if __name__ == '__main__':
     unittest.main()
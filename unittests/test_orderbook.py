@@ -1,6 +1,7 @@
 import unittest
 from modules.order import Order
 from modules.orderbook import OrderBook
+from modules.transaction import Transaction
 
 
 class TestOrderBook(unittest.TestCase):
@@ -25,6 +26,54 @@ class TestOrderBook(unittest.TestCase):
         order_book.cancel(order)
         self.assertRaises(ValueError, order_book.cancel, order)
 
+    def test_order_book_cancel_order_by_id(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 100, 0)))
+        order_book.add(Order((2, "Limit", "Buy", 100, 50, 0)))
+        order_book.cancel(1)
+        self.assertEqual(order_book.get_state(),
+                         '{"buyOrders": [{"id": 2, "price": 100, "quantity": 50}], "sellOrders": []}')
+        self.assertRaises(ValueError, order_book.cancel, 1)
+
+    def test_order_book_cancel_filled_order(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 100, 0)))
+        order_book.add(Order((2, "Limit", "Sell", 100, 100, 0)))
+        self.assertRaises(ValueError, order_book.cancel, 1)
+        self.assertRaises(ValueError, order_book.cancel, 2)
+
+    def test_order_book_duplicate_id(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 100, 0)))
+        self.assertRaises(ValueError, order_book.add, Order((1, "Limit", "Sell", 200, 100, 0)))
+
+    def test_order_book_modify_order(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 100, 0)))
+        order_book.add(Order((2, "Limit", "Buy", 100, 50, 0)))
+
+        order_book.modify(1, 80)
+        self.assertEqual(order_book.get_state(),
+                         '{"buyOrders": [{"id": 1, "price": 100, "quantity": 80},'
+                         ' {"id": 2, "price": 100, "quantity": 50}], "sellOrders": []}')
+
+        order_book.modify(1, 120)
+        self.assertEqual(order_book.get_state(),
+                         '{"buyOrders": [{"id": 2, "price": 100, "quantity": 50},'
+                         ' {"id": 1, "price": 100, "quantity": 120}], "sellOrders": []}')
+
+        self.assertRaises(ValueError, order_book.modify, 1, 0)
+        self.assertRaises(ValueError, order_book.modify, 3, 10)
+
+    def test_order_book_modify_iceberg_order(self):
+        order_book = OrderBook(store_transactions=True)
+        order_book.add(Order((1, "Iceberg", "Sell", 100, 300, 100)))
+        order_book.modify(1, 150)
+        order_book.add(Order((2, "Limit", "Buy", 100, 500, 0)))
+        self.assertEqual(order_book.last_transactions,
+                         ['{"buyOrderId": 2, "sellOrderId": 1, "price": 100, "quantity": 100}',
+                          '{"buyOrderId": 2, "sellOrderId": 1, "price": 100, "quantity": 50}'])
+
     def test_order_book_not_storing_transactions(self):
         order_book = OrderBook(store_transactions=False)
         order_book.add(Order((1, "Limit", "Buy", 100, 100, 0)))
@@ -51,6 +100,101 @@ class TestOrderBook(unittest.TestCase):
                          '{"buyOrders": [{"id": 1, "price": 100, "quantity": 50}],'
                          ' "sellOrders": [{"id": 3, "price": 120, "quantity": 40}]}')
 
+    def test_order_book_drain_transactions(self):
+        order_book = OrderBook(store_transactions=True)
+        other_order_book = OrderBook(store_transactions=True)
+        order_book.add(Order((1, "Limit", "Buy", 100, 100, 0)))
+        order_book.add(Order((2, "Limit", "Sell", 90, 40, 0)))
+        order_book.add(Order((3, "Limit", "Sell", 100, 40, 0)))
+        self.assertEqual(order_book.last_transactions,
+                         ['{"buyOrderId": 1, "sellOrderId": 3, "price": 100, "quantity": 40}'])
+        self.assertEqual(other_order_book.last_transactions, [])
+
+        self.assertEqual(order_book.drain_transactions(),
+                         [Transaction(1, 2, 100, 40), Transaction(1, 3, 100, 40)])
+        self.assertEqual(order_book.drain_transactions(), [])
+        self.assertEqual(order_book.last_transactions, [])
+
+    def test_order_book_transaction_sink(self):
+        transactions = []
+        order_book = OrderBook(transaction_sink=transactions.append)
+        order_book.add(Order((1, "Iceberg", "Sell", 100, 100, 30)))
+        order_book.add(Order((2, "Limit", "Buy", 110, 50, 0)))
+        self.assertEqual(transactions, [Transaction(2, 1, 100, 30), Transaction(2, 1, 100, 20)])
+        self.assertEqual(order_book.drain_transactions(), [])
+
+    def test_order_book_depth(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.add(Order((2, "Iceberg", "Buy", 100, 50, 20)))
+        order_book.add(Order((3, "Limit", "Buy", 90, 30, 0)))
+        order_book.add(Order((4, "Limit", "Sell", 120, 40, 0)))
+        self.assertEqual(order_book.get_depth(),
+                         '{"sequence": 0, "buyLevels": [{"price": 100, "quantity": 30}, {"price": 90, "quantity": 30}],'
+                         ' "sellLevels": [{"price": 120, "quantity": 40}]}')
+        self.assertEqual(order_book.get_depth(levels=1),
+                         '{"sequence": 0, "buyLevels": [{"price": 100, "quantity": 30}],'
+                         ' "sellLevels": [{"price": 120, "quantity": 40}]}')
+
+    def test_order_book_depth_updates(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.add(Order((2, "Limit", "Buy", 90, 30, 0)))
+        self.assertEqual(order_book.get_depth_update(),
+                         '{"sequence": 1, "buyLevels": [{"price": 100, "quantity": 10}, {"price": 90, "quantity": 30}],'
+                         ' "sellLevels": []}')
+        self.assertEqual(order_book.get_depth_update(), '{"sequence": 2, "buyLevels": [], "sellLevels": []}')
+
+        order_book.add(Order((3, "Iceberg", "Sell", 100, 50, 20)))
+        self.assertEqual(order_book.get_depth_update(),
+                         '{"sequence": 3, "buyLevels": [{"price": 100, "quantity": 0}],'
+                         ' "sellLevels": [{"price": 100, "quantity": 10}]}')
+
+        order_book.modify(2, 20)
+        order_book.cancel(3)
+        self.assertEqual(order_book.get_depth_update(),
+                         '{"sequence": 4, "buyLevels": [{"price": 90, "quantity": 20}],'
+                         ' "sellLevels": [{"price": 100, "quantity": 0}]}')
+
+    def test_order_book_add_many(self):
+        orders = [(1, "Iceberg", "Sell", 100, 200, 100), (2, "Limit", "Sell", 90, 300, 0),
+                  (3, "Limit", "Buy", 80, 100, 0), (4, "Iceberg", "Buy", 100, 500, 100),
+                  (5, "Limit", "Sell", 70, 150, 0), (6, "Limit", "Buy", 110, 50, 0)]
+
+        order_book = OrderBook(store_transactions=True)
+        transactions = []
+        for order in orders:
+            order_book.add(Order(order))
+            transactions += order_book.drain_transactions()
+
+        batch_order_book = OrderBook()
+        self.assertEqual(batch_order_book.add_many(Order(order) for order in orders), transactions)
+        self.assertEqual(batch_order_book.get_state(), order_book.get_state())
+        self.assertEqual(batch_order_book.drain_transactions(), [])
+
+        batch_order_book.add(Order((7, "Limit", "Sell", 90, 10, 0)))
+        order_book.add(Order((7, "Limit", "Sell", 90, 10, 0)))
+        self.assertEqual(batch_order_book.get_state(), order_book.get_state())
+
+    def test_order_book_add_many_duplicate_id(self):
+        order_book = OrderBook(store_transactions=True)
+        orders = [Order((1, "Limit", "Sell", 100, 200, 0)), Order((1, "Limit", "Sell", 100, 200, 0))]
+        self.assertRaises(ValueError, order_book.add_many, orders)
+        self.assertEqual(order_book.get_state(),
+                         '{"buyOrders": [], "sellOrders": [{"id": 1, "price": 100, "quantity": 200}]}')
+
+        # fills of the orders preceding the failing one are not lost
+        for store_transactions in (False, True):
+            order_book = OrderBook(store_transactions=store_transactions)
+            orders = [Order((1, "Limit", "Sell", 100, 200, 0)), Order((2, "Limit", "Buy", 100, 50, 0)),
+                      Order((1, "Limit", "Sell", 100, 200, 0))]
+            with self.assertRaises(ValueError) as context:
+                order_book.add_many(orders)
+            self.assertEqual([transaction.quantity for transaction in context.exception.transactions], [50])
+
+            order_book.add(Order((3, "Limit", "Buy", 90, 10, 0)))
+            self.assertEqual(len(order_book.drain_transactions()), 1 if store_transactions else 0)
+
     def test_order_book_iceberg_transactions(self):
         order_book = OrderBook(store_transactions=True)
         orders = [
@@ -88,6 +232,77 @@ class TestOrderBook(unittest.TestCase):
             self.assertEqual(order_book.get_state(), expected_states[i])
             self.assertEqual(order_book.last_transactions, expected_transactions[i])
 
+    def test_order_book_price_levels(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.add(Order((2, "Limit", "Buy", 120, 20, 0)))
+        order_book.add(Order((3, "Limit", "Buy", 100, 30, 0)))
+        order_book.add(Order((4, "Limit", "Sell", 140, 40, 0)))
+        order_book.add(Order((5, "Limit", "Sell", 130, 50, 0)))
+        self.assertEqual(order_book.get_state(),
+                         '{"buyOrders": [{"id": 2, "price": 120, "quantity": 20},'
+                         ' {"id": 1, "price": 100, "quantity": 10}, {"id": 3, "price": 100, "quantity": 30}],'
+                         ' "sellOrders": [{"id": 5, "price": 130, "quantity": 50},'
+                         ' {"id": 4, "price": 140, "quantity": 40}]}')
+
+    def test_order_book_iceberg_requeue_at_aggressor_price(self):
+        order_book = OrderBook(store_transactions=True)
+        order_book.add(Order((1, "Iceberg", "Sell", 100, 200, 100)))
+        order_book.add(Order((2, "Limit", "Buy", 100, 500, 0)))
+        self.assertEqual(order_book.last_transactions,
+                         ['{"buyOrderId": 2, "sellOrderId": 1, "price": 100, "quantity": 100}',
+                          '{"buyOrderId": 2, "sellOrderId": 1, "price": 100, "quantity": 100}'])
+        self.assertEqual(order_book.get_state(),
+                         '{"buyOrders": [{"id": 2, "price": 100, "quantity": 300}], "sellOrders": []}')
+
+
+    def test_order_book_top_of_book(self):
+        order_book = OrderBook()
+        self.assertEqual((order_book.best_bid, order_book.best_ask, order_book.spread, order_book.mid),
+                         (None, None, None, None))
+
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.add(Order((2, "Limit", "Buy", 110, 20, 0)))
+        order_book.add(Order((3, "Iceberg", "Sell", 130, 100, 30)))
+        order_book.add(Order((4, "Limit", "Sell", 140, 40, 0)))
+        self.assertEqual((order_book.best_bid, order_book.best_bid_quantity), (110, 20))
+        self.assertEqual((order_book.best_ask, order_book.best_ask_quantity), (130, 30))
+        self.assertEqual((order_book.spread, order_book.mid), (20, 120.0))
+        self.assertEqual([order_book.quantity_at(price) for price in (100, 110, 120, 130, 140)], [10, 20, 0, 30, 40])
+
+        # the iceberg order is refreshed once and partially filled again
+        order_book.add(Order((5, "Limit", "Buy", 130, 50, 0)))
+        self.assertEqual((order_book.best_ask, order_book.best_ask_quantity), (130, 10))
+        self.assertEqual(order_book.best_bid, 110)
+        order_book.add(Order((6, "Limit", "Sell", 110, 20, 0)))
+        self.assertEqual((order_book.best_bid, order_book.best_bid_quantity), (100, 10))
+
+        order_book.cancel(3)
+        self.assertEqual((order_book.best_ask, order_book.spread), (140, 40))
+        order_book.cancel(1)
+        self.assertEqual((order_book.best_bid, order_book.best_bid_quantity, order_book.mid), (None, 0, None))
+        order_book.modify(4, 15)
+        self.assertEqual(order_book.best_ask_quantity, 15)
+
+
+    def test_order_book_sweep_level(self):
+        transactions = []
+        order_book = OrderBook(transaction_sink=transactions.append)
+        order_book.add(Order((1, "Limit", "Sell", 100, 10, 0)))
+        order_book.add(Order((2, "Iceberg", "Sell", 100, 50, 20)))
+        order_book.add(Order((3, "Limit", "Sell", 100, 5, 0)))
+        order_book.add(Order((4, "Iceberg", "Sell", 110, 30, 10)))
+        order_book.modify(2, 45)
+
+        # the whole level of 100 is filled, iceberg slices in the same order as one fill at a time
+        order_book.add(Order((5, "Limit", "Buy", 110, 65, 0)))
+        self.assertEqual(transactions, [Transaction(5, 1, 100, 10), Transaction(5, 2, 100, 20),
+                                        Transaction(5, 3, 100, 5), Transaction(5, 2, 100, 20),
+                                        Transaction(5, 2, 100, 5), Transaction(5, 4, 110, 5)])
+        self.assertEqual((order_book.best_ask, order_book.best_ask_quantity), (110, 5))
+        self.assertNotIn(2, order_book)
+        self.assertEqual(order_book.get_depth(),
+                         '{"sequence": 0, "buyLevels": [], "sellLevels": [{"price": 110, "quantity": 5}]}')
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from modules.auxiliary import create_order_list, read_orders
+from modules.order import Order
+from modules.orderlog import convert_to_order_log, is_order_log, read_order_log, read_records
+
+
+class TestOrderLog(unittest.TestCase):
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = temporary_directory.name
+        self.order_log = os.path.join(self.directory, "orders.bin")
+
+    def test_convert_example(self):
+        orders = create_order_list("example.json")
+        convert_to_order_log(orders, self.order_log)
+
+        self.assertTrue(is_order_log(self.order_log))
+        self.assertFalse(is_order_log("example.json"))
+        self.assertEqual([order.__dict__(simple=False) for order in read_order_log(self.order_log)],
+                         [order.__dict__(simple=False) for order in orders])
+        self.assertEqual([order.hidden_quantity for order in read_orders(self.order_log)],
+                         [order.hidden_quantity for order in orders])
+
+    def test_timestamps(self):
+        orders = [Order((1, "Limit", "Buy", 100, 10, 0)), Order((2, "Iceberg", "Sell", 90, 50, 20))]
+        convert_to_order_log(orders, self.order_log, timestamps=[1000, 2000])
+        self.assertEqual(list(read_records(self.order_log)),
+                         [(1, 100, 10, 0, 0, 0, 1000), (2, 90, 50, 20, 1, 1, 2000)])
+
+    def test_truncated_order_log(self):
+        convert_to_order_log([Order((1, "Limit", "Buy", 100, 10, 0))], self.order_log)
+        with open(self.order_log, 'ab') as file:
+            file.write(b'\x00' * 3)
+        self.assertRaises(ValueError, list, read_order_log(self.order_log))
+
+    def test_not_an_order_log(self):
+        self.assertRaises(ValueError, list, read_records("example.json"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from modules.auxiliary import read_orders
+from modules.orderlog import convert_to_order_log
+from modules.pipeline import read_orders_in_parallel, split_file
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        directory = temporary_directory.name
+        self.orders = [{"type": "Iceberg" if index % 3 == 0 else "Limit",
+                        "order": {"direction": "Buy" if index % 2 else "Sell", "id": index, "price": 100 + index % 7,
+                                  "quantity": 10 * index, **({"peak": 5} if index % 3 == 0 else {})}}
+                       for index in range(1, 101)]
+
+        self.array_file = os.path.join(directory, "orders.json")
+        with open(self.array_file, 'w') as file:
+            json.dump(self.orders, file, indent=4)
+        self.lines_file = os.path.join(directory, "orders.jsonl")
+        with open(self.lines_file, 'w') as file:
+            file.writelines(json.dumps(order) + "\n" for order in self.orders)
+        self.order_log_file = os.path.join(directory, "orders.bin")
+        convert_to_order_log(read_orders(self.lines_file), self.order_log_file)
+
+    @staticmethod
+    def serialize(orders) -> list[tuple]:
+        return [(order.__str__(simple=False), order.hidden_quantity) for order in orders]
+
+    def test_split_file(self):
+        for input_file, expected_array in ((self.array_file, True), (self.lines_file, False)):
+            array, ranges = split_file(input_file, 500)
+            self.assertEqual(array, expected_array)
+            self.assertGreater(len(ranges), 1)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], os.path.getsize(input_file))
+            self.assertTrue(all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:])))
+
+    def test_read_orders_in_parallel(self):
+        for input_file in (self.array_file, self.lines_file, self.order_log_file, "example.json"):
+            expected_orders = self.serialize(read_orders(input_file))
+            self.assertEqual(self.serialize(read_orders_in_parallel(input_file, 2, chunk_size=300, queue_size=1)),
+                             expected_orders)
+            self.assertEqual(self.serialize(read_orders_in_parallel(input_file, 3, start=10, chunk_size=1000)),
+                             expected_orders[10:])
+
+    def test_invalid_order(self):
+        self.orders[50]["order"]["price"] = 0
+        with open(self.lines_file, 'w') as file:
+            file.writelines(json.dumps(order) + "\n" for order in self.orders)
+
+        orders = read_orders_in_parallel(self.lines_file, 2, chunk_size=200)
+        self.assertEqual(len(self.serialize(order for _, order in zip(range(50), orders))), 50)
+        self.assertRaises(ValueError, next, orders)
+
+
+if __name__ == '__main__':
+    unittest.main()
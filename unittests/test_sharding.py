@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+from modules.order import Order
+from modules.orderbook import OrderBook
+from modules.sharding import get_shard, get_symbol, process_sharded_orders
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        self.messages = []
+        for index, symbol in enumerate(["A", "B", "C", "A", "B", "C", "A", "B", "C"]):
+            direction = "Buy" if index < 3 else "Sell"
+            order_data = {"type": "Limit", "order": {"direction": direction, "id": index + 1, "price": 100,
+                                                     "quantity": 10 + index}}
+            self.messages.append(json.dumps({"symbol": symbol, **order_data}))
+
+    def test_get_symbol(self):
+        self.assertEqual(get_symbol(self.messages[1]), "B")
+        self.assertEqual(get_symbol({"symbol": "B"}), "B")
+        self.assertEqual(get_symbol(json.dumps({"symbol": "\"B\""})), "\"B\"")
+        self.assertEqual(get_symbol('{"type": "Limit"}'), "")
+
+    def test_get_shard(self):
+        self.assertEqual([get_shard(symbol, 4) for symbol in "ABC"], [get_shard(symbol, 4) for symbol in "ABC"])
+        self.assertTrue(all(0 <= get_shard(symbol, 3) < 3 for symbol in "ABCDEFGH"))
+
+    def test_sharded_order_books(self):
+        order_books = {}
+        for message in self.messages:
+            order_books.setdefault(get_symbol(message), OrderBook()).add(Order(message))
+
+        number_of_orders, sharded_order_books = process_sharded_orders(self.messages, 2, batch_size=2)
+        self.assertEqual(number_of_orders, len(self.messages))
+        self.assertEqual({symbol: order_book.get_state() for symbol, order_book in sharded_order_books.items()},
+                         {symbol: order_book.get_state() for symbol, order_book in order_books.items()})
+
+    def test_transactions_output(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        transactions_output = os.path.join(temporary_directory.name, "transactions.jsonl")
+        process_sharded_orders(self.messages, 3, transactions_output=transactions_output, batch_size=1)
+        with open(transactions_output) as file:
+            transactions = sorted((transaction['symbol'], transaction['buyOrderId'], transaction['sellOrderId'],
+                                   transaction['quantity']) for transaction in map(json.loads, file))
+
+        self.assertEqual(transactions, [("A", 1, 4, 10), ("B", 2, 5, 11), ("C", 3, 6, 12)])
+        self.assertFalse(os.path.exists(transactions_output + ".0"))
+
+    def test_duplicate_id(self):
+        messages = self.messages + [self.messages[6]]
+        self.assertRaises(ValueError, process_sharded_orders, messages, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from modules.auxiliary import create_order_list
+from modules.order import Order
+from modules.orderbook import OrderBook
+from modules.orderlog import convert_to_order_log
+from modules.snapshot import read_snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = temporary_directory.name
+        self.snapshot = os.path.join(self.directory, "book.snap")
+
+    def test_restore(self):
+        order_book = OrderBook()
+        order_book.add(Order((1, "Iceberg", "Sell", 100, 50, 20)))
+        order_book.add(Order((2, "Limit", "Sell", 100, 10, 0)))
+        order_book.add(Order((3, "Limit", "Buy", 100, 25, 0)))
+        order_book.add(Order((4, "Limit", "Buy", 90, 30, 0)))
+        order_book.get_depth_update()
+        order_book.save_snapshot(self.snapshot, position=4)
+
+        restored_order_book, position = OrderBook.load_snapshot(self.snapshot)
+        self.assertEqual(position, 4)
+        self.assertEqual(restored_order_book.get_state(), order_book.get_state())
+        self.assertEqual(restored_order_book.get_depth(), order_book.get_depth())
+        self.assertEqual(restored_order_book.get_depth_update(), order_book.get_depth_update())
+
+        # the hidden quantity, the timestamp counter and the priority are restored as well
+        for book in (order_book, restored_order_book):
+            book.add(Order((5, "Limit", "Buy", 100, 60, 0)))
+            book.add(Order((6, "Limit", "Sell", 90, 5, 0)))
+        self.assertEqual([transaction.__dict__() for transaction in restored_order_book.drain_transactions()],
+                         [transaction.__dict__() for transaction in order_book.drain_transactions()])
+        self.assertEqual(restored_order_book.get_state(), order_book.get_state())
+
+    def test_replay_tail(self):
+        orders = create_order_list("example.json")
+        order_log = os.path.join(self.directory, "orders.bin")
+        convert_to_order_log(orders, order_log)
+
+        order_book = OrderBook()
+        for order in create_order_list(order_log)[:2]:
+            order_book.add(order)
+        order_book.save_snapshot(self.snapshot, position=2)
+
+        restored_order_book, position = OrderBook.load_snapshot(self.snapshot)
+        for order in create_order_list(order_log, position):
+            restored_order_book.add(order)
+
+        complete_order_book = OrderBook()
+        for order in create_order_list("example.json"):
+            complete_order_book.add(order)
+        self.assertEqual(restored_order_book.get_state(), complete_order_book.get_state())
+
+    def test_empty_order_book(self):
+        OrderBook().save_snapshot(self.snapshot)
+        header, orders = read_snapshot(self.snapshot)
+        self.assertEqual((header.number_of_orders, header.position), (0, 0))
+        self.assertEqual(list(orders), [])
+
+    def test_invalid_snapshot(self):
+        self.assertRaises(ValueError, read_snapshot, "example.json")
+
+        order_book = OrderBook()
+        order_book.add(Order((1, "Limit", "Buy", 100, 10, 0)))
+        order_book.save_snapshot(self.snapshot)
+        with open(self.snapshot, 'r+b') as file:
+            file.truncate(os.path.getsize(self.snapshot) - 1)
+        self.assertRaises(ValueError, OrderBook.load_snapshot, self.snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+from modules.order import Order
+from modules.orderbook import OrderBook
+from modules.validation import Reject, validate_order, DUPLICATE_ID, INVALID_ID, INVALID_PEAK, INVALID_PRICE, \
+    INVALID_QUANTITY, MALFORMED, MISSING_PEAK, UNKNOWN_DIRECTION, UNKNOWN_TYPE
+
+
+class TestValidation(unittest.TestCase):
+    @staticmethod
+    def create_message(order_type: object = "Limit", **order_data) -> str:
+        fields = {"direction": "Buy", "id": 1, "price": 100, "quantity": 10}
+        fields.update(order_data)
+        return json.dumps({"type": order_type, "order": fields})
+
+    def assertRejected(self, message, reason: str, order_id: int = None, order_book: OrderBook = None):
+        reject = validate_order(message, order_book)
+        self.assertIsInstance(reject, Reject)
+        self.assertEqual((reject.order_id, reject.reason), (order_id, reason))
+
+    def test_valid_order(self):
+        message = self.create_message("Iceberg", peak=5)
+        order = validate_order(message)
+        self.assertIsInstance(order, Order)
+        self.assertEqual(order, Order(message))
+        self.assertEqual((order.quantity, order.hidden_quantity), (5, 5))
+        self.assertEqual(validate_order(json.loads(message)), order)
+        self.assertEqual(validate_order(message.encode()), order)
+
+    def test_malformed(self):
+        self.assertRejected("garbage", MALFORMED)
+        self.assertRejected("{garbage", MALFORMED)
+        self.assertRejected("[1, 2]", MALFORMED)
+        self.assertRejected('{"type": "Limit"}', MALFORMED)
+        self.assertRejected('{"type": "Limit", "order": 1}', MALFORMED)
+
+    def test_unknown_type(self):
+        self.assertRejected(self.create_message("Market"), UNKNOWN_TYPE, 1)
+        self.assertRejected(self.create_message(["Limit"]), UNKNOWN_TYPE, 1)
+
+    def test_unknown_direction(self):
+        self.assertRejected(self.create_message(direction="Up"), UNKNOWN_DIRECTION, 1)
+
+    def test_invalid_id(self):
+        self.assertRejected(self.create_message(id=-1), INVALID_ID)
+        self.assertRejected(self.create_message(id="1"), INVALID_ID)
+
+    def test_invalid_price(self):
+        self.assertRejected(self.create_message(price=0), INVALID_PRICE, 1)
+        self.assertRejected(self.create_message(price=-100), INVALID_PRICE, 1)
+        self.assertRejected(self.create_message(price=10.5), INVALID_PRICE, 1)
+        self.assertRejected(self.create_message(price=True), INVALID_PRICE, 1)
+
+    def test_invalid_quantity(self):
+        self.assertRejected(self.create_message(quantity=-10), INVALID_QUANTITY, 1)
+        self.assertRejected(self.create_message(quantity=None), INVALID_QUANTITY, 1)
+
+    def test_peak(self):
+        self.assertRejected(self.create_message("Iceberg"), MISSING_PEAK, 1)
+        self.assertRejected(self.create_message("Iceberg", peak=0), MISSING_PEAK, 1)
+        self.assertRejected(self.create_message("Iceberg", peak=-5), INVALID_PEAK, 1)
+
+    def test_duplicate_id(self):
+        order_book = OrderBook()
+        order_book.add(validate_order(self.create_message(), order_book))
+        self.assertRejected(self.create_message(), DUPLICATE_ID, 1, order_book)
+        self.assertEqual(json.loads(validate_order(self.create_message(), order_book).return_json())['reason'],
+                         DUPLICATE_ID)
+
+
+if __name__ == '__main__':
+    unittest.main()